@@ -3,7 +3,27 @@ import json
 from pathlib import Path
 from .backends.local_sqlite import LocalSQLiteBackend
 from .config import find_zotero_database
-from .utils import validate_reorganization, build_collection_hierarchy
+from .utils import validate_reorganization, read_jsonl, split_reorganization, reorganization_record_key
+from .bulk_apply import ApplyPlan
+
+
+def load_reorganization(reorganization_file: Path) -> dict:
+    """
+    Read moves and collection operations from a reorganization.json or a
+    streamed reorganization.jsonl.
+
+    JSONL files hold one move or collection operation per line; a later line
+    for the same item and current collection (or the same operation on the
+    same collection) replaces an earlier one.
+    """
+    if reorganization_file.suffix != ".jsonl":
+        with open(reorganization_file) as f:
+            return json.load(f)
+
+    records = {}
+    for record in read_jsonl(reorganization_file):
+        records[reorganization_record_key(record) if isinstance(record, dict) else len(records)] = record
+    return split_reorganization(records.values())
 
 
 def apply_reorganization(reorganization_file: Path):
@@ -11,10 +31,10 @@ def apply_reorganization(reorganization_file: Path):
     Apply reorganization suggestions from a saved file.
 
     Args:
-        reorganization_file: Path to JSON file with reorganization suggestions
+        reorganization_file: Path to reorganization.json, or the
+            reorganization.jsonl a dry run streams as it goes
     """
-    with open(reorganization_file) as f:
-        reorganization = json.load(f)
+    reorganization = load_reorganization(reorganization_file)
 
     # Validate schema
     errors = validate_reorganization(reorganization)
@@ -24,64 +44,37 @@ def apply_reorganization(reorganization_file: Path):
             print(f"  - {error}")
         raise ValueError(f"Reorganization file failed validation with {len(errors)} error(s)")
 
-    moves = reorganization["moves"]
+    moves = reorganization.get("moves", [])
+    collection_ops = reorganization.get("collection_ops", [])
 
-    if len(moves) == 0:
+    if not moves and not collection_ops:
         print("No reorganization needed - structure is already optimal")
         return
 
     print(f"📂 Loading reorganization from: {reorganization_file}")
-    print(f"   {len(moves)} items to reorganize\n")
+    print(f"   {len(moves)} items to reorganize, {len(collection_ops)} collection operations\n")
 
     # Connect to database
     db_path = find_zotero_database()
     backend = LocalSQLiteBackend(db_path)
 
     with backend.connect(read_only=False) as backend:
-        # Build collection key map from existing collections
-        existing_collections = backend.list_collections()
-        new_collection_cache = {}
-
-        # Process each move
-        for move in moves:
-            item_key = move['item_key']
-            current_path = move['current_path']
-            new_path = move['new_path']
-
-            print(f"\n{'='*60}")
-            print(f"Item: {move.get('title', item_key)}")
-            print(f"Current: {current_path}")
-            print(f"New: {new_path}")
-            print(f"Reasoning: {move.get('reasoning', 'N/A')}")
-            print(f"{'='*60}")
-
-            # Find current collection key
-            current_collection_key = None
-            for key, coll in existing_collections.items():
-                if coll["path"] == current_path:
-                    current_collection_key = key
-                    break
-
-            if not current_collection_key:
-                print(f"  ⚠️  Warning: Current collection '{current_path}' not found, skipping move")
-                continue
-
-            # Create new collection hierarchy if needed and get final collection key
-            try:
-                final_key = build_collection_hierarchy(
-                    new_path,
-                    existing_collections,
-                    backend,
-                    new_collection_cache
-                )
-            except ValueError as e:
-                print(f"  ✗ Error: {e}")
-                continue
-
-            # Move item: add to new collection
-            backend.add_to_collection(item_key, final_key)
-
-            # Remove from old collection
-            backend.remove_from_collection(item_key, current_collection_key)
-
-    print(f"\n✓ Applied {len(moves)} reorganizations")
+        # Resolve every move against the existing collections before writing
+        tree = backend.get_collection_tree()
+        plan = ApplyPlan.from_reorganization(reorganization, tree)
+        stats = plan.execute(backend, tree)
+
+    for reason in plan.skipped:
+        print(f"  ⚠️  Warning: {reason}, skipped")
+    print(
+        f"\n✓ Applied {len(plan.adds)} moves: "
+        f"{stats['added']} added to new collections, {stats['removed']} removed from old ones, "
+        f"{stats['collections_created']} collections created"
+    )
+    if collection_ops:
+        print(
+            f"✓ Applied {stats['reparented'] + stats['renamed'] + stats['merged']} collection operations: "
+            f"{stats['reparented']} reparented, {stats['renamed']} renamed, "
+            f"{stats['merged']} merged ({stats['merged_papers']} papers moved into their targets)"
+        )
+    print(f"   {stats['sql_ms']}ms of bulk SQL")
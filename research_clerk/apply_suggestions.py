@@ -3,7 +3,26 @@ import json
 from pathlib import Path
 from .backends.local_sqlite import LocalSQLiteBackend
 from .config import find_zotero_database
-from .utils import validate_suggestions, build_collection_hierarchy
+from .utils import validate_suggestions, read_jsonl
+from .bulk_apply import ApplyPlan
+
+
+def load_suggestions(suggestions_file: Path) -> dict:
+    """
+    Read suggestions from a suggestions.json or a streamed suggestions.jsonl.
+
+    JSONL files hold one suggestion per line; a later line for the same item
+    replaces an earlier one. A torn last line (the run died mid-write) is
+    skipped with a warning.
+    """
+    if suggestions_file.suffix != ".jsonl":
+        with open(suggestions_file) as f:
+            return json.load(f)
+
+    items = {}
+    for item in read_jsonl(suggestions_file):
+        items[item.get("item_key") if isinstance(item, dict) else len(items)] = item
+    return {"items": list(items.values())}
 
 
 def apply_suggestions(suggestions_file: Path):
@@ -11,10 +30,10 @@ def apply_suggestions(suggestions_file: Path):
     Apply categorization suggestions from a saved file.
 
     Args:
-        suggestions_file: Path to JSON file with suggestions
+        suggestions_file: Path to suggestions.json, or the suggestions.jsonl a
+            dry run streams as it goes
     """
-    with open(suggestions_file) as f:
-        suggestions = json.load(f)
+    suggestions = load_suggestions(suggestions_file)
 
     # Validate schema
     errors = validate_suggestions(suggestions)
@@ -27,41 +46,17 @@ def apply_suggestions(suggestions_file: Path):
     print(f"📂 Loading suggestions from: {suggestions_file}")
     print(f"   {len(suggestions['items'])} items to categorize\n")
 
+    plan = ApplyPlan.from_suggestions(suggestions['items'])
+
     # Connect to database
     db_path = find_zotero_database()
     backend = LocalSQLiteBackend(db_path)
 
     with backend.connect(read_only=False) as backend:
-        # Build collection key map from existing collections
-        existing_collections = backend.list_collections()
-        new_collection_cache = {}
-
-        # Process each item
-        for item in suggestions['items']:
-            item_key = item['item_key']
-            collection_path = item['collection_path']
-            tags = item.get('tags', [])
-
-            print(f"\n{'='*60}")
-            print(f"Item: {item.get('title', item_key)}")
-            print(f"Collection: {collection_path}")
-            print(f"Tags: {', '.join(tags)}")
-            print(f"Reasoning: {item.get('reasoning', 'N/A')}")
-            print(f"{'='*60}")
-
-            # Create collection hierarchy if needed and get final collection key
-            final_key = build_collection_hierarchy(
-                collection_path,
-                existing_collections,
-                backend,
-                new_collection_cache
-            )
-
-            # Add item to final collection
-            backend.add_to_collection(item_key, final_key)
-
-            # Add tags
-            if tags:
-                backend.add_tags(item_key, tags)
+        stats = plan.execute(backend, backend.get_collection_tree())
 
-    print(f"\n✓ Applied {len(suggestions['items'])} categorizations")
+    print(
+        f"\n✓ Applied {len(suggestions['items'])} categorizations: "
+        f"{stats['added']} added to collections, {stats['tagged']} tags attached, "
+        f"{stats['collections_created']} collections created ({stats['sql_ms']}ms of bulk SQL)"
+    )
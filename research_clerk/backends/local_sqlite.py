@@ -1,11 +1,26 @@
 """Local SQLite backend for Zotero database access."""
+import hashlib
 import sqlite3
-import shutil
 import secrets
 import string
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+from ..collection_tree import CollectionTree
+from ..backups import BackupManager, BackupPolicy
+from ..journal import OperationJournal, UPDATABLE_COLUMNS
+from ..runs import new_run_id
+
+
+# keep IN (...) lists under sqlite's bound-parameter limit
+SQL_CHUNK_SIZE = 500
+
+
+def chunked(values: List[Any], size: int = SQL_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """Yield successive slices of at most `size` values."""
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
 
 
 def generate_key() -> str:
@@ -17,10 +32,17 @@ def generate_key() -> str:
 class LocalSQLiteBackend:
     """Direct sqlite access to zotero database with safety checks."""
     
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, backup_policy: Optional[BackupPolicy] = None):
         self.db_path = Path(db_path)
         self.backup_path: Optional[Path] = None
+        # read-only backends never back up, so the manager (and its policy from
+        # the environment) is only created by the first write connection
+        self._backup_policy = backup_policy
+        self._backups: Optional[BackupManager] = None
+        self.journal: Optional[OperationJournal] = None
         self.conn: Optional[sqlite3.Connection] = None
+        self._collection_tree: Optional[CollectionTree] = None
+        self._field_ids: Dict[str, Optional[int]] = {}
         
         if not self.db_path.exists():
             raise ValueError(f"Zotero database not found: {db_path}")
@@ -36,23 +58,37 @@ class LocalSQLiteBackend:
         except sqlite3.OperationalError:
             return True
     
+    @property
+    def backups(self) -> BackupManager:
+        """Backup manager for this database, created on first use."""
+        if self._backups is None:
+            self._backups = BackupManager(self.db_path, self._backup_policy)
+        return self._backups
+
     def create_backup(self) -> Path:
-        """Create timestamped backup of database."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_dir = self.db_path.parent / "backups"
-        backup_dir.mkdir(exist_ok=True)
-        
-        self.backup_path = backup_dir / f"zotero_backup_{timestamp}.sqlite"
-        shutil.copy2(self.db_path, self.backup_path)
-        print(f"✓ Backup created: {self.backup_path}")
+        """Create timestamped backup of database (reused if the database hasn't changed)."""
+        self.backup_path = self.backups.create()
         return self.backup_path
     
-    def connect(self, read_only: bool = False):
-        """Connect to database."""
+    def connect(self, read_only: bool = False, immutable: bool = True, run_id: Optional[str] = None):
+        """
+        Connect to database.
+
+        Args:
+            read_only: Open read-only (safe while zotero is running)
+            immutable: For read-only connections, skip locking entirely. Such
+                       connections don't see changes still in zotero's WAL, so
+                       pass False when fresh data matters and zotero isn't
+                       holding the database lock.
+            run_id: ID the write connection's operation journal is saved
+                    under, for --undo (generated if not given)
+        """
         if read_only:
             # open in read-only mode with immutable=1 for WAL mode databases
             # immutable=1 tells SQLite the database won't change, avoiding locks
-            uri = f"file:{self.db_path}?mode=ro&immutable=1"
+            uri = f"file:{self.db_path}?mode=ro"
+            if immutable:
+                uri += "&immutable=1"
             self.conn = sqlite3.connect(uri, uri=True, timeout=5.0)
         else:
             # check zotero not running
@@ -68,9 +104,16 @@ class LocalSQLiteBackend:
             # connect with write access
             self.conn = sqlite3.connect(self.db_path)
             self.conn.row_factory = sqlite3.Row
+            self.journal = OperationJournal(self.db_path, run_id or new_run_id())
         
         return self
     
+    def close(self):
+        """Close the connection without committing (for long-lived read connections)."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
     def __enter__(self):
         return self
     
@@ -79,9 +122,16 @@ class LocalSQLiteBackend:
             if exc_type:
                 print(f"✗ Error occurred, rolling back: {exc_val}")
                 self.conn.rollback()
+                if self.journal:
+                    self.journal.rollback()
             else:
                 self.conn.commit()
+                if self.journal:
+                    self.journal.commit()
             self.conn.close()
+        # let background backup compression finish before the caller moves on
+        if self._backups is not None:
+            self._backups.wait()
     
     def get_library_id(self) -> int:
         """Get the libraryID (usually 1 for local)."""
@@ -89,33 +139,96 @@ class LocalSQLiteBackend:
         row = cursor.fetchone()
         return row[0] if row else 1
     
-    def list_unfiled_items(self) -> List[Dict[str, Any]]:
-        """Get items not in any collection (excluding attachments)."""
-        query = """
-        SELECT DISTINCT
+    def get_field_id(self, field_name: str) -> Optional[int]:
+        """Resolve a field name to its fieldID (cached per backend)."""
+        if field_name not in self._field_ids:
+            cursor = self.conn.execute(
+                "SELECT fieldID FROM fields WHERE fieldName = ?",
+                (field_name,)
+            )
+            row = cursor.fetchone()
+            self._field_ids[field_name] = row[0] if row else None
+        return self._field_ids[field_name]
+
+    def _list_items(
+        self,
+        filed: bool,
+        since_timestamp: Optional[str] = None,
+        item_type: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[sqlite3.Row]:
+        """
+        Shared top-level item listing for the filed/unfiled queries.
+
+        Joins exactly one itemData row per item (the title, by fieldID) and
+        uses anti-joins for attachments, notes, trash and collection
+        membership, so every filter is a primary-key or index probe instead of
+        a DISTINCT over every field of every item. Filters and paging are
+        applied in SQL.
+
+        Items are listed by descending itemID. Zotero allocates itemIDs in
+        increasing order, so that is newest first up to items synced in
+        from another device, and unlike dateAdded (which has no index) it
+        is the rowid: scanning items backwards returns rows already in
+        order, so a page stops after `offset + limit` matches instead of
+        sorting the whole result set first.
+        """
+        title_field_id = self.get_field_id("title")
+        if title_field_id is None:
+            return []
+
+        membership = "EXISTS" if filed else "NOT EXISTS"
+        conditions = [
+            f"{membership} (SELECT 1 FROM collectionItems ci WHERE ci.itemID = i.itemID)",
+            "NOT EXISTS (SELECT 1 FROM itemAttachments ia WHERE ia.itemID = i.itemID)",
+            "NOT EXISTS (SELECT 1 FROM itemNotes inotes WHERE inotes.itemID = i.itemID)",
+            "NOT EXISTS (SELECT 1 FROM deletedItems di WHERE di.itemID = i.itemID)",
+        ]
+        params: List[Any] = [title_field_id]
+        if since_timestamp is not None:
+            conditions.append("i.dateAdded > ?")
+            params.append(since_timestamp)
+        if item_type is not None:
+            conditions.append("it.typeName = ?")
+            params.append(item_type)
+
+        query = f"""
+        SELECT
             i.itemID,
             i.key,
             iv.value AS title,
-            it.typeName AS itemType
+            it.typeName AS itemType,
+            i.dateAdded
         FROM items i
-        LEFT JOIN collectionItems ci ON i.itemID = ci.itemID
-        LEFT JOIN itemAttachments ia ON i.itemID = ia.itemID
-        LEFT JOIN itemNotes inotes ON i.itemID = inotes.itemID
-        LEFT JOIN itemData id ON i.itemID = id.itemID
-        LEFT JOIN itemDataValues iv ON id.valueID = iv.valueID
-        LEFT JOIN fields f ON id.fieldID = f.fieldID
-        LEFT JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
-        WHERE ci.itemID IS NULL
-          AND ia.itemID IS NULL
-          AND inotes.itemID IS NULL
-          AND i.itemID NOT IN (SELECT itemID FROM deletedItems)
-          AND f.fieldName = 'title'
-        ORDER BY i.dateAdded DESC
+        CROSS JOIN itemData id ON id.itemID = i.itemID AND id.fieldID = ?
+        JOIN itemDataValues iv ON iv.valueID = id.valueID
+        LEFT JOIN itemTypes it ON it.itemTypeID = i.itemTypeID
+        WHERE {" AND ".join(conditions)}
+        ORDER BY i.itemID DESC
+        LIMIT ? OFFSET ?
+        """
+        params.extend([limit if limit is not None else -1, offset])
+        return self.conn.execute(query, params).fetchall()
+
+    def list_unfiled_items(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        since: Optional[str] = None,
+        item_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get items not in any collection (excluding attachments).
+
+        Args:
+            limit: Max items to return (None for all)
+            offset: Number of items to skip (newest first)
+            since: Only items added after this timestamp
+            item_type: Only items of this Zotero type (e.g. "journalArticle")
         """
-        
-        cursor = self.conn.execute(query)
         items = []
-        for row in cursor:
+        for row in self._list_items(False, since, item_type, limit, offset):
             items.append({
                 "itemID": row[0],
                 "key": row[1],
@@ -134,33 +247,8 @@ class LocalSQLiteBackend:
         Returns:
             List of unfiled items added after the timestamp
         """
-        query = """
-        SELECT DISTINCT
-            i.itemID,
-            i.key,
-            iv.value AS title,
-            it.typeName AS itemType,
-            i.dateAdded
-        FROM items i
-        LEFT JOIN collectionItems ci ON i.itemID = ci.itemID
-        LEFT JOIN itemAttachments ia ON i.itemID = ia.itemID
-        LEFT JOIN itemNotes inotes ON i.itemID = inotes.itemID
-        LEFT JOIN itemData id ON i.itemID = id.itemID
-        LEFT JOIN itemDataValues iv ON id.valueID = iv.valueID
-        LEFT JOIN fields f ON id.fieldID = f.fieldID
-        LEFT JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
-        WHERE ci.itemID IS NULL
-          AND ia.itemID IS NULL
-          AND inotes.itemID IS NULL
-          AND i.itemID NOT IN (SELECT itemID FROM deletedItems)
-          AND f.fieldName = 'title'
-          AND i.dateAdded > ?
-        ORDER BY i.dateAdded DESC
-        """
-        
-        cursor = self.conn.execute(query, (since_timestamp,))
         items = []
-        for row in cursor:
+        for row in self._list_items(filed=False, since_timestamp=since_timestamp):
             items.append({
                 "itemID": row[0],
                 "key": row[1],
@@ -175,124 +263,279 @@ class LocalSQLiteBackend:
         query = """
         SELECT MAX(i.dateAdded)
         FROM items i
-        LEFT JOIN collectionItems ci ON i.itemID = ci.itemID
-        LEFT JOIN itemAttachments ia ON i.itemID = ia.itemID
-        LEFT JOIN itemNotes inotes ON i.itemID = inotes.itemID
-        WHERE ci.itemID IS NULL
-          AND ia.itemID IS NULL
-          AND inotes.itemID IS NULL
-          AND i.itemID NOT IN (SELECT itemID FROM deletedItems)
+        WHERE NOT EXISTS (SELECT 1 FROM collectionItems ci WHERE ci.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM itemAttachments ia WHERE ia.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM itemNotes inotes WHERE inotes.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM deletedItems di WHERE di.itemID = i.itemID)
         """
         cursor = self.conn.execute(query)
         row = cursor.fetchone()
         return row[0] if row and row[0] else None
-    
-    def get_item_details(self, item_key: str) -> Dict[str, Any]:
-        """Get full metadata for an item."""
-        # get basic item info
-        cursor = self.conn.execute(
-            "SELECT itemID, itemTypeID FROM items WHERE key = ?",
-            (item_key,)
-        )
-        row = cursor.fetchone()
-        if not row:
+
+    def get_max_item_id(self) -> int:
+        """Highest itemID in the library (a single rowid seek)."""
+        row = self.conn.execute("SELECT MAX(itemID) FROM items").fetchone()
+        return row[0] or 0
+
+    def get_unfiled_cursor(self) -> Optional[Tuple[str, int]]:
+        """(dateAdded, itemID) of the newest unfiled item, or None if there are none."""
+        query = """
+        SELECT i.dateAdded, i.itemID
+        FROM items i
+        WHERE NOT EXISTS (SELECT 1 FROM collectionItems ci WHERE ci.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM itemAttachments ia WHERE ia.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM itemNotes inotes WHERE inotes.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM deletedItems di WHERE di.itemID = i.itemID)
+        ORDER BY i.dateAdded DESC, i.itemID DESC
+        LIMIT 1
+        """
+        row = self.conn.execute(query).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def list_unfiled_items_after(
+        self,
+        cursor: Tuple[str, int],
+        min_item_id: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Get unfiled items past a (dateAdded, itemID) keyset cursor, oldest first.
+
+        Zotero has no index on dateAdded, but itemIDs are allocated in
+        increasing order, so `min_item_id` (the highest itemID already
+        scanned) turns the scan into a rowid range over just the rows inserted
+        since then. The keyset comparison on (dateAdded, itemID) then orders
+        the result and breaks ties between items added in the same second.
+
+        Args:
+            cursor: (dateAdded, itemID) of the last item already processed
+            min_item_id: Only consider items with a higher itemID than this
+
+        Returns:
+            List of unfiled items after the cursor, in (dateAdded, itemID) order
+        """
+        title_field_id = self.get_field_id("title")
+        if title_field_id is None:
+            return []
+        date_added, item_id = cursor
+        # same title join as _list_items, so the watcher sees exactly the items the listings do;
+        # CROSS JOIN keeps items as the outer loop so the itemID range drives the scan
+        query = """
+        SELECT i.itemID, i.key, iv.value AS title, it.typeName AS itemType, i.dateAdded
+        FROM items i
+        CROSS JOIN itemData id ON id.itemID = i.itemID AND id.fieldID = ?
+        JOIN itemDataValues iv ON iv.valueID = id.valueID
+        LEFT JOIN itemTypes it ON it.itemTypeID = i.itemTypeID
+        WHERE i.itemID > ?
+          AND (i.dateAdded > ? OR (i.dateAdded = ? AND i.itemID > ?))
+          AND NOT EXISTS (SELECT 1 FROM collectionItems ci WHERE ci.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM itemAttachments ia WHERE ia.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM itemNotes inotes WHERE inotes.itemID = i.itemID)
+          AND NOT EXISTS (SELECT 1 FROM deletedItems di WHERE di.itemID = i.itemID)
+        ORDER BY i.dateAdded, i.itemID
+        """
+        rows = self.conn.execute(
+            query, (title_field_id, min_item_id, date_added, date_added, item_id)
+        ).fetchall()
+        return [
+            {
+                "itemID": row[0],
+                "key": row[1],
+                "title": row[2] or "Untitled",
+                "itemType": row[3] or "unknown",
+                "dateAdded": row[4]
+            }
+            for row in rows
+        ]
+
+    def get_item_details(
+        self,
+        item_key: str,
+        fields: Optional[List[str]] = None,
+        abstract_chars: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Get metadata for an item (see get_items_details for the arguments)."""
+        details = self.get_items_details([item_key], fields, abstract_chars)
+        if not details:
             raise ValueError(f"Item not found: {item_key}")
-        
-        item_id, item_type_id = row
-        
-        # get all field data
-        field_query = """
-        SELECT f.fieldName, idv.value
-        FROM itemData id
-        JOIN fields f ON id.fieldID = f.fieldID
-        JOIN itemDataValues idv ON id.valueID = idv.valueID
-        WHERE id.itemID = ?
-        """
-        cursor = self.conn.execute(field_query, (item_id,))
-        
-        fields = {"itemID": item_id, "key": item_key}
-        for field_row in cursor:
-            fields[field_row[0]] = field_row[1]
-        
-        # get tags
-        tag_query = """
-        SELECT t.name
-        FROM itemTags it
-        JOIN tags t ON it.tagID = t.tagID
-        WHERE it.itemID = ?
-        """
-        cursor = self.conn.execute(tag_query, (item_id,))
-        fields["tags"] = [row[0] for row in cursor]
-        
-        return fields
+        return details[0]
+
+    def get_items_details(
+        self,
+        item_keys: List[str],
+        fields: Optional[List[str]] = None,
+        abstract_chars: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get metadata, creators and tags for many items with set-based queries.
+
+        Fetches items, fields, creators and tags with one query each per chunk
+        of keys instead of several queries per item.
+
+        Args:
+            item_keys: Zotero item keys
+            fields: Only return these Zotero fields (None for all fields)
+            abstract_chars: Truncate abstractNote to this many characters
+
+        Returns:
+            Metadata dicts in the order of item_keys (unknown keys are omitted)
+        """
+        by_id: Dict[int, Dict[str, Any]] = {}
+        by_key: Dict[str, Dict[str, Any]] = {}
+
+        for chunk in chunked(list(dict.fromkeys(item_keys))):
+            placeholders = ",".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"SELECT itemID, key FROM items WHERE key IN ({placeholders})",
+                chunk
+            )
+            for item_id, key in cursor:
+                item = {"itemID": item_id, "key": key}
+                by_id[item_id] = item
+                by_key[key] = item
+
+        # project fields by fieldID so unwanted values never leave sqlite
+        field_filter = ""
+        field_params: List[Any] = []
+        if fields is not None:
+            field_ids = [fid for fid in map(self.get_field_id, fields) if fid is not None]
+            field_filter = f"AND id.fieldID IN ({','.join('?' * len(field_ids))})" if field_ids else "AND 0"
+            field_params = field_ids
+
+        value_expr = "idv.value"
+        value_params: List[Any] = []
+        abstract_field_id = self.get_field_id("abstractNote")
+        if abstract_chars is not None and abstract_field_id is not None:
+            value_expr = """
+                CASE WHEN id.fieldID = ? AND length(idv.value) > ?
+                     THEN substr(idv.value, 1, ?) || '…'
+                     ELSE idv.value END
+            """
+            value_params = [abstract_field_id, abstract_chars, abstract_chars]
+
+        item_ids = list(by_id)
+        for chunk in chunked(item_ids):
+            placeholders = ",".join("?" * len(chunk))
+
+            # get field data
+            field_query = f"""
+            SELECT id.itemID, f.fieldName, {value_expr}
+            FROM itemData id
+            JOIN fields f ON id.fieldID = f.fieldID
+            JOIN itemDataValues idv ON id.valueID = idv.valueID
+            WHERE id.itemID IN ({placeholders})
+            {field_filter}
+            """
+            params = value_params + chunk + field_params
+            for item_id, field_name, value in self.conn.execute(field_query, params):
+                by_id[item_id][field_name] = value
+
+            # get creators in author order
+            for item_id in chunk:
+                by_id[item_id]["creators"] = []
+                by_id[item_id]["tags"] = []
+            creator_query = f"""
+            SELECT ic.itemID, c.firstName, c.lastName, c.fieldMode, ct.creatorType
+            FROM itemCreators ic
+            JOIN creators c ON ic.creatorID = c.creatorID
+            LEFT JOIN creatorTypes ct ON ic.creatorTypeID = ct.creatorTypeID
+            WHERE ic.itemID IN ({placeholders})
+            ORDER BY ic.itemID, ic.orderIndex
+            """
+            for item_id, first, last, field_mode, creator_type in self.conn.execute(creator_query, chunk):
+                # fieldMode 1 = single-field name (institutions etc.)
+                name = last if field_mode == 1 or not first else f"{first} {last}"
+                if creator_type and creator_type != "author":
+                    name = f"{name} ({creator_type})"
+                by_id[item_id]["creators"].append(name)
+
+            # get tags
+            tag_query = f"""
+            SELECT it.itemID, t.name
+            FROM itemTags it
+            JOIN tags t ON it.tagID = t.tagID
+            WHERE it.itemID IN ({placeholders})
+            """
+            for item_id, tag_name in self.conn.execute(tag_query, chunk):
+                by_id[item_id]["tags"].append(tag_name)
+
+        return [by_key[key] for key in item_keys if key in by_key]
     
+    def get_collection_tree(self, refresh: bool = False) -> CollectionTree:
+        """
+        Get all collections as an indexed hierarchy.
+
+        The tree is cached on the backend for the whole connection and kept
+        current in place as this backend creates, renames, reparents or
+        merges collections. It is rebuilt after an undo, or when refresh=True.
+        """
+        if self._collection_tree is None or refresh:
+            query = """
+            SELECT collectionID, collectionName, parentCollectionID, key
+            FROM collections
+            WHERE collectionID NOT IN (SELECT collectionID FROM deletedCollections)
+            ORDER BY collectionName
+            """
+            self._collection_tree = CollectionTree(self.conn.execute(query))
+        return self._collection_tree
+
     def list_collections(self) -> Dict[str, Dict[str, Any]]:
         """Get all collections with hierarchy."""
+        return self.get_collection_tree().as_dict()
+
+    def count_collection_items(self) -> Dict[str, int]:
+        """Number of papers in each collection, by collection key (trashed papers excluded)."""
+        tree = self.get_collection_tree()
         query = """
-        SELECT collectionID, collectionName, parentCollectionID, key
-        FROM collections
-        WHERE collectionID NOT IN (SELECT collectionID FROM deletedCollections)
-        ORDER BY collectionName
+        SELECT ci.collectionID, COUNT(*)
+        FROM collectionItems ci
+        WHERE NOT EXISTS (SELECT 1 FROM deletedItems d WHERE d.itemID = ci.itemID)
+        GROUP BY ci.collectionID
         """
-        cursor = self.conn.execute(query)
-        
-        collections = {}
-        for row in cursor:
-            coll_id, name, parent_id, key = row
-            collections[key] = {
-                "collectionID": coll_id,
-                "name": name,
-                "parentCollectionID": parent_id,
-                "key": key
-            }
-        
-        # build hierarchy paths
-        def get_path(key):
-            coll = collections.get(key)
-            if not coll:
-                return ""
-            parent_id = coll["parentCollectionID"]
-            if parent_id:
-                # find parent key
-                parent_key = next(
-                    (k for k, v in collections.items() if v["collectionID"] == parent_id),
-                    None
-                )
-                if parent_key:
-                    parent_path = get_path(parent_key)
-                    return f"{parent_path}/{coll['name']}" if parent_path else coll['name']
-            return coll['name']
-        
-        for key in collections:
-            collections[key]["path"] = get_path(key)
-        
-        return collections
+        return {
+            tree.by_id[coll_id]["key"]: count
+            for coll_id, count in self.conn.execute(query)
+            if coll_id in tree.by_id
+        }
+
+    def library_fingerprint(self) -> str:
+        """
+        Cheap hash of the state derived indexes depend on.
+
+        Changes when items or collections are modified, added, trashed or
+        erased, or when collection membership changes (which zotero doesn't
+        always record on the item rows). Costs a few scans of narrow tables.
+        """
+        queries = [
+            "SELECT COUNT(*), MAX(clientDateModified), MAX(itemID) FROM items",
+            "SELECT COUNT(*), TOTAL(itemID * 1000003 + collectionID) FROM collectionItems",
+            "SELECT COUNT(*), MAX(clientDateModified) FROM collections",
+            "SELECT COUNT(*) FROM deletedItems",
+            "SELECT COUNT(*) FROM deletedCollections",
+        ]
+        state = [tuple(self.conn.execute(query).fetchone()) for query in queries]
+        return hashlib.sha1(repr(state).encode()).hexdigest()
     
     def create_collection(self, name: str, parent_key: Optional[str] = None) -> str:
         """Create a new collection."""
         library_id = self.get_library_id()
         key = generate_key()
         
-        # get parent ID if specified
+        # get parent ID if specified; a subcollection goes in its parent's library
         parent_id = None
         if parent_key:
-            cursor = self.conn.execute(
-                "SELECT collectionID FROM collections WHERE key = ?",
-                (parent_key,)
-            )
-            row = cursor.fetchone()
-            if row:
-                parent_id = row[0]
-            else:
-                raise ValueError(f"Parent collection not found: {parent_key}")
+            parent = self._collection_row(parent_key)
+            parent_id, library_id = parent["collectionID"], parent["libraryID"]
         
         # insert collection
-        self.conn.execute("""
+        cursor = self.conn.execute("""
             INSERT INTO collections (
                 collectionName, parentCollectionID, libraryID, key, 
                 version, synced, clientDateModified
             ) VALUES (?, ?, ?, ?, 0, 0, CURRENT_TIMESTAMP)
         """, (name, parent_id, library_id, key))
+        self._journal("insert", "collections", [(cursor.lastrowid, key)])
+        if self._collection_tree is not None:
+            self._collection_tree.add(cursor.lastrowid, name, parent_id, key)
         
         print(f"  ✓ Created collection: {name} ({key})")
         return key
@@ -334,6 +577,7 @@ class LocalSQLiteBackend:
             INSERT INTO collectionItems (collectionID, itemID, orderIndex)
             VALUES (?, ?, ?)
         """, (collection_id, item_id, order_index))
+        self._journal("insert", "collectionItems", [(collection_id, item_id, order_index)])
         
         print("  ✓ Added item to collection")
     
@@ -356,6 +600,7 @@ class LocalSQLiteBackend:
             else:
                 cursor = self.conn.execute("INSERT INTO tags (name) VALUES (?)", (tag_name,))
                 tag_id = cursor.lastrowid
+                self._journal("insert", "tags", [(tag_id, tag_name)])
             
             # check if already tagged
             cursor = self.conn.execute(
@@ -370,36 +615,186 @@ class LocalSQLiteBackend:
                 "INSERT INTO itemTags (itemID, tagID, type) VALUES (?, ?, 0)",
                 (item_id, tag_id)
             )
+            self._journal("insert", "itemTags", [(item_id, tag_id, 0)])
 
         print(f"  ✓ Added tags: {', '.join(tag_names)}")
 
-    def list_filed_items(self) -> List[Dict[str, Any]]:
-        """Get items that ARE in collections (excluding attachments)."""
-        query = """
-        SELECT DISTINCT
-            i.itemID,
-            i.key,
-            iv.value AS title,
-            it.typeName AS itemType
-        FROM items i
-        JOIN collectionItems ci ON i.itemID = ci.itemID
-        LEFT JOIN itemAttachments ia ON i.itemID = ia.itemID
-        LEFT JOIN itemNotes inotes ON i.itemID = inotes.itemID
-        LEFT JOIN itemData id ON i.itemID = id.itemID
-        LEFT JOIN itemDataValues iv ON id.valueID = iv.valueID
-        LEFT JOIN fields f ON id.fieldID = f.fieldID
-        LEFT JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
-        WHERE ia.itemID IS NULL
-          AND inotes.itemID IS NULL
-          AND i.itemID NOT IN (SELECT itemID FROM deletedItems)
-          AND f.fieldName = 'title'
-        GROUP BY i.itemID, i.key, iv.value, it.typeName
-        ORDER BY i.dateAdded DESC
+    def _journal(self, op: str, table: str, rows: List[Tuple], column: Optional[str] = None):
+        """Record written rows in the connection's operation journal (write connections only)."""
+        if self.journal:
+            self.journal.record(op, table, rows, column=column)
+
+    def _stage(self, table: str, rows: List[Tuple[str, str]]):
+        """Load (key, value) pairs into an emptied temp staging table, keeping their order in rowid."""
+        self.conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (item_key TEXT NOT NULL, value TEXT NOT NULL)")
+        self.conn.execute(f"DELETE FROM temp.{table}")
+        self.conn.executemany(f"INSERT INTO temp.{table} VALUES (?, ?)", rows)
+
+    def _check_staged(self, table: str, collections: bool):
         """
+        Raise if a staged key doesn't exist.
 
-        cursor = self.conn.execute(query)
+        Keys are looked up in every library (user and group), probing the
+        (libraryID, key) index once per library. With collections, each
+        staged item must also be in its collection's library, since a
+        collection can only hold items of its own library.
+        """
+        if collections:
+            checks = [
+                ("value", "Collection", """
+                    SELECT 1 FROM collections c
+                    WHERE c.libraryID IN (SELECT libraryID FROM libraries) AND c.key = s.value
+                """),
+                ("item_key", "Item", """
+                    SELECT 1 FROM collections c
+                    JOIN items i ON i.libraryID = c.libraryID AND i.key = s.item_key
+                    WHERE c.libraryID IN (SELECT libraryID FROM libraries) AND c.key = s.value
+                """),
+            ]
+        else:
+            checks = [("item_key", "Item", """
+                SELECT 1 FROM items i
+                WHERE i.libraryID IN (SELECT libraryID FROM libraries) AND i.key = s.item_key
+            """)]
+        for column, label, exists in checks:
+            missing = [row[0] for row in self.conn.execute(f"""
+                SELECT DISTINCT s.{column} FROM temp.{table} s
+                WHERE NOT EXISTS ({exists})
+                LIMIT 10
+            """)]
+            if missing:
+                raise ValueError(f"{label} not found: {', '.join(missing)}")
+
+    def add_to_collections(self, memberships: List[Tuple[str, str]]) -> int:
+        """
+        Add many items to collections with a handful of set-based statements.
+
+        The pairs are staged in a temp table, checked, and inserted with one
+        INSERT ... SELECT. Order indexes continue from each collection's
+        current maximum, computed once per collection, in staging order.
+        Memberships that already exist are skipped.
+
+        Args:
+            memberships: (item_key, collection_key) pairs
+
+        Returns:
+            Number of memberships inserted
+
+        Raises:
+            ValueError: If an item or collection key doesn't exist
+        """
+        self._stage("stage_memberships", memberships)
+        self._check_staged("stage_memberships", collections=True)
+        rows = self.conn.execute("""
+            -- CROSS JOIN keeps the staged pairs as the outer loop, so each one is
+            -- an index probe per library instead of a scan of the library's keys;
+            -- the item is resolved in its collection's library
+            WITH wanted AS (
+                SELECT c.collectionID, i.itemID, MIN(s.rowid) AS seq
+                FROM temp.stage_memberships s
+                CROSS JOIN collections c ON c.libraryID IN (SELECT libraryID FROM libraries) AND c.key = s.value
+                CROSS JOIN items i ON i.libraryID = c.libraryID AND i.key = s.item_key
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM collectionItems ci
+                    WHERE ci.collectionID = c.collectionID AND ci.itemID = i.itemID
+                )
+                GROUP BY c.collectionID, i.itemID
+            ),
+            base AS (
+                SELECT w.collectionID, COALESCE(MAX(ci.orderIndex), -1) AS top
+                FROM (SELECT DISTINCT collectionID FROM wanted) w
+                LEFT JOIN collectionItems ci ON ci.collectionID = w.collectionID
+                GROUP BY w.collectionID
+            )
+            INSERT INTO collectionItems (collectionID, itemID, orderIndex)
+            SELECT w.collectionID, w.itemID,
+                   b.top + ROW_NUMBER() OVER (PARTITION BY w.collectionID ORDER BY w.seq)
+            FROM wanted w JOIN base b ON b.collectionID = w.collectionID
+            RETURNING collectionID, itemID, orderIndex
+        """).fetchall()
+        self._journal("insert", "collectionItems", rows)
+        return len(rows)
+
+    def remove_from_collections(self, memberships: List[Tuple[str, str]]) -> int:
+        """
+        Remove many items from collections in one DELETE.
+
+        Args:
+            memberships: (item_key, collection_key) pairs
+
+        Returns:
+            Number of memberships removed
+
+        Raises:
+            ValueError: If an item or collection key doesn't exist
+        """
+        self._stage("stage_removals", memberships)
+        self._check_staged("stage_removals", collections=True)
+        rows = self.conn.execute("""
+            DELETE FROM collectionItems
+            WHERE (collectionID, itemID) IN (
+                SELECT c.collectionID, i.itemID
+                FROM temp.stage_removals s
+                CROSS JOIN collections c ON c.libraryID IN (SELECT libraryID FROM libraries) AND c.key = s.value
+                CROSS JOIN items i ON i.libraryID = c.libraryID AND i.key = s.item_key
+            )
+            RETURNING collectionID, itemID, orderIndex
+        """).fetchall()
+        self._journal("delete", "collectionItems", rows)
+        return len(rows)
+
+    def add_tags_to_items(self, item_tags: List[Tuple[str, str]]) -> int:
+        """
+        Tag many items at once: missing tags are created in one INSERT, then
+        all item-tag links in another. Links that already exist are skipped.
+
+        Args:
+            item_tags: (item_key, tag name) pairs
+
+        Returns:
+            Number of item-tag links inserted
+
+        Raises:
+            ValueError: If an item key doesn't exist
+        """
+        self._stage("stage_tags", item_tags)
+        self._check_staged("stage_tags", collections=False)
+        created = self.conn.execute("""
+            INSERT INTO tags (name)
+            SELECT DISTINCT s.value FROM temp.stage_tags s
+            WHERE NOT EXISTS (SELECT 1 FROM tags t WHERE t.name = s.value)
+            RETURNING tagID, name
+        """).fetchall()
+        self._journal("insert", "tags", created)
+        # type 0 = manual tag
+        rows = self.conn.execute("""
+            INSERT INTO itemTags (itemID, tagID, type)
+            SELECT DISTINCT i.itemID, t.tagID, 0
+            FROM temp.stage_tags s
+            CROSS JOIN items i ON i.libraryID IN (SELECT libraryID FROM libraries) AND i.key = s.item_key
+            JOIN tags t ON t.name = s.value
+            WHERE NOT EXISTS (
+                SELECT 1 FROM itemTags it WHERE it.itemID = i.itemID AND it.tagID = t.tagID
+            )
+            RETURNING itemID, tagID, type
+        """).fetchall()
+        self._journal("insert", "itemTags", rows)
+        return len(rows)
+
+    def list_filed_items(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        since: Optional[str] = None,
+        item_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get items that ARE in collections (excluding attachments).
+
+        Takes the same filter and paging arguments as list_unfiled_items.
+        """
         items = []
-        for row in cursor:
+        for row in self._list_items(True, since, item_type, limit, offset):
             items.append({
                 "itemID": row[0],
                 "key": row[1],
@@ -410,24 +805,87 @@ class LocalSQLiteBackend:
 
     def get_item_collections(self, item_key: str) -> List[str]:
         """Get full collection paths for an item."""
+        return self.get_items_collections([item_key])[item_key]
+
+    def get_items_collections(self, item_keys: List[str]) -> Dict[str, List[str]]:
+        """
+        Get full collection paths for many items at once.
+
+        Args:
+            item_keys: Zotero item keys
+
+        Returns:
+            Map of item_key -> collection paths (empty list if not filed or unknown)
+        """
+        tree = self.get_collection_tree()
+        result = {key: [] for key in item_keys}
+
+        for chunk in chunked(list(result)):
+            placeholders = ",".join("?" * len(chunk))
+            query = f"""
+            SELECT i.key, ci.collectionID
+            FROM items i
+            JOIN collectionItems ci ON ci.itemID = i.itemID
+            WHERE i.key IN ({placeholders})
+            ORDER BY ci.collectionID
+            """
+            for item_key, coll_id in self.conn.execute(query, chunk):
+                node = tree.by_id.get(coll_id)
+                if node:
+                    result[item_key].append(tree.path(node["key"]))
+
+        return result
+
+    def iter_item_collections(self) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Stream (item_key, collection paths) for every filed item in the library.
+
+        Reads collectionItems once in itemID order, so memory stays bounded by
+        a single item's memberships.
+        """
+        for _, item_key, paths in self._iter_memberships():
+            yield item_key, paths
+
+    def item_collections_page(self, after_item_id: int, limit: int) -> Tuple[Dict[str, List[str]], Optional[int]]:
+        """
+        One page of the filed-item map, in itemID order.
+
+        Keyset paging: the page starts right after `after_item_id` through
+        the itemID index, so walking the whole map reads every membership
+        once however many pages it takes.
+
+        Returns:
+            (item_key -> collection paths, itemID to pass as after_item_id for
+            the next page, or None after the last page)
+        """
+        page = list(islice(self._iter_memberships(after_item_id), limit + 1))
+        cursor = page[limit - 1][0] if len(page) > limit else None
+        return {item_key: paths for _, item_key, paths in page[:limit]}, cursor
+
+    def _iter_memberships(self, after_item_id: int = 0) -> Iterator[Tuple[int, str, List[str]]]:
+        """(itemID, item_key, collection paths) for filed items past after_item_id, in itemID order."""
+        tree = self.get_collection_tree()
         query = """
-        SELECT c.key
+        SELECT ci.itemID, i.key, ci.collectionID
         FROM collectionItems ci
-        JOIN collections c ON ci.collectionID = c.collectionID
-        JOIN items i ON ci.itemID = i.itemID
-        WHERE i.key = ?
-          AND c.collectionID NOT IN (SELECT collectionID FROM deletedCollections)
+        JOIN items i ON i.itemID = ci.itemID
+        WHERE ci.itemID > ?
+          AND NOT EXISTS (SELECT 1 FROM deletedItems d WHERE d.itemID = ci.itemID)
+        ORDER BY ci.itemID
         """
-        cursor = self.conn.execute(query, (item_key,))
+        current_id, current_key = None, None
+        paths: List[str] = []
+        for item_id, item_key, coll_id in self.conn.execute(query, (after_item_id,)):
+            if item_id != current_id:
+                if current_id is not None and paths:
+                    yield current_id, current_key, paths
+                current_id, current_key, paths = item_id, item_key, []
+            node = tree.by_id.get(coll_id)
+            if node:
+                paths.append(tree.path(node["key"]))
 
-        collections_dict = self.list_collections()
-        paths = []
-        for row in cursor:
-            coll_key = row[0]
-            if coll_key in collections_dict:
-                paths.append(collections_dict[coll_key]["path"])
-
-        return paths
+        if current_id is not None and paths:
+            yield current_id, current_key, paths
 
     def remove_from_collection(self, item_key: str, collection_key: str):
         """Remove an item from a collection."""
@@ -446,9 +904,215 @@ class LocalSQLiteBackend:
         collection_id = coll_row[0]
 
         # delete
-        self.conn.execute(
-            "DELETE FROM collectionItems WHERE itemID = ? AND collectionID = ?",
+        rows = self.conn.execute(
+            "DELETE FROM collectionItems WHERE itemID = ? AND collectionID = ? RETURNING collectionID, itemID, orderIndex",
             (item_id, collection_id)
-        )
+        ).fetchall()
+        self._journal("delete", "collectionItems", rows)
 
         print("  ✓ Removed item from collection")
+
+    def _collection_row(self, collection_key: str) -> sqlite3.Row:
+        """collectionID, parentCollectionID, collectionName and libraryID for a key, in any library."""
+        row = self.conn.execute("""
+            SELECT collectionID, parentCollectionID, collectionName, libraryID FROM collections
+            WHERE libraryID IN (SELECT libraryID FROM libraries) AND key = ?
+        """, (collection_key,)).fetchone()
+        if not row:
+            raise ValueError(f"Collection not found: {collection_key}")
+        return row
+
+    def _check_same_library(self, collection_key: str, other: sqlite3.Row) -> sqlite3.Row:
+        """Row for collection_key, raising if it's in a different library than `other`."""
+        row = self._collection_row(collection_key)
+        if row["libraryID"] != other["libraryID"]:
+            raise ValueError(
+                f"Collections {collection_key} and {other['collectionName']} are in different libraries"
+            )
+        return row
+
+    def _update_collection(self, collection_key: str, column: str, value: Any):
+        """Set one column of a collection, flag it for sync and journal the old value."""
+        row = self._collection_row(collection_key)
+        self.conn.execute(f"""
+            UPDATE collections SET {column} = ?, synced = 0, clientDateModified = CURRENT_TIMESTAMP
+            WHERE collectionID = ?
+        """, (value, row["collectionID"]))
+        self._journal("update", "collections", [(row["collectionID"], row[column], value)], column=column)
+        tree = self._collection_tree
+        if tree is not None and collection_key in tree:
+            if column == "collectionName":
+                tree.rename(collection_key, value)
+            else:
+                tree.reparent(collection_key, value)
+
+    def reparent_collection(self, collection_key: str, parent_key: Optional[str] = None):
+        """
+        Move a collection, with everything under it, to a new parent in one UPDATE.
+
+        Args:
+            collection_key: Collection to move
+            parent_key: New parent collection (None = top level)
+
+        Raises:
+            ValueError: If either collection doesn't exist or they're in
+                different libraries
+        """
+        parent_id = None
+        if parent_key:
+            parent = self._collection_row(parent_key)
+            self._check_same_library(collection_key, parent)
+            parent_id = parent["collectionID"]
+        self._update_collection(collection_key, "parentCollectionID", parent_id)
+
+    def rename_collection(self, collection_key: str, name: str):
+        """
+        Rename a collection in one UPDATE.
+
+        Raises:
+            ValueError: If the collection doesn't exist
+        """
+        self._update_collection(collection_key, "collectionName", name)
+
+    def merge_collection(self, source_key: str, target_key: str) -> Dict[str, int]:
+        """
+        Merge one collection into another with a few set-based statements.
+
+        The source's papers are added to the target (order indexes continue
+        after the target's), its memberships are removed, its subcollections
+        are reparented under the target, and the emptied source is moved to
+        zotero's trash, from where it can still be restored.
+
+        Returns:
+            Papers added to the target, papers that were already in it, and
+            subcollections moved
+
+        Raises:
+            ValueError: If either collection doesn't exist or they're in
+                different libraries
+        """
+        target = self._collection_row(target_key)
+        source_id = self._check_same_library(source_key, target)["collectionID"]
+        target_id = target["collectionID"]
+        ids = {"source": source_id, "target": target_id}
+
+        added = self.conn.execute("""
+            INSERT INTO collectionItems (collectionID, itemID, orderIndex)
+            SELECT :target, ci.itemID,
+                   (SELECT COALESCE(MAX(orderIndex), -1) FROM collectionItems WHERE collectionID = :target)
+                   + ROW_NUMBER() OVER (ORDER BY ci.orderIndex)
+            FROM collectionItems ci
+            WHERE ci.collectionID = :source
+              AND NOT EXISTS (
+                  SELECT 1 FROM collectionItems t WHERE t.collectionID = :target AND t.itemID = ci.itemID
+              )
+            RETURNING collectionID, itemID, orderIndex
+        """, ids).fetchall()
+        self._journal("insert", "collectionItems", added)
+
+        removed = self.conn.execute(
+            "DELETE FROM collectionItems WHERE collectionID = :source RETURNING collectionID, itemID, orderIndex",
+            ids
+        ).fetchall()
+        self._journal("delete", "collectionItems", removed)
+
+        children = self.conn.execute("""
+            UPDATE collections SET parentCollectionID = :target, synced = 0, clientDateModified = CURRENT_TIMESTAMP
+            WHERE parentCollectionID = :source
+            RETURNING collectionID
+        """, ids).fetchall()
+        self._journal(
+            "update", "collections",
+            [(row[0], source_id, target_id) for row in children],
+            column="parentCollectionID"
+        )
+
+        trashed = self.conn.execute(
+            "INSERT OR IGNORE INTO deletedCollections (collectionID) VALUES (:source) RETURNING collectionID",
+            ids
+        ).fetchall()
+        self._journal("insert", "deletedCollections", trashed)
+        tree = self._collection_tree
+        if tree is not None and source_key in tree:
+            for child_key in list(tree.children.get(source_id, [])):
+                tree.reparent(child_key, target_id)
+            tree.remove(source_key)
+
+        return {
+            "added": len(added),
+            "already_there": len(removed) - len(added),
+            "subcollections": len(children),
+        }
+
+    def undo_operations(self, entries: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Replay the inverse of journaled writes, newest first, in this transaction.
+
+        Inserted memberships, item tags, tags and collections are deleted,
+        removed memberships re-inserted, renamed or reparented collections
+        set back and merged collections taken out of the trash, each journal
+        entry with one executemany. Rows that have changed since are left alone: a tag
+        another item now uses, a collection that has gained items or
+        subcollections, or a membership whose item or collection is gone.
+
+        Args:
+            entries: Journal entries as returned by journal.load_journal
+
+        Returns:
+            Rows changed per kind, plus the created collections kept because
+            they are in use
+        """
+        inverse = {
+            ("insert", "collectionItems"): (
+                "unfiled", "DELETE FROM collectionItems WHERE collectionID = ? AND itemID = ?", lambda r: r[:2]
+            ),
+            ("delete", "collectionItems"): (
+                "refiled", """
+                INSERT OR IGNORE INTO collectionItems (collectionID, itemID, orderIndex)
+                SELECT ?1, ?2, ?3
+                WHERE EXISTS (SELECT 1 FROM collections WHERE collectionID = ?1)
+                  AND EXISTS (SELECT 1 FROM items WHERE itemID = ?2)
+                """, lambda r: r
+            ),
+            ("insert", "itemTags"): (
+                "untagged", "DELETE FROM itemTags WHERE itemID = ? AND tagID = ?", lambda r: r[:2]
+            ),
+            ("insert", "tags"): (
+                "tags_deleted", """
+                DELETE FROM tags WHERE tagID = ?1
+                AND NOT EXISTS (SELECT 1 FROM itemTags WHERE tagID = ?1)
+                """, lambda r: r[:1]
+            ),
+            ("insert", "deletedCollections"): (
+                "untrashed", "DELETE FROM deletedCollections WHERE collectionID = ?", lambda r: r[:1]
+            ),
+            ("insert", "collections"): (
+                "collections_deleted", """
+                DELETE FROM collections WHERE collectionID = ?1
+                AND NOT EXISTS (SELECT 1 FROM collectionItems WHERE collectionID = ?1)
+                AND NOT EXISTS (SELECT 1 FROM collections WHERE parentCollectionID = ?1)
+                """, lambda r: r[:1]
+            ),
+        }
+        counts = {label: 0 for label, _, _ in inverse.values()}
+        counts["collections_reverted"] = 0
+        created_collections = 0
+        for entry in reversed(entries):
+            if entry["op"] == "update":
+                column = entry["column"]
+                if entry["table"] != "collections" or column not in UPDATABLE_COLUMNS:
+                    raise ValueError(f"Can't undo an update of {entry['table']}.{column}")
+                rows = [(old, coll_id) for coll_id, old, _ in reversed(entry["rows"])]
+                counts["collections_reverted"] += self.conn.executemany(
+                    f"UPDATE collections SET {column} = ?, synced = 0, clientDateModified = CURRENT_TIMESTAMP WHERE collectionID = ?",
+                    rows
+                ).rowcount
+                continue
+            label, sql, params = inverse[(entry["op"], entry["table"])]
+            rows = [params(row) for row in reversed(entry["rows"])]
+            counts[label] += self.conn.executemany(sql, rows).rowcount
+            if entry["table"] == "collections":
+                created_collections += len(rows)
+        counts["collections_kept"] = created_collections - counts["collections_deleted"]
+        self._collection_tree = None
+        return counts
@@ -0,0 +1,563 @@
+"""Sidecar SQLite mirror of Zotero item metadata in flat, indexed tables."""
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+from ..collection_tree import CollectionTree
+from .local_sqlite import LocalSQLiteBackend, chunked
+
+
+# venue-like fields, first non-empty one wins for the flat venue column
+VENUE_FIELDS = ["publicationTitle", "proceedingsTitle", "conferenceName", "bookTitle", "university"]
+
+# items decoded from zotero's itemData per get_items_details call during sync
+SYNC_CHUNK_SIZE = 2000
+
+# bm25 weights for the items_fts columns: title, abstract, venue, tags
+FTS_COLUMN_WEIGHTS = (3.0, 1.0, 1.5, 2.0)
+
+MIRROR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    itemID INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    itemType TEXT,
+    dateAdded TEXT,
+    clientDateModified TEXT,
+    version INTEGER,
+    title TEXT,
+    abstract TEXT,
+    venue TEXT,
+    creators TEXT NOT NULL DEFAULT '[]',
+    fields TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS items_dateAdded ON items(dateAdded, itemID);
+CREATE TABLE IF NOT EXISTS item_tags (
+    itemID INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS item_tags_itemID ON item_tags(itemID);
+CREATE TABLE IF NOT EXISTS memberships (
+    itemID INTEGER NOT NULL,
+    collectionID INTEGER NOT NULL,
+    PRIMARY KEY (itemID, collectionID)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS collections (
+    collectionID INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    parentCollectionID INTEGER,
+    key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deleted (itemID INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, value);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, abstract, venue, tags,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching any of its words.
+
+    Every term is quoted, so punctuation and FTS operators in titles
+    ("AND", "-", ":") can't break the query; bm25 ranks documents matching
+    more (and rarer) terms first.
+    """
+    terms = dict.fromkeys(re.findall(r"\w+", text.lower()))
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class MirrorBackend:
+    """
+    Read backend served from a research-clerk owned copy of the library.
+
+    Each top-level item is one row with its title, abstract, venue, creators
+    and every other field already decoded, so reads are single-table lookups
+    instead of joins over zotero's itemData/itemDataValues tables. Tags,
+    collection membership, collections and the trash are kept in small link
+    tables.
+
+    sync() brings the mirror up to date: items are re-decoded only when their
+    clientDateModified or version moved past the last sync, while the link
+    tables are refreshed with set-based INSERT ... SELECT statements from the
+    attached zotero database (they change without touching the item rows).
+
+    An FTS5 index over title, abstract, venue and tags is kept in step with
+    the rows sync() touches, for bm25-ranked search_items lookups.
+
+    Implements the read methods of LocalSQLiteBackend used by the tools.
+    """
+
+    def __init__(self, mirror_path: Path, zotero_path: Path):
+        self.mirror_path = Path(mirror_path)
+        self.zotero_path = Path(zotero_path)
+        self.conn: Optional[sqlite3.Connection] = None
+        self._collection_tree: Optional[CollectionTree] = None
+
+        if not self.zotero_path.exists():
+            raise ValueError(f"Zotero database not found: {zotero_path}")
+
+    def connect(self, read_only: bool = False):
+        """
+        Connect to the mirror, creating it if needed.
+
+        Args:
+            read_only: Open read-only (for tool calls; sync needs a writable connection)
+        """
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{self.mirror_path}?mode=ro", uri=True)
+        else:
+            self.mirror_path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(self.mirror_path)
+            self.conn.executescript(MIRROR_SCHEMA)
+        return self
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def _state(self, name: str, default: Any = None) -> Any:
+        row = self.conn.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, name: str, value: Any):
+        self.conn.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", (name, value))
+
+    def _attach_zotero(self) -> bool:
+        """
+        Attach the zotero database as `zotero`, reading through its WAL if possible.
+
+        Falls back to an immutable snapshot (which misses changes zotero
+        hasn't checkpointed yet) when zotero holds the database lock.
+
+        Returns:
+            True if the immutable fallback was used
+        """
+        for immutable in (False, True):
+            uri = f"file:{self.zotero_path}?mode=ro" + ("&immutable=1" if immutable else "")
+            self.conn.execute("ATTACH DATABASE ? AS zotero", (uri,))
+            try:
+                self.conn.execute("SELECT 1 FROM zotero.items LIMIT 1").fetchall()
+                return immutable
+            except sqlite3.OperationalError:
+                self.conn.execute("DETACH DATABASE zotero")
+                if immutable:
+                    raise
+
+    def sync(self) -> Dict[str, Any]:
+        """
+        Bring the mirror up to date with the zotero database.
+
+        Returns:
+            Stats: items re-decoded, removed and re-indexed, items mirrored, elapsed ms
+        """
+        start = time.perf_counter()
+        conn = self.conn
+
+        # a different zotero database means starting over
+        if self._state("zotero_path") != str(self.zotero_path):
+            for table in ("items", "item_tags", "memberships", "collections", "deleted", "sync_state", "items_fts"):
+                conn.execute(f"DELETE FROM {table}")
+            self._set_state("zotero_path", str(self.zotero_path))
+
+        last_modified = self._state("clientDateModified", "")
+        last_version = self._state("version", 0)
+        conn.commit()  # ATTACH can't run inside a transaction
+
+        immutable = self._attach_zotero()
+        zotero = LocalSQLiteBackend(self.zotero_path).connect(read_only=True, immutable=immutable)
+        try:
+            # >= re-reads items modified in the last synced second, in case more arrived within it
+            changed = conn.execute("""
+                SELECT i.itemID, i.key, it.typeName, i.dateAdded, i.clientDateModified, i.version
+                FROM zotero.items i
+                LEFT JOIN zotero.itemTypes it ON it.itemTypeID = i.itemTypeID
+                WHERE (i.clientDateModified >= ? OR i.version > ?)
+                  AND NOT EXISTS (SELECT 1 FROM zotero.itemAttachments ia WHERE ia.itemID = i.itemID)
+                  AND NOT EXISTS (SELECT 1 FROM zotero.itemNotes inotes WHERE inotes.itemID = i.itemID)
+            """, (last_modified, last_version)).fetchall()
+
+            for chunk in chunked(changed, SYNC_CHUNK_SIZE):
+                details = {d["key"]: d for d in zotero.get_items_details([row[1] for row in chunk])}
+                rows = []
+                for item_id, key, item_type, date_added, modified, version in chunk:
+                    item = details.get(key, {})
+                    fields = {
+                        name: value for name, value in item.items()
+                        if name not in ("itemID", "key", "creators", "tags")
+                    }
+                    venue = next((fields[f] for f in VENUE_FIELDS if fields.get(f)), None)
+                    rows.append((
+                        item_id, key, item_type, date_added, modified, version,
+                        fields.get("title"), fields.get("abstractNote"), venue,
+                        json.dumps(item.get("creators", []), ensure_ascii=False),
+                        json.dumps(fields, ensure_ascii=False)
+                    ))
+                conn.executemany("""
+                    INSERT OR REPLACE INTO items (
+                        itemID, key, itemType, dateAdded, clientDateModified, version,
+                        title, abstract, venue, creators, fields
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+
+            if changed:
+                self._set_state("clientDateModified", max(row[4] for row in changed))
+                self._set_state("version", max(max(row[5] for row in changed), last_version))
+
+            # items erased from zotero (emptied trash)
+            removed = [row[0] for row in conn.execute(
+                "SELECT itemID FROM items WHERE itemID NOT IN (SELECT itemID FROM zotero.items)"
+            )]
+            conn.execute("DELETE FROM items WHERE itemID NOT IN (SELECT itemID FROM zotero.items)")
+
+            # link tables change without bumping the item rows, so refresh them wholesale;
+            # tags are diffed first so the search index only re-reads retagged items
+            conn.execute("""
+                CREATE TEMP TABLE fresh_tags AS
+                SELECT it.itemID, t.name FROM zotero.itemTags it JOIN zotero.tags t ON t.tagID = it.tagID
+            """)
+            retagged = [row[0] for row in conn.execute("""
+                SELECT itemID FROM (SELECT itemID, name FROM item_tags EXCEPT SELECT itemID, name FROM fresh_tags)
+                UNION
+                SELECT itemID FROM (SELECT itemID, name FROM fresh_tags EXCEPT SELECT itemID, name FROM item_tags)
+            """)]
+            conn.execute("DELETE FROM item_tags")
+            conn.execute("INSERT INTO item_tags (itemID, name) SELECT itemID, name FROM fresh_tags")
+            conn.execute("DROP TABLE temp.fresh_tags")
+
+            conn.execute("DELETE FROM memberships")
+            conn.execute("""
+                INSERT OR IGNORE INTO memberships (itemID, collectionID)
+                SELECT itemID, collectionID FROM zotero.collectionItems
+            """)
+            conn.execute("DELETE FROM collections")
+            conn.execute("""
+                INSERT INTO collections (collectionID, name, parentCollectionID, key)
+                SELECT collectionID, collectionName, parentCollectionID, key FROM zotero.collections
+                WHERE collectionID NOT IN (SELECT collectionID FROM zotero.deletedCollections)
+            """)
+            conn.execute("DELETE FROM deleted")
+            conn.execute("INSERT INTO deleted (itemID) SELECT itemID FROM zotero.deletedItems")
+
+            # mirrors created before the search index existed get it built once
+            if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM items_fts)").fetchone()[0]:
+                reindexed = self._reindex()
+            else:
+                reindexed = self._reindex({row[0] for row in changed}.union(retagged, removed))
+            conn.commit()
+        finally:
+            zotero.close()
+            conn.rollback()
+            conn.execute("DETACH DATABASE zotero")
+
+        self._collection_tree = None
+        total = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        return {
+            "updated": len(changed),
+            "removed": len(removed),
+            "reindexed": reindexed,
+            "items": total,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+        }
+
+    def _reindex(self, item_ids: Optional[Iterable[int]] = None) -> int:
+        """Rewrite the search index rows for item_ids (the whole index if None)."""
+        select = """
+        INSERT INTO items_fts (rowid, title, abstract, venue, tags)
+        SELECT i.itemID, i.title, i.abstract, i.venue,
+               (SELECT group_concat(t.name, ' ') FROM item_tags t WHERE t.itemID = i.itemID)
+        FROM items i
+        """
+        if item_ids is None:
+            self.conn.execute("DELETE FROM items_fts")
+            return self.conn.execute(select).rowcount
+
+        item_ids = list(item_ids)
+        for chunk in chunked(item_ids):
+            placeholders = ",".join("?" * len(chunk))
+            self.conn.execute(f"DELETE FROM items_fts WHERE rowid IN ({placeholders})", chunk)
+            self.conn.execute(f"{select} WHERE i.itemID IN ({placeholders})", chunk)
+        return len(item_ids)
+
+    def search_items(self, query: str, limit: int = 10, filed_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Full-text search over title, abstract, venue and tags, best matches first.
+
+        Args:
+            query: Free text (e.g. a paper's title or a few topic words)
+            limit: Max results
+            filed_only: Only return items that are in at least one collection
+
+        Returns:
+            Matches with key, title, venue, bm25 score (higher is better) and
+            the collection paths each match is filed under
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+
+        membership = "AND EXISTS (SELECT 1 FROM memberships m WHERE m.itemID = i.itemID)" if filed_only else ""
+        weights = ", ".join(str(w) for w in FTS_COLUMN_WEIGHTS)
+        sql = f"""
+        SELECT i.key, i.title, i.venue, bm25(items_fts, {weights}) AS score
+        FROM items_fts
+        JOIN items i ON i.itemID = items_fts.rowid
+        WHERE items_fts MATCH ?
+          AND NOT EXISTS (SELECT 1 FROM deleted d WHERE d.itemID = i.itemID)
+          {membership}
+        ORDER BY score
+        LIMIT ?
+        """
+        results = [
+            {"key": key, "title": title or "Untitled", "venue": venue, "score": round(-score, 3)}
+            for key, title, venue, score in self.conn.execute(sql, (match, limit))
+        ]
+
+        paths = self.get_items_collections([r["key"] for r in results])
+        for result in results:
+            result["collections"] = paths[result["key"]]
+        return results
+
+    def _list_items(
+        self,
+        filed: bool,
+        since_timestamp: Optional[str] = None,
+        item_type: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Filed/unfiled listing, newest first (same semantics as LocalSQLiteBackend)."""
+        membership = "EXISTS" if filed else "NOT EXISTS"
+        conditions = [
+            "i.title IS NOT NULL",
+            f"{membership} (SELECT 1 FROM memberships m WHERE m.itemID = i.itemID)",
+            "NOT EXISTS (SELECT 1 FROM deleted d WHERE d.itemID = i.itemID)",
+        ]
+        params: List[Any] = []
+        if since_timestamp is not None:
+            conditions.append("i.dateAdded > ?")
+            params.append(since_timestamp)
+        if item_type is not None:
+            conditions.append("i.itemType = ?")
+            params.append(item_type)
+
+        query = f"""
+        SELECT i.itemID, i.key, i.title, i.itemType
+        FROM items i
+        WHERE {" AND ".join(conditions)}
+        ORDER BY i.itemID DESC
+        LIMIT ? OFFSET ?
+        """
+        params.extend([limit if limit is not None else -1, offset])
+        return [
+            {
+                "itemID": row[0],
+                "key": row[1],
+                "title": row[2] or "Untitled",
+                "itemType": row[3] or "unknown"
+            }
+            for row in self.conn.execute(query, params)
+        ]
+
+    def list_unfiled_items(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        since: Optional[str] = None,
+        item_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get items not in any collection (see LocalSQLiteBackend.list_unfiled_items)."""
+        return self._list_items(False, since, item_type, limit, offset)
+
+    def list_filed_items(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        since: Optional[str] = None,
+        item_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get items that ARE in collections (see LocalSQLiteBackend.list_filed_items)."""
+        return self._list_items(True, since, item_type, limit, offset)
+
+    def get_item_details(
+        self,
+        item_key: str,
+        fields: Optional[List[str]] = None,
+        abstract_chars: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Get metadata for an item (see get_items_details for the arguments)."""
+        details = self.get_items_details([item_key], fields, abstract_chars)
+        if not details:
+            raise ValueError(f"Item not found: {item_key}")
+        return details[0]
+
+    def get_items_details(
+        self,
+        item_keys: List[str],
+        fields: Optional[List[str]] = None,
+        abstract_chars: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get metadata, creators and tags for many items from the flat rows.
+
+        Args:
+            item_keys: Zotero item keys
+            fields: Only return these Zotero fields (None for all fields)
+            abstract_chars: Truncate abstractNote to this many characters
+
+        Returns:
+            Metadata dicts in the order of item_keys (unknown keys are omitted)
+        """
+        by_key: Dict[str, Dict[str, Any]] = {}
+        by_id: Dict[int, Dict[str, Any]] = {}
+
+        for chunk in chunked(list(dict.fromkeys(item_keys))):
+            placeholders = ",".join("?" * len(chunk))
+            query = f"SELECT itemID, key, fields, creators FROM items WHERE key IN ({placeholders})"
+            ids = []
+            for item_id, key, fields_json, creators_json in self.conn.execute(query, chunk):
+                item_fields = json.loads(fields_json)
+                if fields is not None:
+                    item_fields = {name: item_fields[name] for name in fields if name in item_fields}
+                abstract = item_fields.get("abstractNote")
+                if abstract_chars is not None and abstract and len(abstract) > abstract_chars:
+                    item_fields["abstractNote"] = abstract[:abstract_chars] + "…"
+
+                item = {"itemID": item_id, "key": key, **item_fields,
+                        "creators": json.loads(creators_json), "tags": []}
+                by_key[key] = item
+                by_id[item_id] = item
+                ids.append(item_id)
+
+            id_placeholders = ",".join("?" * len(ids))
+            for item_id, name in self.conn.execute(
+                f"SELECT itemID, name FROM item_tags WHERE itemID IN ({id_placeholders})", ids
+            ):
+                by_id[item_id]["tags"].append(name)
+
+        return [by_key[key] for key in item_keys if key in by_key]
+
+    def get_collection_tree(self, refresh: bool = False) -> CollectionTree:
+        """Get all collections as an indexed hierarchy (cached until the next sync)."""
+        if self._collection_tree is None or refresh:
+            query = """
+            SELECT collectionID, name, parentCollectionID, key
+            FROM collections
+            ORDER BY name
+            """
+            self._collection_tree = CollectionTree(self.conn.execute(query))
+        return self._collection_tree
+
+    def list_collections(self) -> Dict[str, Dict[str, Any]]:
+        """Get all collections with hierarchy."""
+        return self.get_collection_tree().as_dict()
+
+    def count_collection_items(self) -> Dict[str, int]:
+        """Number of papers in each collection (see LocalSQLiteBackend.count_collection_items)."""
+        tree = self.get_collection_tree()
+        query = """
+        SELECT ci.collectionID, COUNT(*)
+        FROM memberships ci
+        WHERE NOT EXISTS (SELECT 1 FROM deleted d WHERE d.itemID = ci.itemID)
+        GROUP BY ci.collectionID
+        """
+        return {
+            tree.by_id[coll_id]["key"]: count
+            for coll_id, count in self.conn.execute(query)
+            if coll_id in tree.by_id
+        }
+
+    def library_fingerprint(self) -> str:
+        """Cheap hash of the mirrored state (see LocalSQLiteBackend.library_fingerprint)."""
+        queries = [
+            "SELECT COUNT(*), MAX(clientDateModified), MAX(itemID) FROM items",
+            "SELECT COUNT(*), TOTAL(itemID * 1000003 + collectionID) FROM memberships",
+            "SELECT collectionID, name, parentCollectionID FROM collections ORDER BY collectionID",
+            "SELECT COUNT(*) FROM deleted",
+        ]
+        state = [self.conn.execute(query).fetchall() for query in queries]
+        return hashlib.sha1(repr(state).encode()).hexdigest()
+
+    def get_item_collections(self, item_key: str) -> List[str]:
+        """Get full collection paths for an item."""
+        return self.get_items_collections([item_key])[item_key]
+
+    def get_items_collections(self, item_keys: List[str]) -> Dict[str, List[str]]:
+        """Get full collection paths for many items (empty list if not filed or unknown)."""
+        tree = self.get_collection_tree()
+        result = {key: [] for key in item_keys}
+
+        for chunk in chunked(list(result)):
+            placeholders = ",".join("?" * len(chunk))
+            query = f"""
+            SELECT i.key, m.collectionID
+            FROM items i
+            JOIN memberships m ON m.itemID = i.itemID
+            WHERE i.key IN ({placeholders})
+            ORDER BY m.collectionID
+            """
+            for item_key, coll_id in self.conn.execute(query, chunk):
+                node = tree.by_id.get(coll_id)
+                if node:
+                    result[item_key].append(tree.path(node["key"]))
+
+        return result
+
+    def iter_item_collections(self) -> Iterator[Tuple[str, List[str]]]:
+        """Stream (item_key, collection paths) for every filed item in the library."""
+        for _, item_key, paths in self._iter_memberships():
+            yield item_key, paths
+
+    def item_collections_page(self, after_item_id: int, limit: int) -> Tuple[Dict[str, List[str]], Optional[int]]:
+        """
+        One page of the filed-item map, in itemID order.
+
+        Keyset paging: the page starts right after `after_item_id` through
+        the itemID index, so walking the whole map reads every membership
+        once however many pages it takes.
+
+        Returns:
+            (item_key -> collection paths, itemID to pass as after_item_id for
+            the next page, or None after the last page)
+        """
+        page = list(islice(self._iter_memberships(after_item_id), limit + 1))
+        cursor = page[limit - 1][0] if len(page) > limit else None
+        return {item_key: paths for _, item_key, paths in page[:limit]}, cursor
+
+    def _iter_memberships(self, after_item_id: int = 0) -> Iterator[Tuple[int, str, List[str]]]:
+        """(itemID, item_key, collection paths) for filed items past after_item_id, in itemID order."""
+        tree = self.get_collection_tree()
+        query = """
+        SELECT m.itemID, i.key, m.collectionID
+        FROM memberships m
+        JOIN items i ON i.itemID = m.itemID
+        WHERE m.itemID > ?
+          AND NOT EXISTS (SELECT 1 FROM deleted d WHERE d.itemID = m.itemID)
+        ORDER BY m.itemID, m.collectionID
+        """
+        current_id, current_key = None, None
+        paths: List[str] = []
+        for item_id, item_key, coll_id in self.conn.execute(query, (after_item_id,)):
+            if item_id != current_id:
+                if current_id is not None and paths:
+                    yield current_id, current_key, paths
+                current_id, current_key, paths = item_id, item_key, []
+            node = tree.by_id.get(coll_id)
+            if node:
+                paths.append(tree.path(node["key"]))
+
+        if current_id is not None and paths:
+            yield current_id, current_key, paths
@@ -0,0 +1,265 @@
+"""Online database backups: page-batched copies, content-hash skip, compression and retention."""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
+
+
+BACKUP_DIR = "backups"
+BACKUP_PREFIX = "zotero_backup_"
+BACKUP_TIME_FORMAT = "%Y%m%d_%H%M%S"
+# last backup's content hash and the file stats it was computed from
+STATE_FILE = "last_backup.json"
+
+# pages copied per backup step; other readers can get in between steps
+BACKUP_PAGES = 4096
+HASH_CHUNK_SIZE = 1 << 20
+
+DEFAULT_KEEP_LAST = 5
+DEFAULT_KEEP_DAILY = 7
+
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def require_zstandard():
+    """Import zstandard, with an install hint if it's missing."""
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(
+            "zstd backups need zstandard. Install with: uv pip install 'research-clerk[backup]'"
+        ) from None
+    return zstandard
+
+
+@dataclass
+class BackupPolicy:
+    """
+    How backups are compressed and how many are kept.
+
+    Retention keeps the `keep_last` newest backups plus the newest backup of
+    each of the last `keep_daily` days; everything older is deleted after a
+    new backup is written.
+    """
+    keep_last: int = DEFAULT_KEEP_LAST
+    keep_daily: int = DEFAULT_KEEP_DAILY
+    compression: str = "none"
+
+    @classmethod
+    def from_env(cls) -> "BackupPolicy":
+        """Policy from RESEARCH_CLERK_BACKUP_KEEP / _BACKUP_DAILY / _BACKUP_COMPRESSION."""
+        policy = cls(
+            keep_last=int(os.getenv("RESEARCH_CLERK_BACKUP_KEEP", DEFAULT_KEEP_LAST)),
+            keep_daily=int(os.getenv("RESEARCH_CLERK_BACKUP_DAILY", DEFAULT_KEEP_DAILY)),
+            compression=os.getenv("RESEARCH_CLERK_BACKUP_COMPRESSION", "none").lower(),
+        )
+        if policy.compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(
+                f"Unknown backup compression '{policy.compression}' "
+                f"(choose from {', '.join(COMPRESSION_SUFFIXES)})"
+            )
+        if policy.compression == "zstd":
+            require_zstandard()
+        if policy.keep_last < 1:
+            raise ValueError("At least one backup must be kept (RESEARCH_CLERK_BACKUP_KEEP >= 1)")
+        return policy
+
+
+def database_files(db_path: Path) -> List[Path]:
+    """The database file plus its WAL, whose pages belong to the content too."""
+    wal = db_path.with_name(db_path.name + "-wal")
+    return [db_path, wal] if wal.exists() else [db_path]
+
+
+def file_stats(db_path: Path) -> List[Tuple[str, int, int]]:
+    """(name, size, mtime_ns) of each database file."""
+    return [(p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in database_files(db_path)]
+
+
+def content_hash(db_path: Path) -> str:
+    """blake2b over the database file and its WAL."""
+    digest = hashlib.blake2b(digest_size=20)
+    for path in database_files(db_path):
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def backup_time(path: Path) -> Optional[datetime]:
+    """Creation time encoded in a backup's file name, or None for other files."""
+    if not path.name.startswith(BACKUP_PREFIX):
+        return None
+    try:
+        return datetime.strptime(path.name[len(BACKUP_PREFIX):].split(".", 1)[0], BACKUP_TIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def compress_file(path: Path, compression: str) -> Path:
+    """Compress a backup next to itself, then delete the uncompressed copy."""
+    target = path.with_name(path.name + COMPRESSION_SUFFIXES[compression])
+    partial = target.with_name(target.name + ".partial")
+    with open(path, "rb") as src, open(partial, "wb") as raw:
+        if compression == "zstd":
+            with require_zstandard().ZstdCompressor(level=3).stream_writer(raw) as dst:
+                shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+        else:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+    os.replace(partial, target)
+    path.unlink()
+    return target
+
+
+class BackupManager:
+    """
+    Backups of one zotero database under <data dir>/backups.
+
+    A backup is an online copy through sqlite's backup API, taken in batches
+    of BACKUP_PAGES pages with progress printed as it goes, so it is
+    consistent even if the database has a WAL. If the database content
+    hashes the same as at the last backup (and that backup still exists),
+    no copy is made and the last backup is reused; the hash is only
+    recomputed when a file's size or mtime changed.
+
+    With compression on, the copy is compressed on a worker thread while the
+    caller carries on; retention runs once the backup is final. Call wait()
+    before exiting to let it finish.
+    """
+
+    def __init__(self, db_path: Path, policy: Optional[BackupPolicy] = None):
+        self.db_path = Path(db_path)
+        self.policy = policy or BackupPolicy.from_env()
+        self.dir = self.db_path.parent / BACKUP_DIR
+        self.state_path = self.dir / STATE_FILE
+        self._worker: Optional[threading.Thread] = None
+        self._worker_error: Optional[BaseException] = None
+
+    def list_backups(self) -> List[Tuple[datetime, Path]]:
+        """Finished backups, newest first."""
+        backups = []
+        for path in self.dir.glob(f"{BACKUP_PREFIX}*"):
+            created = backup_time(path)
+            if created and not path.name.endswith((".partial", ".tmp")):
+                backups.append((created, path))
+        return sorted(backups, reverse=True)
+
+    def _load_state(self) -> Dict:
+        try:
+            return json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: Dict):
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=2))
+        os.replace(tmp, self.state_path)
+
+    def _unchanged_backup(self, stats: List, state: Dict) -> Tuple[Optional[Path], Optional[str]]:
+        """The last backup if the database hasn't changed since, plus the current hash."""
+        last = self.dir / state["backup"] if state.get("backup") else None
+        if last is None or not last.exists():
+            return None, None
+        if [list(s) for s in stats] == state.get("stats"):
+            return last, state["hash"]
+        digest = content_hash(self.db_path)
+        return (last if digest == state.get("hash") else None), digest
+
+    def create(self) -> Path:
+        """
+        Back up the database, or reuse the last backup if nothing changed.
+
+        Returns:
+            Path of the backup (the compressed name when compressing in the background)
+        """
+        self.wait()
+        self.dir.mkdir(exist_ok=True)
+        stats = file_stats(self.db_path)
+        last, digest = self._unchanged_backup(stats, self._load_state())
+        if last:
+            print(f"✓ Database unchanged since last backup: {last}")
+            self._save_state({"backup": last.name, "hash": digest, "stats": stats})
+            return last
+        digest = digest or content_hash(self.db_path)
+
+        timestamp = datetime.now().strftime(BACKUP_TIME_FORMAT)
+        path = self.dir / f"{BACKUP_PREFIX}{timestamp}.sqlite"
+        suffix = COMPRESSION_SUFFIXES[self.policy.compression]
+        while path.exists() or path.with_name(path.name + suffix).exists():
+            # a second backup within the same second
+            timestamp = (datetime.strptime(timestamp, BACKUP_TIME_FORMAT) + timedelta(seconds=1)).strftime(BACKUP_TIME_FORMAT)
+            path = self.dir / f"{BACKUP_PREFIX}{timestamp}.sqlite"
+        self._copy(path)
+
+        final = path.with_name(path.name + suffix)
+        self._save_state({"backup": final.name, "hash": digest, "stats": stats})
+        if self.policy.compression == "none":
+            print(f"✓ Backup created: {path}")
+            self.apply_retention()
+        else:
+            print(f"✓ Backup created: {final} (compressing in the background)")
+            self._worker = threading.Thread(target=self._finish, args=(path,), name="backup-compress")
+            self._worker.start()
+        return final
+
+    def _copy(self, path: Path):
+        """Copy the database page batch by page batch, printing progress."""
+        partial = path.with_name(path.name + ".partial")
+        partial.unlink(missing_ok=True)
+
+        def progress(status, remaining, total):
+            if total:
+                print(f"\r  Backing up: {100 * (total - remaining) // total}%", end="", flush=True)
+
+        src = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=5.0)
+        dst = sqlite3.connect(partial)
+        try:
+            src.backup(dst, pages=BACKUP_PAGES, progress=progress)
+        finally:
+            dst.close()
+            src.close()
+        print("\r" + " " * 24 + "\r", end="")
+        os.replace(partial, path)
+
+    def _finish(self, path: Path):
+        try:
+            compress_file(path, self.policy.compression)
+            self.apply_retention()
+        except BaseException as e:
+            self._worker_error = e
+
+    def wait(self):
+        """Block until background compression (and the retention after it) is done."""
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        error, self._worker_error = self._worker_error, None
+        if error:
+            print(f"⚠️  Backup compression failed, kept the uncompressed copy: {error}")
+
+    def apply_retention(self) -> List[Path]:
+        """Delete backups outside keep_last and keep_daily. Returns the deleted paths."""
+        backups = self.list_backups()
+        keep = {path for _, path in backups[:self.policy.keep_last]}
+        cutoff = datetime.now().date() - timedelta(days=self.policy.keep_daily - 1)
+        days_seen = set()
+        for created, path in backups:
+            day = created.date()
+            if day >= cutoff and day not in days_seen:
+                days_seen.add(day)
+                keep.add(path)
+
+        deleted = [path for _, path in backups if path not in keep]
+        for path in deleted:
+            path.unlink(missing_ok=True)
+        if deleted:
+            print(f"  Removed {len(deleted)} old backup(s)")
+        return deleted
@@ -0,0 +1,228 @@
+"""Plan/execute engine that applies saved suggestions and moves in bulk."""
+import time
+from typing import Optional, List, Dict, Tuple
+from .collection_tree import CollectionTree
+from .utils import build_collection_hierarchy, COLLECTION_OPS, MAX_COLLECTION_DEPTH
+
+
+class ApplyPlan:
+    """
+    Everything an apply will write, worked out before the database is touched.
+
+    Building a plan only reads the collection tree: it collects the target
+    collection paths, the memberships to add and remove and the tags to
+    attach. execute() then creates the missing collections and writes each
+    kind of row with one set-based statement through a temp staging table,
+    instead of several lookups per item.
+
+    Collection operations (reparent, rename, merge) run after the item
+    moves, one or a few statements per collection whatever its size. The
+    collection each one acts on is named by its path when the run started
+    and resolved to its key up front, so later operations still find it
+    after earlier ones moved or renamed it. Targets are looked up in the
+    tree as it is by then, falling back to the collection at that path when
+    the run started, and created if neither exists.
+
+    The backend keeps its collection tree current in place as collections
+    are created, renamed and moved, so every path lookup during execute is
+    a dict hit and creating a path costs O(depth).
+    """
+
+    def __init__(self):
+        # target collection path per added membership, in input order
+        self.adds: List[Tuple[str, str]] = []
+        # (item_key, collection_key) memberships to remove
+        self.removes: List[Tuple[str, str]] = []
+        # (item_key, tag name)
+        self.tags: List[Tuple[str, str]] = []
+        # collection operations with the key of the collection they act on
+        self.collection_ops: List[dict] = []
+        # human-readable reasons for entries left out of the plan
+        self.skipped: List[str] = []
+
+    @classmethod
+    def from_suggestions(cls, items: List[dict]) -> "ApplyPlan":
+        """Plan a categorization: file each item under its path and add its tags."""
+        plan = cls()
+        for item in items:
+            plan.adds.append((item["item_key"], item["collection_path"]))
+            plan.tags.extend((item["item_key"], tag) for tag in item.get("tags", []))
+        return plan
+
+    @classmethod
+    def from_moves(cls, moves: List[dict], tree: CollectionTree) -> "ApplyPlan":
+        """
+        Plan a reorganization: add each item to its new path and remove it from its current one.
+
+        Moves are collapsed per item to the net change, so overlapping moves
+        (A -> B then B -> A, or A -> B then B -> C) don't add and remove the
+        same membership. A move's current path must be a collection the item
+        is in when the run starts, or one an earlier move put it in.
+        """
+        plan = cls()
+        # item -> path -> whether the item ends up in it, in move order
+        final: Dict[str, Dict[str, bool]] = {}
+        # item -> path -> collection key, for the collections it is moved out of that exist now
+        before: Dict[str, Dict[str, str]] = {}
+        for move in moves:
+            item_key, current, new = move["item_key"], move["current_path"], move["new_path"]
+            if new == current:
+                plan.skipped.append(f"{item_key}: already in '{new}'")
+                continue
+            paths = final.setdefault(item_key, {})
+            if current not in paths:
+                current_key = tree.key_for_path(current)
+                if not current_key:
+                    plan.skipped.append(f"{item_key}: current collection '{current}' not found")
+                    continue
+                before.setdefault(item_key, {})[current] = current_key
+            paths[current] = False
+            paths[new] = True
+
+        for item_key, paths in final.items():
+            existing = before.get(item_key, {})
+            for path, present in paths.items():
+                if present and path not in existing:
+                    plan.adds.append((item_key, path))
+                elif not present and path in existing:
+                    plan.removes.append((item_key, existing[path]))
+        return plan
+
+    @classmethod
+    def from_reorganization(cls, reorganization: dict, tree: CollectionTree) -> "ApplyPlan":
+        """Plan item moves and collection operations together."""
+        plan = cls.from_moves(reorganization.get("moves", []), tree)
+        for op in reorganization.get("collection_ops", []):
+            key = tree.key_for_path(op["path"])
+            if not key:
+                plan.skipped.append(f"{op['op']} '{op['path']}': collection not found")
+                continue
+            target = cls.target_path(op)
+            start_target_key = tree.key_for_path(target) if target else None
+            plan.collection_ops.append({**op, "key": key, "start_target_key": start_target_key})
+        return plan
+
+    @staticmethod
+    def target_path(op: dict) -> Optional[str]:
+        """Collection path a reparent or merge points at (None for a rename or the top level)."""
+        return op.get(COLLECTION_OPS[op["op"]]) if op["op"] != "rename" else None
+
+    @staticmethod
+    def check_collection_op(
+        op: dict,
+        target_key: Optional[str],
+        tree: CollectionTree,
+        new_target: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Why an operation can't run against the tree as it is now, or None if it can.
+
+        Args:
+            op: Collection operation with the "key" of the collection it acts on
+            target_key: Key of the new parent or merge target (None = top level)
+            tree: The collection tree as it is now
+            new_target: Path of a target that doesn't exist yet and will be
+                created (target_key is None then)
+        """
+        key = op["key"]
+        if key not in tree:
+            return "collection no longer exists"
+        node = tree.by_key[key]
+        parent = tree.by_id.get(node["parentCollectionID"])
+
+        if op["op"] == "rename":
+            if not op["new_name"].strip() or "/" in op["new_name"]:
+                return "the new name must be non-empty and can't contain '/'"
+            clash = tree.child_named(parent["key"] if parent else None, op["new_name"])
+            if clash not in (None, key):
+                return f"a sibling is already called '{op['new_name']}' (merge instead)"
+            return None
+
+        if new_target:
+            # a fresh collection: no children to clash with, but it may be created inside this one
+            if f"{new_target}/".startswith(f"{tree.path(key)}/"):
+                return "target is the collection itself or inside it"
+            target_depth = new_target.count("/") + 1
+        else:
+            if target_key is not None and target_key not in tree:
+                return "target collection not found"
+            if target_key == key or target_key in tree.subtree(key):
+                return "target is the collection itself or inside it"
+            target_depth = tree.depth(target_key) if target_key else 0
+
+        if op["op"] == "reparent":
+            if target_depth + tree.height(key) > MAX_COLLECTION_DEPTH:
+                return f"would exceed max {MAX_COLLECTION_DEPTH} levels"
+            clash = None if new_target else tree.child_named(target_key, node["name"])
+            if clash not in (None, key):
+                return f"'{op['new_parent'] or 'top level'}' already has a '{node['name']}' (merge instead)"
+            return None
+
+        # merge: subcollections move under the target
+        for child in tree.children.get(node["collectionID"], []):
+            name = tree.by_key[child]["name"]
+            if not new_target and tree.child_named(target_key, name):
+                return f"both have a subcollection named '{name}' (merge those first)"
+            if target_depth + tree.height(child) > MAX_COLLECTION_DEPTH:
+                return f"subcollection '{name}' would exceed max {MAX_COLLECTION_DEPTH} levels"
+        return None
+
+    def execute(self, backend, tree: CollectionTree) -> Dict[str, float]:
+        """
+        Write the plan through a write-mode backend (inside its transaction).
+
+        Returns:
+            Counts of collections created and rows added/removed/tagged, plus
+            the milliseconds spent in the bulk statements
+        """
+        new_collection_cache: Dict[str, str] = {}
+        collection_keys = {
+            path: build_collection_hierarchy(path, tree, backend, new_collection_cache)
+            for path in dict.fromkeys(path for _, path in self.adds)
+        }
+
+        start = time.perf_counter()
+        added = backend.add_to_collections(
+            [(item_key, collection_keys[path]) for item_key, path in self.adds]
+        )
+        removed = backend.remove_from_collections(self.removes) if self.removes else 0
+        tagged = backend.add_tags_to_items(self.tags) if self.tags else 0
+
+        done = {name: 0 for name in COLLECTION_OPS}
+        merged_papers = 0
+        for op in self.collection_ops:
+            # a target path may name a collection from the start of the run, one
+            # an earlier operation produced, or one that has to be created
+            current = backend.get_collection_tree()
+            target = self.target_path(op)
+            target_key = None
+            if target:
+                target_key = current.key_for_path(target)
+                if target_key is None and op.get("start_target_key") in current:
+                    target_key = op["start_target_key"]
+            new_target = target if target and target_key is None else None
+            reason = self.check_collection_op(op, target_key, current, new_target)
+            if reason:
+                self.skipped.append(f"{op['op']} '{op['path']}': {reason}")
+                continue
+            if new_target:
+                target_key = build_collection_hierarchy(new_target, current, backend, new_collection_cache)
+            if op["op"] == "reparent":
+                backend.reparent_collection(op["key"], target_key)
+            elif op["op"] == "rename":
+                backend.rename_collection(op["key"], op["new_name"])
+            else:
+                merged_papers += backend.merge_collection(op["key"], target_key)["added"]
+            done[op["op"]] += 1
+
+        return {
+            "collections_created": len(new_collection_cache),
+            "added": added,
+            "removed": removed,
+            "tagged": tagged,
+            "reparented": done["reparent"],
+            "renamed": done["rename"],
+            "merged": done["merge"],
+            "merged_papers": merged_papers,
+            "sql_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
@@ -1,13 +1,53 @@
 """Agent logic for categorizing Zotero papers."""
+import hashlib
 import json
+import time
+from dataclasses import replace
 from pathlib import Path
+from typing import Optional, List, Tuple
+import anyio
 from claude_agent_sdk import create_sdk_mcp_server, ClaudeSDKClient, ClaudeAgentOptions, AssistantMessage, TextBlock
 from .tools import ALL_TOOLS
+from .session import ReadPool, ToolSettings, WriteSession, SuggestionLog, read_backend, tool_settings, suggestion_log
+from .config import FIELD_PROJECTIONS, DEFAULT_ABSTRACT_CHARS, get_decision_cache_path
 from .prompts import CATEGORIZER_PROMPT
-from .utils import extract_json_from_markdown, validate_suggestions
+from .utils import merge_suggestions
+from .similarity import cluster_items
+from .fastpath import run_fast_path
+from .decision_cache import DecisionCache
+from .runs import RunCheckpoint, new_run_id
 
 
-async def categorize_unfiled(dry_run: bool = True, batch_size: int = None, output_dir: Path = None, model: str = "claude-haiku-4-5"):
+# items per agent session when categorizing with --jobs
+DEFAULT_SHARD_SIZE = 25
+
+# items per agent session with --cluster (whole clusters only)
+CLUSTER_SHARD_SIZE = 100
+
+# with --cluster, the most central members of each cluster are shown with this much abstract
+CLUSTER_SAMPLE_ABSTRACTS = 2
+CLUSTER_SAMPLE_CHARS = 300
+
+RECORD_SUGGESTIONS = """IMPORTANT: Record each paper's decision with the record_suggestion tool as soon as you
+have made it (item_key, title, collection_path, tags, reasoning), one call per paper.
+Do not wait until the end and do not output a JSON block: only recorded decisions are kept.
+If the tool reports an error, fix the suggestion and record it again.
+"""
+
+RECORD_CLUSTER_SUGGESTIONS = """IMPORTANT: Record each cluster's decision with the record_cluster_suggestion tool as soon as
+you have made it (item_keys of the papers it covers, collection_path, tags, reasoning), one call per cluster.
+Record a paper that doesn't fit its cluster with record_suggestion instead, and leave it out of the
+cluster's item_keys. Do not wait until the end and do not output a JSON block: only recorded decisions
+are kept. If a tool reports an error, fix the decision and record it again.
+"""
+
+# cached decisions are only reused under the prompts that produced them
+PROMPT_VERSION = hashlib.sha1(
+    (CATEGORIZER_PROMPT + RECORD_SUGGESTIONS + RECORD_CLUSTER_SUGGESTIONS).encode()
+).hexdigest()[:12]
+
+
+async def categorize_unfiled(dry_run: bool = True, batch_size: int = None, output_dir: Path = None, model: str = "claude-haiku-4-5", encoding: str = "compact", measure_encoding: bool = False, all_fields: bool = False, abstract_chars: int = DEFAULT_ABSTRACT_CHARS, jobs: int = 1, mirror: bool = False, cluster: bool = False, candidates: int = 0, fast_path: Optional[float] = None, cache: bool = True, run_id: Optional[str] = None, resume: bool = False, keys: Optional[List[str]] = None):
     """
     Categorize unfiled papers in the Zotero library.
 
@@ -17,9 +57,50 @@ async def categorize_unfiled(dry_run: bool = True, batch_size: int = None, outpu
         batch_size: If set, only process first N items. Useful for incremental runs.
         output_dir: Directory to save suggestion files. Defaults to current directory.
         model: Claude model to use (e.g., "claude-haiku-4-5" or "claude-sonnet-4-5").
+        encoding: Tool response encoding ("json", "compact" or "table").
+        measure_encoding: If True, report bytes/tokens saved per tool at the end.
+        all_fields: If True, send every Zotero field instead of the categorize projection.
+        abstract_chars: Truncate abstracts to this many characters (0 = no limit).
+        jobs: If > 1, split the batch into shards and run this many agent sessions
+              concurrently (dry-run only).
+        mirror: If True, serve reads from the sidecar metadata mirror (synced first).
+        cluster: If True, group the batch by topic locally and have the agent decide
+                 once per cluster (dry-run only).
+        candidates: If > 0, include this many likely collection paths (from the
+                    nearest already-filed papers) with each item's details.
+        fast_path: If set, file items whose local classification confidence is at
+                   least this threshold without the agent (dry-run only).
+        cache: If True, reuse earlier decisions for unchanged papers under the same
+               model, prompt and collection tree, and remember new ones (dry-run only).
+        run_id: ID for this dry run's checkpoint (generated if not given).
+        resume: If True, continue the dry run `run_id` with the items it hasn't
+                processed yet.
+        keys: If set, categorize exactly these items instead of listing the
+              newest unfiled ones (dry-run only; a resumed run keeps its batch).
     """
     if output_dir is None:
         output_dir = Path.cwd()
+    if jobs > 1 and not dry_run:
+        raise ValueError("--jobs only supports dry-run categorization")
+    if cluster and not dry_run:
+        raise ValueError("--cluster only supports dry-run categorization")
+    if fast_path is not None and not dry_run:
+        raise ValueError("--fast-path only supports dry-run categorization")
+    if keys is not None and not dry_run:
+        raise ValueError("Categorizing given keys only supports dry-run categorization")
+    decisions = DecisionCache(get_decision_cache_path(), model, PROMPT_VERSION) if cache and dry_run else None
+    # Read connections shared by the server's tools for the whole run
+    pool = ReadPool(use_mirror=mirror)
+    # Listing tools never return more than batch_size items
+    settings = ToolSettings(
+        batch_size=batch_size,
+        encoding=encoding,
+        measure_encoding=measure_encoding,
+        fields=FIELD_PROJECTIONS["full" if all_fields else "categorize"],
+        abstract_chars=abstract_chars or None,
+        candidates=candidates,
+    )
+
     # Create in-process MCP server with our tools
     server = create_sdk_mcp_server(
         name="zotero-tools",
@@ -33,13 +114,18 @@ async def categorize_unfiled(dry_run: bool = True, batch_size: int = None, outpu
         allowed_tools = [
             "mcp__zotero__list_unfiled_items",
             "mcp__zotero__get_item_details",
+            "mcp__zotero__get_items_details",
+            "mcp__zotero__search_items",
             "mcp__zotero__list_collections",
+            "mcp__zotero__record_suggestion",
         ]
     else:
         # Apply mode: enable all tools including write operations
         allowed_tools = [
             "mcp__zotero__list_unfiled_items",
             "mcp__zotero__get_item_details",
+            "mcp__zotero__get_items_details",
+            "mcp__zotero__search_items",
             "mcp__zotero__list_collections",
             "mcp__zotero__create_collection",
             "mcp__zotero__add_to_collection",
@@ -55,10 +141,34 @@ async def categorize_unfiled(dry_run: bool = True, batch_size: int = None, outpu
         max_turns=50,  # Allow multiple rounds of exploration
     )
     
-    # Build the prompt
+    if dry_run:
+        # Dry-run: a checkpointed run over an explicit batch of keys, decisions
+        # appended to the run's suggestions.jsonl as they are recorded
+        if resume:
+            checkpoint = RunCheckpoint.load(output_dir, run_id)
+        else:
+            checkpoint = RunCheckpoint.create(output_dir, run_id or new_run_id(), "categorize", {
+                "batch_size": batch_size, "model": model, "jobs": jobs, "cluster": cluster, "cache": cache,
+            })
+        print(f"Run ID: {checkpoint.run_id}\n")
+        log = SuggestionLog(checkpoint.dir / "suggestions.jsonl", resume=resume)
+
+        async with pool, settings, log:
+            if cluster:
+                await categorize_clustered(options, checkpoint, batch_size, output_dir, jobs, fast_path, decisions, keys)
+            else:
+                await categorize_sharded(
+                    options, checkpoint, batch_size, output_dir, jobs,
+                    fast_path=fast_path,
+                    cache=decisions,
+                    keys=keys,
+                )
+        return
+
+    # Apply mode: a single session that lists, decides and writes as it goes
     batch_instruction = ""
     if batch_size:
-        batch_instruction = f"\n\nIMPORTANT: Only process the first {batch_size} items. Skip the rest.\n"
+        batch_instruction = f"\n\nIMPORTANT: Only process the first {batch_size} items. Listing tools return at most {batch_size} items; do not request further pages.\n"
 
     prompt = f"""
 Categorize unfiled papers in the library.{batch_instruction}
@@ -66,8 +176,8 @@ Categorize unfiled papers in the library.{batch_instruction}
 Process:
 1. List unfiled items
 2. Check existing collection structure
-3. For each unfiled item (up to {batch_size if batch_size else 'all'} items):
-   - Get full details (especially abstract)
+3. Get full details (especially abstract) for all items you will process in one get_items_details call
+4. For each unfiled item (up to {batch_size if batch_size else 'all'} items):
    - Analyze content and decide on categorization
    - Determine appropriate collection hierarchy (max 3 levels)
    - Determine appropriate tags (2-5 tags)
@@ -75,78 +185,366 @@ Process:
    - Apply categorization (create collections if needed, add item, add tags)
 
 Show me your reasoning for each categorization decision.
-"""
-    
-    if dry_run:
-        prompt += """
-
-DRY RUN MODE: Only analyze and suggest categorizations. Do NOT create collections or modify items.
-
-IMPORTANT: At the end, output a JSON block with ALL suggestions in this exact format:
-```json
-{
-  "items": [
-    {
-      "item_key": "ABCD1234",
-      "title": "Paper Title",
-      "collection_path": "Field/Subfield/Topic",
-      "tags": ["tag1", "tag2"],
-      "reasoning": "Brief explanation"
-    }
-  ]
-}
-```
-
-For each paper:
-- Determine collection path (max 3 levels, e.g. "Computer Science/AI/NLP")
-- Choose 2-5 relevant tags
-- Explain reasoning
-Then output the final JSON block with ALL items.
-"""
-    else:
-        prompt += """
 
 APPLY MODE: Actually create the collections and categorize the items.
 Create collections as needed (parents first), then add items and tags.
 """
 
-    # Run the agent
+    # Apply mode: one backup and one transaction for the whole run
+    async with pool, settings, WriteSession():
+        async for _ in stream_agent(options, prompt):
+            pass
+
+
+def save_suggestions(suggestions: dict, output_dir: Path) -> Path:
+    """Write validated suggestions to suggestions.json in output_dir."""
+    output_file = output_dir / "suggestions.json"
+    with open(output_file, 'w') as f:
+        json.dump(suggestions, f, indent=2)
+
+    print(f"\n\n✓ Saved {len(suggestions.get('items', []))} suggestions to {output_file}")
+    print(f"   Run: research-clerk --apply-suggestions {output_file}")
+    return output_file
+
+
+def plan_batch(backend, checkpoint: RunCheckpoint, batch_size: Optional[int], keys: Optional[List[str]] = None) -> List[str]:
+    """
+    Keys this run still has to decide.
+
+    A new run snapshots its batch into its checkpoint: the given keys, or
+    else the newest batch_size unfiled items. A resumed run keeps its
+    original batch and skips items already recorded in its log.
+    """
+    log = suggestion_log()
+    if checkpoint.keys is None:
+        if keys is None:
+            keys = [item["key"] for item in backend.list_unfiled_items(limit=batch_size)]
+        checkpoint.plan(list(keys))
+        log.plan(checkpoint.keys)
+        return checkpoint.keys
+
+    log.plan(checkpoint.keys)
+    checkpoint.mark_processed(item["item_key"] for item in log.items_for(checkpoint.keys))
+    remaining = checkpoint.remaining()
+    print(f"Resuming {checkpoint}; {len(remaining)} left\n")
+    return remaining
+
+
+def finish_run(checkpoint: RunCheckpoint, known_paths: List[str], output_dir: Path):
+    """Save everything the run has decided so far and say how to resume if items are left."""
+    decided = suggestion_log().items_for(checkpoint.keys or [])
+    if decided:
+        save_suggestions(merge_suggestions([{"items": decided}], known_paths), output_dir)
+    left = len(checkpoint.remaining())
+    if left:
+        print(f"\n⚠️  {left} item(s) still undecided. Continue with: research-clerk --resume {checkpoint.run_id}")
+
+
+def split_cached(backend, cache: Optional[DecisionCache], keys: List[str], known_paths: List[str]) -> Tuple[List[dict], List[str]]:
+    """Answer what the decision cache can; returns (cached suggestions, keys still to decide)."""
+    if cache is None or not keys:
+        return [], keys
+    cached, remaining = cache.lookup(backend, keys, known_paths)
+    if cached:
+        print(f"Decision cache: {len(cached)} of {len(keys)} items decided in an earlier run\n")
+    return cached, remaining
+
+
+def record_without_agent(suggestions: List[dict], label: str) -> List[dict]:
+    """Record decisions the agent didn't make itself; returns the ones that passed validation."""
+    log = suggestion_log()
+    for error in log.record_all(suggestions):
+        print(f"   ⚠️  {label} decision not recorded: {error}")
+    return log.items_for(item["item_key"] for item in suggestions)
+
+
+def split_fast_path(backend, keys: List[str], threshold: Optional[float]) -> Tuple[List[dict], List[str], float]:
+    """Classify keys locally when the fast path is on; returns (local suggestions, agent keys, seconds)."""
+    if threshold is None or not keys:
+        return [], keys, 0.0
+    local, remaining, elapsed = run_fast_path(backend, tool_settings().neighbor_index(backend), keys, threshold)
+    print(f"Fast path: {len(local)} of {len(keys)} items classified locally in {elapsed:.2f}s\n")
+    return local, remaining, elapsed
+
+
+def report_fast_path(local: int, agent_items: int, agent_seconds: float, local_seconds: float):
+    """Print the share of the batch served locally and the agent time it saved."""
+    total = local + agent_items
+    if not total or not local:
+        return
+    line = f"\n⚡ Fast path served {local} of {total} items locally ({local / total:.0%}) in {local_seconds:.2f}s"
+    if agent_items:
+        per_item = agent_seconds / agent_items
+        saved = local * per_item - local_seconds
+        line += f"; at {per_item:.2f}s per agent item that saved ~{saved:.0f}s"
+    print(line)
+
+
+async def stream_agent(options: ClaudeAgentOptions, prompt: str, label: Optional[str] = None):
+    """Run one agent session, printing its messages and yielding its text blocks as they arrive."""
     async with ClaudeSDKClient(options=options) as client:
         await client.query(prompt)
 
-        # Collect responses
-        all_text = []
         async for msg in client.receive_response():
-            print(msg)
+            print(f"[{label}] {msg}" if label else msg)
             if isinstance(msg, AssistantMessage):
                 for block in msg.content:
                     if isinstance(block, TextBlock):
-                        all_text.append(block.text)
-
-        # If dry-run, extract and save JSON
-        if dry_run:
-            full_text = '\n'.join(all_text)
-
-            # Extract JSON from markdown code block
-            suggestions = extract_json_from_markdown(full_text)
-
-            if suggestions:
-                # Validate schema before saving
-                errors = validate_suggestions(suggestions)
-                if errors:
-                    print("\n\n✗ Agent output failed validation:")
-                    for error in errors:
-                        print(f"   - {error}")
-                    print("\n   Suggestions NOT saved. Agent may need to retry.")
-                    return
-
-                # Save to file
-                output_file = output_dir / "suggestions.json"
-                with open(output_file, 'w') as f:
-                    json.dump(suggestions, f, indent=2)
-
-                print(f"\n\n✓ Saved {len(suggestions.get('items', []))} suggestions to {output_file}")
-                print(f"   Run: research-clerk --apply-suggestions {output_file}")
-            else:
-                print("\n\n⚠️  No JSON block found in agent output or failed to parse")
-                print("   Agent may not have finished or formatted output incorrectly")
+                        yield block.text
+
+
+async def run_shard(options: ClaudeAgentOptions, prompt: str, label: str, keys: List[str]) -> List[dict]:
+    """Run one agent session and return the suggestions it recorded for its keys."""
+    async for _ in stream_agent(options, prompt, label):
+        pass
+
+    recorded = suggestion_log().items_for(keys)
+    if len(recorded) < len(keys):
+        print(f"\n⚠️  [{label}] Recorded suggestions for {len(recorded)} of {len(keys)} items")
+    return recorded
+
+
+async def run_shards(
+    options: ClaudeAgentOptions,
+    checkpoint: RunCheckpoint,
+    shards: List[List[str]],
+    prompts: List[str],
+    shard_tools: List[str],
+    jobs: int
+) -> Tuple[List[List[dict]], float]:
+    """
+    Run one agent session per shard, at most `jobs` at a time.
+
+    Each session gets its own MCP server and may only record decisions for
+    its own keys. Each finished shard is checkpointed.
+
+    Returns:
+        (suggestions recorded per shard, seconds spent)
+    """
+    results: List[List[dict]] = [[] for _ in shards]
+    limiter = anyio.CapacityLimiter(jobs)
+
+    async def worker(index: int, shard_keys: List[str]):
+        shard_options = replace(
+            options,
+            mcp_servers={"zotero": create_sdk_mcp_server(name="zotero-tools", version="0.1.0", tools=ALL_TOOLS)},
+            allowed_tools=shard_tools,
+        )
+        async with limiter:
+            with suggestion_log().scope(shard_keys):
+                results[index] = await run_shard(shard_options, prompts[index], f"shard {index + 1}", shard_keys)
+            checkpoint.mark_processed(item["item_key"] for item in results[index])
+
+    started = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for index, shard_keys in enumerate(shards):
+            tg.start_soon(worker, index, shard_keys)
+    elapsed = time.perf_counter() - started
+
+    failed = sum(1 for recorded in results if not recorded)
+    if failed:
+        print(f"\n⚠️  {failed} of {len(shards)} shard(s) recorded no suggestions")
+    return results, elapsed
+
+
+async def categorize_sharded(
+    options: ClaudeAgentOptions,
+    checkpoint: RunCheckpoint,
+    batch_size: Optional[int],
+    output_dir: Path,
+    jobs: int,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    fast_path: Optional[float] = None,
+    cache: Optional[DecisionCache] = None,
+    keys: Optional[List[str]] = None
+):
+    """
+    Categorize the unfiled batch as concurrent shards and merge the results.
+
+    Every shard gets the same snapshot of the collection tree in its prompt,
+    so parallel sessions start from identical structure. Paths that shards
+    invent independently are normalized on merge so they converge. Items
+    answered by the decision cache or (with fast_path set) classified
+    confidently on the local fast path never reach a shard. With jobs=1 the
+    shards run one after another, so no session has to hold more than
+    shard_size items. Each finished shard is checkpointed, so a resumed run
+    only redoes what was never recorded.
+    """
+    # snapshot the work and the taxonomy once for all shards
+    with read_backend("categorize_sharded") as backend:
+        tree = backend.get_collection_tree()
+        known_paths = sorted(tree.path_index)
+        keys = plan_batch(backend, checkpoint, batch_size, keys)
+        cached, keys = split_cached(backend, cache, keys, known_paths)
+        local, keys, local_seconds = split_fast_path(backend, keys, fast_path)
+    checkpoint.mark_processed(item["item_key"] for item in record_without_agent(cached + local, "Cached or local"))
+
+    if not checkpoint.keys:
+        print("No unfiled items to categorize")
+        return
+
+    snapshot = "\n".join(known_paths) if known_paths else "(no collections yet)"
+    shards = [keys[i:i + shard_size] for i in range(0, len(keys), shard_size)]
+    if shards:
+        print(f"Categorizing {len(keys)} items in {len(shards)} shard(s), {jobs} at a time\n")
+
+    prompts = [f"""
+Categorize exactly these {len(shard_keys)} unfiled papers (shard {index + 1} of {len(shards)}):
+{", ".join(shard_keys)}
+
+Existing collections (a snapshot shared by all parallel workers; reuse these paths wherever they fit):
+{snapshot}
+
+Process:
+1. Get details for all the listed items with one get_items_details call
+2. For each item decide a collection path (max 3 levels) and 2-5 tags, and explain your reasoning
+
+DRY RUN MODE: Do NOT create collections or modify items.
+
+""" + RECORD_SUGGESTIONS for index, shard_keys in enumerate(shards)]
+    # shards only need item details and search; the taxonomy comes from the snapshot
+    shard_tools = [
+        "mcp__zotero__get_items_details",
+        "mcp__zotero__get_item_details",
+        "mcp__zotero__search_items",
+        "mcp__zotero__record_suggestion",
+    ]
+    results, agent_seconds = await run_shards(options, checkpoint, shards, prompts, shard_tools, jobs)
+
+    decided = [item for recorded in results for item in recorded]
+    report_fast_path(len(local), len(keys), agent_seconds, local_seconds)
+    if cache:
+        cache.store(decided)
+    finish_run(checkpoint, known_paths, output_dir)
+
+
+def cluster_candidates(index, members: List[dict], top: int) -> List[dict]:
+    """Likely collection paths for a whole cluster: member candidate scores averaged."""
+    totals = {}
+    for item in members:
+        for candidate in index.candidates(item, top):
+            totals[candidate["path"]] = totals.get(candidate["path"], 0.0) + candidate["score"]
+    ranked = sorted(totals.items(), key=lambda kv: -kv[1])[:top]
+    return [{"path": path, "score": round(score / len(members), 2)} for path, score in ranked]
+
+
+def format_clusters(clusters: List[List[dict]], candidates: Optional[List[List[dict]]] = None) -> str:
+    """Render clusters for the prompt: every member's key and title, abstracts for the most central few."""
+    lines = []
+    for number, members in enumerate(clusters, 1):
+        lines.append(f"\nCluster {number} ({len(members)} paper{'s' if len(members) != 1 else ''}):")
+        if candidates and candidates[number - 1]:
+            likely = ", ".join(f"{c['path']} ({c['score']})" for c in candidates[number - 1])
+            lines.append(f"  Similar filed papers are in: {likely}")
+        for rank, item in enumerate(members):
+            lines.append(f"  {item['key']}  {item.get('title') or 'Untitled'}")
+            abstract = item.get("abstractNote")
+            if abstract and rank < CLUSTER_SAMPLE_ABSTRACTS:
+                if len(abstract) > CLUSTER_SAMPLE_CHARS:
+                    abstract = abstract[:CLUSTER_SAMPLE_CHARS] + "…"
+                lines.append(f"      {abstract}")
+    return "\n".join(lines)
+
+
+def pack_clusters(clusters: List[List[dict]], shard_size: int = CLUSTER_SHARD_SIZE) -> List[List[int]]:
+    """Group whole clusters (by index) into shards of about shard_size items."""
+    shards: List[List[int]] = []
+    size = 0
+    for index, members in enumerate(clusters):
+        if not shards or size + len(members) > shard_size:
+            shards.append([])
+            size = 0
+        shards[-1].append(index)
+        size += len(members)
+    return shards
+
+
+async def categorize_clustered(
+    options: ClaudeAgentOptions,
+    checkpoint: RunCheckpoint,
+    batch_size: Optional[int],
+    output_dir: Path,
+    jobs: int = 1,
+    fast_path: Optional[float] = None,
+    cache: Optional[DecisionCache] = None,
+    keys: Optional[List[str]] = None
+):
+    """
+    Cluster the unfiled batch by topic locally, then decide once per cluster.
+
+    Titles and abstracts are vectorized with hashed TF-IDF and grouped
+    before any model call. Whole clusters are packed into shards of about
+    CLUSTER_SHARD_SIZE items, one agent session each (jobs at a time). The
+    agent sees its clusters (every title, plus abstracts for the most
+    central papers) and records one decision per cluster with
+    record_cluster_suggestion, and papers that don't fit with
+    record_suggestion, so every decision is streamed to the run's log and a
+    resumed run re-clusters only what was never recorded. Items answered
+    by the decision cache or (with fast_path set) classified confidently on
+    the local fast path are left out of the clusters.
+    """
+    settings = tool_settings()
+    with read_backend("categorize_clustered") as backend:
+        tree = backend.get_collection_tree()
+        known_paths = sorted(tree.path_index)
+        keys = plan_batch(backend, checkpoint, batch_size, keys)
+        cached, keys = split_cached(backend, cache, keys, known_paths)
+        local, keys, local_seconds = split_fast_path(backend, keys, fast_path)
+        details = backend.get_items_details(keys, ["title", "abstractNote"])
+        index = settings.neighbor_index(backend) if settings.candidates and details else None
+    checkpoint.mark_processed(item["item_key"] for item in record_without_agent(cached + local, "Cached or local"))
+
+    if not details:
+        if checkpoint.keys:
+            finish_run(checkpoint, known_paths, output_dir)
+        else:
+            print("No unfiled items to categorize")
+        return
+
+    clusters = cluster_items(details)
+    candidates = [cluster_candidates(index, members, settings.candidates) for members in clusters] if index else None
+    singletons = sum(1 for members in clusters if len(members) == 1)
+    shards = pack_clusters(clusters)
+    print(
+        f"Grouped {len(details)} items into {len(clusters)} cluster(s) "
+        f"(largest {len(clusters[0])}, {singletons} singleton(s)), "
+        f"decided in {len(shards)} shard(s), {jobs} at a time\n"
+    )
+
+    snapshot = "\n".join(known_paths) if known_paths else "(no collections yet)"
+    shard_keys, prompts = [], []
+    for number, shard in enumerate(shards, 1):
+        shard_clusters = [clusters[i] for i in shard]
+        shard_candidates = [candidates[i] for i in shard] if candidates else None
+        shard_keys.append([item["key"] for members in shard_clusters for item in members])
+        prompts.append(f"""
+Categorize these {len(shard_keys[-1])} unfiled papers (shard {number} of {len(shards)}). They have been grouped into {len(shard_clusters)} clusters of similar papers.
+{format_clusters(shard_clusters, shard_candidates)}
+
+Existing collections (a snapshot shared by all parallel workers; reuse these paths wherever they fit):
+{snapshot}
+
+Process:
+1. Go through the clusters one at a time
+2. Decide one collection path (max 3 levels) and 2-5 tags for the cluster as a whole
+3. If a paper clearly doesn't fit its cluster's decision, decide it on its own
+4. Use get_items_details or search_items only when titles and the sample abstracts aren't enough
+
+DRY RUN MODE: Do NOT create collections or modify items.
+
+""" + RECORD_CLUSTER_SUGGESTIONS)
+    cluster_tools = [
+        "mcp__zotero__get_items_details",
+        "mcp__zotero__get_item_details",
+        "mcp__zotero__search_items",
+        "mcp__zotero__record_cluster_suggestion",
+        "mcp__zotero__record_suggestion",
+    ]
+    results, agent_seconds = await run_shards(options, checkpoint, shard_keys, prompts, cluster_tools, jobs)
+
+    decided = [item for recorded in results for item in recorded]
+    print(f"\n{len(decided)} of {len(details)} clustered items decided")
+    report_fast_path(len(local), len(details), agent_seconds, local_seconds)
+    if cache:
+        cache.store(decided)
+    finish_run(checkpoint, known_paths, output_dir)
@@ -8,6 +8,12 @@ from .categorizer import categorize_unfiled
 from .apply_suggestions import apply_suggestions
 from .reorganizer import reorganize_collections
 from .apply_reorganization import apply_reorganization
+from .undo import undo_run
+from .watcher import watch, DEFAULT_POLL_INTERVAL
+from .encoding import ENCODINGS
+from .config import DEFAULT_ABSTRACT_CHARS
+from .fastpath import DEFAULT_FAST_PATH_THRESHOLD
+from .runs import RunCheckpoint, new_run_id, run_dir
 
 
 def get_default_output_dir() -> Path:
@@ -25,6 +31,16 @@ def normalize_model_name(model: str) -> str:
     return model
 
 
+# checkpoint option -> (argparse dest, flag); --resume restores these from the run
+RESUMED_OPTIONS = {
+    "model": ("model", "--model"),
+    "batch_size": ("batch_size", "--batch-size"),
+    "jobs": ("jobs", "--jobs"),
+    "cluster": ("cluster", "--cluster"),
+    "cache": ("no_cache", "--no-cache"),
+}
+
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -45,8 +61,14 @@ Examples:
   # Apply saved reorganization
   research-clerk --apply-reorganization reorganization.json
 
+  # Undo an apply (its run ID is printed when it commits)
+  research-clerk --undo 20250101-120000-1a2b
+
   # Use custom output directory
   research-clerk --output-dir ./my-suggestions --batch-size 5
+
+  # Auto-categorize new papers as they are added
+  research-clerk --watch
         """
     )
 
@@ -56,7 +78,7 @@ Examples:
         "--apply-suggestions",
         metavar="FILE",
         type=Path,
-        help="Apply saved suggestions from FILE"
+        help="Apply saved suggestions from FILE (suggestions.json, or the suggestions.jsonl streamed during a run)"
     )
     mode_group.add_argument(
         "--apply-reorganization",
@@ -64,11 +86,21 @@ Examples:
         type=Path,
         help="Apply saved reorganization from FILE"
     )
+    mode_group.add_argument(
+        "--undo",
+        metavar="RUN_ID",
+        help="Revert the changes an apply run made, using its operation journal"
+    )
     mode_group.add_argument(
         "--reorganize",
         action="store_true",
         help="Reorganize existing collection structure (dry-run mode)"
     )
+    mode_group.add_argument(
+        "--watch",
+        action="store_true",
+        help="Run continuously, categorizing and applying new unfiled papers as they are added"
+    )
 
     # Options
     parser.add_argument(
@@ -77,6 +109,51 @@ Examples:
         metavar="N",
         help="Process only first N items (useful for incremental runs)"
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        metavar="N",
+        default=1,
+        help="Categorize in shards with N concurrent agent sessions (default: 1)"
+    )
+    parser.add_argument(
+        "--cluster",
+        action="store_true",
+        help="Group unfiled papers by topic locally and decide one collection per group (needs numpy)"
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        metavar="K",
+        default=0,
+        help="Show the agent the top K collections where the most similar filed papers live (needs numpy)"
+    )
+    parser.add_argument(
+        "--fast-path",
+        type=float,
+        nargs="?",
+        const=DEFAULT_FAST_PATH_THRESHOLD,
+        metavar="THRESHOLD",
+        help="File papers locally, without the agent, when similar filed papers, venue and authors agree "
+             f"with at least THRESHOLD confidence (default: {DEFAULT_FAST_PATH_THRESHOLD}; needs numpy)"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue an interrupted dry run (categorize or reorganize) with the items it hasn't processed yet"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ask the agent about every paper instead of reusing decisions from earlier runs"
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        metavar="SECONDS",
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"--watch polling interval where inotify is unavailable (default: {DEFAULT_POLL_INTERVAL})"
+    )
     parser.add_argument(
         "--output-dir",
         type=Path,
@@ -90,8 +167,75 @@ Examples:
         choices=["claude-haiku-4-5", "claude-sonnet-4-5", "haiku", "sonnet"],
         help="Claude model to use (default: claude-haiku-4-5)"
     )
+    parser.add_argument(
+        "--tool-encoding",
+        default="compact",
+        choices=ENCODINGS,
+        help="How tool results are sent to the model: pretty json, minified compact json, "
+             "or table (columnar rows, collections as an indented tree) (default: compact)"
+    )
+    parser.add_argument(
+        "--measure-encoding",
+        action="store_true",
+        help="Report bytes and estimated tokens saved per tool versus pretty JSON"
+    )
+    parser.add_argument(
+        "--all-fields",
+        action="store_true",
+        help="Send every Zotero field to the model instead of title/abstract/venue/date"
+    )
+    parser.add_argument(
+        "--abstract-chars",
+        type=int,
+        metavar="N",
+        default=DEFAULT_ABSTRACT_CHARS,
+        help=f"Truncate abstracts to N characters, 0 for no limit (default: {DEFAULT_ABSTRACT_CHARS})"
+    )
+    parser.add_argument(
+        "--mirror",
+        action="store_true",
+        help="Serve reads from a local sidecar copy of the library metadata, synced incrementally at startup"
+    )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    # Parse again with a marker default to see which resumable options were given explicitly
+    unset = object()
+    parser.set_defaults(**{dest: unset for dest, _ in RESUMED_OPTIONS.values()})
+    explicit = parser.parse_args()
+    args.explicit_options = {dest for dest, _ in RESUMED_OPTIONS.values() if getattr(explicit, dest) is not unset}
+    return args
+
+
+def restore_run_options(args, checkpoint: RunCheckpoint):
+    """
+    Carry a resumed run's options over from its checkpoint.
+
+    Options not given on the command line take the value the run started
+    with, so the rest of the batch is decided the same way as the part
+    already done.
+
+    Raises:
+        ValueError: If an option was given explicitly with a different value
+    """
+    for option, saved in checkpoint.options.items():
+        if option not in RESUMED_OPTIONS:
+            continue
+        dest, flag = RESUMED_OPTIONS[option]
+        value = not saved if option == "cache" else saved
+        if dest in args.explicit_options:
+            given = getattr(args, dest)
+            if option == "model":
+                given, value = normalize_model_name(given), normalize_model_name(value)
+            if given != value:
+                if isinstance(value, bool) or value is None:
+                    started = f"{'with' if value else 'without'} {flag}"
+                else:
+                    started = f"with {flag} {value}"
+                raise ValueError(
+                    f"Run {checkpoint.run_id} was started {started}; "
+                    f"resume it without {flag} or with the same value"
+                )
+        setattr(args, dest, value)
 
 
 async def async_main():
@@ -129,18 +273,62 @@ async def async_main():
             sys.exit(1)
         return
 
+    if args.undo:
+        print("UNDO MODE")
+        print(f"   Reverting run: {args.undo}\n")
+        try:
+            undo_run(args.undo)
+        except KeyboardInterrupt:
+            print("\n\nCancelled by user")
+            sys.exit(1)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"\n\nError: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+        return
+
     # Ensure output directory exists
     args.output_dir.mkdir(parents=True, exist_ok=True)
 
     # Normalize model name
     model = normalize_model_name(args.model)
 
+    if args.watch:
+        print("WATCH MODE")
+        print("   Will categorize and apply new unfiled papers as they are added")
+        print(f"   Using model: {model}")
+        print(f"   Log: {args.output_dir / 'watch.log'}\n")
+        try:
+            await watch(args.output_dir, model=model, poll_interval=args.interval)
+        except KeyboardInterrupt:
+            print("\n\nStopped watching")
+        return
+
+    # Every dry run is checkpointed under its run ID; a resumed run keeps its mode
+    run_id = args.resume or new_run_id()
+    if args.resume:
+        try:
+            checkpoint = RunCheckpoint.load(args.output_dir, args.resume)
+            restore_run_options(args, checkpoint)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"RESUMING RUN {checkpoint.run_id} ({checkpoint.mode})\n")
+        args.reorganize = checkpoint.mode == "reorganize"
+        model = normalize_model_name(args.model)
+    resume_hint = f"Continue with: research-clerk --resume {run_id}"
+
     # Reorganize mode vs categorize mode
     if args.reorganize:
         # Reorganization mode (always dry-run)
         print("REORGANIZE DRY RUN MODE")
         print("   Will analyze existing collections and suggest reorganizations")
         print(f"   Suggestions will be saved to {args.output_dir / 'reorganization.json'}")
+        print(f"   Moves are streamed to {run_dir(args.output_dir, run_id) / 'reorganization.jsonl'} as they are made")
         print(f"   Using model: {model}")
         if args.batch_size:
             print(f"   Processing first {args.batch_size} items")
@@ -151,10 +339,18 @@ async def async_main():
                 dry_run=True,
                 batch_size=args.batch_size,
                 output_dir=args.output_dir,
-                model=model
+                model=model,
+                encoding=args.tool_encoding,
+                measure_encoding=args.measure_encoding,
+                all_fields=args.all_fields,
+                abstract_chars=args.abstract_chars,
+                mirror=args.mirror,
+                candidates=args.candidates,
+                run_id=run_id,
+                resume=bool(args.resume)
             )
         except KeyboardInterrupt:
-            print("\n\nCancelled by user")
+            print(f"\n\nCancelled by user. {resume_hint}")
             sys.exit(1)
         except Exception as e:
             print(f"\n\nError: {e}")
@@ -166,9 +362,16 @@ async def async_main():
         print("DRY RUN MODE")
         print("   Will analyze and suggest categorizations")
         print(f"   Suggestions will be saved to {args.output_dir / 'suggestions.json'}")
+        print(f"   Decisions are streamed to {run_dir(args.output_dir, run_id) / 'suggestions.jsonl'} as they are made")
         print(f"   Using model: {model}")
         if args.batch_size:
             print(f"   Processing first {args.batch_size} items")
+        if args.jobs > 1:
+            print(f"   Running {args.jobs} agent sessions in parallel")
+        if args.cluster:
+            print("   Deciding once per cluster of similar papers")
+        if args.fast_path is not None:
+            print(f"   Filing papers locally at confidence >= {args.fast_path}")
         print(f"   Run with: research-clerk --apply-suggestions {args.output_dir / 'suggestions.json'}\n")
 
         try:
@@ -176,10 +379,22 @@ async def async_main():
                 dry_run=True,
                 batch_size=args.batch_size,
                 output_dir=args.output_dir,
-                model=model
+                model=model,
+                encoding=args.tool_encoding,
+                measure_encoding=args.measure_encoding,
+                all_fields=args.all_fields,
+                abstract_chars=args.abstract_chars,
+                jobs=args.jobs,
+                mirror=args.mirror,
+                cluster=args.cluster,
+                candidates=args.candidates,
+                fast_path=args.fast_path,
+                cache=not args.no_cache,
+                run_id=run_id,
+                resume=bool(args.resume)
             )
         except KeyboardInterrupt:
-            print("\n\nCancelled by user")
+            print(f"\n\nCancelled by user. {resume_hint}")
             sys.exit(1)
         except Exception as e:
             print(f"\n\nError: {e}")
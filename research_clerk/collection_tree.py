@@ -0,0 +1,172 @@
+"""Indexed collection hierarchy shared by the backend, tools and apply paths."""
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+
+class CollectionTree:
+    """
+    Collection hierarchy indexed by id, key and path, built in one pass.
+
+    Nodes are the same dicts `list_collections` has always returned
+    (collectionID, name, parentCollectionID, key). Paths are computed on
+    first use and memoized, so resolving every path is O(n) overall.
+
+    A write backend keeps its tree current in place (add, rename, reparent,
+    remove) instead of rebuilding it after each change: adding a collection
+    costs O(depth), renaming or moving one O(size of its subtree).
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, str, Optional[int], str]]):
+        """
+        Args:
+            rows: (collectionID, collectionName, parentCollectionID, key) tuples
+        """
+        self.by_key: Dict[str, Dict[str, Any]] = {}
+        self.by_id: Dict[int, Dict[str, Any]] = {}
+        self.children: Dict[Optional[int], List[str]] = {}
+        self._paths: Dict[str, str] = {}
+        self._path_index: Optional[Dict[str, str]] = None
+
+        for coll_id, name, parent_id, key in rows:
+            node = {
+                "collectionID": coll_id,
+                "name": name,
+                "parentCollectionID": parent_id,
+                "key": key
+            }
+            self.by_key[key] = node
+            self.by_id[coll_id] = node
+            self.children.setdefault(parent_id, []).append(key)
+
+    def __len__(self) -> int:
+        return len(self.by_key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.by_key
+
+    def path(self, key: str) -> str:
+        """Full slash-separated path for a collection key ("" if unknown)."""
+        if key in self._paths:
+            return self._paths[key]
+
+        node = self.by_key.get(key)
+        if not node:
+            return ""
+
+        # a parent that was deleted (or is otherwise missing) makes this a root
+        parent = self.by_id.get(node["parentCollectionID"])
+        parent_path = self.path(parent["key"]) if parent else ""
+        path = f"{parent_path}/{node['name']}" if parent_path else node["name"]
+
+        self._paths[key] = path
+        return path
+
+    @property
+    def path_index(self) -> Dict[str, str]:
+        """Map of full path -> collection key (first collection wins on duplicates)."""
+        if self._path_index is None:
+            index = {}
+            for key in self.by_key:
+                index.setdefault(self.path(key), key)
+            self._path_index = index
+        return self._path_index
+
+    def key_for_path(self, path: str) -> Optional[str]:
+        """Collection key for a full path, or None if no such collection."""
+        return self.path_index.get(path)
+
+    def add(self, coll_id: int, name: str, parent_id: Optional[int], key: str):
+        """Index a newly created collection."""
+        node = {"collectionID": coll_id, "name": name, "parentCollectionID": parent_id, "key": key}
+        self.by_key[key] = node
+        self.by_id[coll_id] = node
+        self.children.setdefault(parent_id, []).append(key)
+        if self._path_index is not None:
+            self._path_index.setdefault(self.path(key), key)
+
+    def _unindex_subtree(self, key: str) -> List[str]:
+        """Drop the memoized paths of a collection's subtree before it changes; returns the subtree."""
+        keys = self.subtree(key)
+        for k in keys:
+            path = self._paths.pop(k, None)
+            if self._path_index is not None and path is not None and self._path_index.get(path) == k:
+                del self._path_index[path]
+        return keys
+
+    def _reindex(self, keys: List[str]):
+        if self._path_index is not None:
+            for k in keys:
+                self._path_index.setdefault(self.path(k), k)
+
+    def rename(self, key: str, name: str):
+        """Rename a collection, re-pathing everything under it."""
+        keys = self._unindex_subtree(key)
+        self.by_key[key]["name"] = name
+        self._reindex(keys)
+
+    def reparent(self, key: str, parent_id: Optional[int]):
+        """Move a collection (None = top level), re-pathing everything under it."""
+        keys = self._unindex_subtree(key)
+        node = self.by_key[key]
+        self.children[node["parentCollectionID"]].remove(key)
+        node["parentCollectionID"] = parent_id
+        self.children.setdefault(parent_id, []).append(key)
+        self._reindex(keys)
+
+    def remove(self, key: str):
+        """Drop a collection that has no children left (e.g. trashed after a merge)."""
+        self._unindex_subtree(key)
+        node = self.by_key.pop(key)
+        del self.by_id[node["collectionID"]]
+        self.children[node["parentCollectionID"]].remove(key)
+        self.children.pop(node["collectionID"], None)
+
+    def depth(self, key: str) -> int:
+        """Levels from the top down to this collection (a top-level collection is 1)."""
+        return self.path(key).count("/") + 1 if key in self.by_key else 0
+
+    def subtree(self, key: str) -> List[str]:
+        """Keys of a collection and everything nested under it."""
+        keys, stack = [], [key]
+        while stack:
+            current = stack.pop()
+            keys.append(current)
+            stack.extend(self.children.get(self.by_key[current]["collectionID"], []))
+        return keys
+
+    def height(self, key: str) -> int:
+        """Levels in a collection's subtree, counting itself (a leaf is 1)."""
+        top = self.depth(key)
+        return max(self.depth(k) for k in self.subtree(key)) - top + 1
+
+    def child_named(self, parent_key: Optional[str], name: str) -> Optional[str]:
+        """Key of the collection called `name` directly under a parent (None = top level)."""
+        parent_id = self.by_key[parent_key]["collectionID"] if parent_key else None
+        for key in self.children.get(parent_id, []):
+            if self.by_key[key]["name"] == name:
+                return key
+        return None
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Key-indexed dict with a 'path' on each node (the list_collections format)."""
+        return {key: {**node, "path": self.path(key)} for key, node in self.by_key.items()}
+
+    def render(self) -> str:
+        """
+        Indented path tree, one "Name [KEY]" line per collection.
+
+        Much smaller than the key-indexed dict for large libraries: each
+        name and key appears once and paths are implied by indentation.
+        """
+        lines: List[str] = []
+
+        def walk(key: str, depth: int):
+            node = self.by_key[key]
+            lines.append(f"{'  ' * depth}{node['name']} [{key}]")
+            for child_key in self.children.get(node["collectionID"], []):
+                walk(child_key, depth + 1)
+
+        # roots are top-level collections plus any whose parent is missing
+        for key, node in self.by_key.items():
+            if node["parentCollectionID"] not in self.by_id:
+                walk(key, 0)
+        return "\n".join(lines)
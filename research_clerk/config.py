@@ -4,6 +4,23 @@ from pathlib import Path
 from .backends.local_sqlite import LocalSQLiteBackend
 
 
+# fields sent to the agent per mode (None = every field); creators and tags are always included
+FIELD_PROJECTIONS = {
+    "categorize": [
+        "title", "abstractNote", "publicationTitle", "proceedingsTitle",
+        "conferenceName", "bookTitle", "university", "date",
+    ],
+    "reorganize": [
+        "title", "abstractNote", "publicationTitle", "proceedingsTitle",
+        "conferenceName", "bookTitle",
+    ],
+    "full": None,
+}
+
+# abstracts longer than this are truncated before they reach the prompt
+DEFAULT_ABSTRACT_CHARS = 1500
+
+
 def find_zotero_database() -> Path:
     """Auto-detect zotero database location."""
     # common locations
@@ -29,6 +46,22 @@ def find_zotero_database() -> Path:
     )
 
 
+def get_cache_dir() -> Path:
+    """Directory for research-clerk's derived data (RESEARCH_CLERK_CACHE_DIR overrides)."""
+    cache_dir = os.getenv("RESEARCH_CLERK_CACHE_DIR")
+    return Path(cache_dir) if cache_dir else Path.home() / ".cache" / "research-clerk"
+
+
+def get_mirror_path() -> Path:
+    """Location of the sidecar metadata mirror."""
+    return get_cache_dir() / "mirror.sqlite"
+
+
+def get_decision_cache_path() -> Path:
+    """Location of the per-paper decision cache."""
+    return get_cache_dir() / "decisions.sqlite"
+
+
 def get_zotero_backend(read_only: bool = False) -> LocalSQLiteBackend:
     """
     Get zotero backend (local sqlite).
@@ -0,0 +1,157 @@
+"""Persistent cache of per-paper categorization decisions, keyed by content."""
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Set, Tuple
+from .backends.mirror import VENUE_FIELDS
+
+
+# least recently used decisions beyond this many are evicted
+DEFAULT_MAX_ENTRIES = 50000
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    hash TEXT PRIMARY KEY,
+    decision TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decisions_last_used ON decisions(last_used);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Casefolded words only, so whitespace, punctuation and markup changes don't miss the cache."""
+    return " ".join(re.findall(r"\w+", text.casefold()))
+
+
+def existing_prefix(path: str, existing: Set[str]) -> str:
+    """Longest leading part of a collection path that is in `existing` (casefolded paths), or ""."""
+    parts = path.split("/")
+    for end in range(len(parts), 0, -1):
+        prefix = "/".join(parts[:end])
+        if prefix.casefold() in existing:
+            return prefix
+    return ""
+
+
+class DecisionCache:
+    """
+    Remembers what the agent decided for a paper so re-runs don't ask again.
+
+    A decision (collection path, tags, reasoning) is stored under a hash of
+    the paper's normalized title, abstract and venue together with the
+    model and the prompt version, so a new prompt or another model misses
+    rather than serving stale decisions. The collection tree is not part
+    of the key: adding collections leaves earlier decisions valid. Most
+    decisions propose a path that doesn't exist yet, so each one also
+    records the part of its path that did exist when it was made, and a
+    hit is only served while that part still exists: a decision under a
+    collection that was since renamed or removed goes back to the agent,
+    while one proposing new subcollections keeps hitting. Since the item
+    key is not part of the hash either, a re-imported duplicate hits.
+
+    Entries live in a small sqlite file; each lookup refreshes last_used,
+    and stores evict the least recently used entries beyond max_entries.
+    """
+
+    def __init__(self, path: Path, model: str, prompt_version: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.model = model
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        # item key -> content hash from the last lookup, used when storing
+        self.hashes: Dict[str, str] = {}
+        # casefolded collection paths at the last lookup, used when storing
+        self.known: Set[str] = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(CACHE_SCHEMA)
+        return conn
+
+    def content_hash(self, item: Dict[str, Any]) -> str:
+        """Cache key for an item's details."""
+        venue = next((item[f] for f in VENUE_FIELDS if item.get(f)), "")
+        parts = [
+            normalize_text(item.get("title") or ""),
+            normalize_text(item.get("abstractNote") or ""),
+            normalize_text(venue),
+            self.model,
+            self.prompt_version,
+        ]
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def lookup(self, backend, keys: List[str], known_paths: Iterable[str]) -> Tuple[List[dict], List[str]]:
+        """
+        Split a batch into cached decisions and keys that still need the agent.
+
+        Args:
+            backend: Read backend for the items' title, abstract and venue
+            keys: Item keys in the batch
+            known_paths: Paths of the current collection tree; cached
+                decisions whose existing part of the path is no longer in
+                it count as misses
+
+        Returns:
+            (suggestions from the cache, keys of misses)
+        """
+        if not keys:
+            return [], keys
+        self.known = {path.casefold() for path in known_paths}
+        items = backend.get_items_details(keys, ["title", "abstractNote"] + VENUE_FIELDS)
+        self.hashes = {item["key"]: self.content_hash(item) for item in items}
+        titles = {item["key"]: item.get("title", "") for item in items}
+
+        found: Dict[str, dict] = {}
+        with self._connect() as conn:
+            digests = list(set(self.hashes.values()))
+            for start in range(0, len(digests), 500):
+                chunk = digests[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT hash, decision FROM decisions WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update((digest, json.loads(decision)) for digest, decision in rows)
+            conn.executemany(
+                "UPDATE decisions SET last_used = ? WHERE hash = ?",
+                [(time.time(), digest) for digest in found]
+            )
+        conn.close()
+
+        hits, misses = [], []
+        for key in keys:
+            decision = dict(found.get(self.hashes.get(key)) or {})
+            # entries stored before existing_prefix was recorded needed their whole path
+            prefix = decision.pop("existing_prefix", decision.get("collection_path"))
+            if decision and (not prefix or prefix.casefold() in self.known):
+                hits.append({"item_key": key, "title": titles[key], **decision})
+            else:
+                misses.append(key)
+        return hits, misses
+
+    def store(self, suggestions: List[dict]):
+        """Remember validated agent suggestions for items seen by the last lookup."""
+        now = time.time()
+        rows = [
+            (self.hashes[s["item_key"]], json.dumps({
+                "collection_path": s["collection_path"],
+                "existing_prefix": existing_prefix(s["collection_path"], self.known),
+                "tags": s.get("tags", []),
+                "reasoning": s.get("reasoning", ""),
+            }), now, now)
+            for s in suggestions if s["item_key"] in self.hashes
+        ]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?)", rows)
+            conn.execute(
+                "DELETE FROM decisions WHERE hash IN "
+                "(SELECT hash FROM decisions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        conn.close()
@@ -0,0 +1,86 @@
+"""Token-efficient encodings for MCP tool responses."""
+import json
+from typing import Any, Dict, List
+
+# json:    pretty-printed JSON (indent=2), the original format
+# compact: minified JSON
+# table:   minified JSON with lists of records as {"columns": [...], "rows": [[...]]}
+#          and collections rendered as an indented path tree
+ENCODINGS = ("json", "compact", "table")
+
+# rough chars-per-token for english/JSON text, good enough for relative savings
+CHARS_PER_TOKEN = 4
+
+
+def to_columns(value: Any) -> Any:
+    """
+    Recursively turn lists of dicts into a header row plus value rows.
+
+    Columns are the union of keys in first-seen order; missing values are null.
+    """
+    if isinstance(value, dict):
+        return {k: to_columns(v) for k, v in value.items()}
+
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        columns: List[str] = []
+        for record in value:
+            for key in record:
+                if key not in columns:
+                    columns.append(key)
+        rows = [[to_columns(record.get(col)) for col in columns] for record in value]
+        return {"columns": columns, "rows": rows}
+
+    if isinstance(value, list):
+        return [to_columns(v) for v in value]
+
+    return value
+
+
+def encode_payload(data: Any, encoding: str = "json") -> str:
+    """
+    Serialize a tool result in the requested encoding.
+
+    Args:
+        data: JSON-serializable tool result
+        encoding: One of ENCODINGS
+
+    Returns:
+        Text for the tool response
+    """
+    if encoding == "json":
+        return json.dumps(data, indent=2)
+    if encoding == "compact":
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    if encoding == "table":
+        return json.dumps(to_columns(data), separators=(",", ":"), ensure_ascii=False)
+    raise ValueError(f"Unknown tool encoding: {encoding} (expected one of {', '.join(ENCODINGS)})")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class EncodingStats:
+    """Per-tool bytes and estimated tokens, chosen encoding vs pretty JSON."""
+
+    def __init__(self):
+        self.tools: Dict[str, Dict[str, int]] = {}
+
+    def record(self, tool: str, baseline: str, encoded: str):
+        """Record one tool response in both its baseline and chosen encoding."""
+        stats = self.tools.setdefault(tool, {"calls": 0, "baseline_bytes": 0, "encoded_bytes": 0})
+        stats["calls"] += 1
+        stats["baseline_bytes"] += len(baseline.encode())
+        stats["encoded_bytes"] += len(encoded.encode())
+
+    def report(self) -> str:
+        """Table of savings per tool."""
+        lines = [f"{'tool':<24} {'calls':>5} {'json bytes':>11} {'sent bytes':>11} {'~tokens saved':>14}"]
+        for tool, stats in sorted(self.tools.items()):
+            saved = (stats["baseline_bytes"] - stats["encoded_bytes"]) // CHARS_PER_TOKEN
+            lines.append(
+                f"{tool:<24} {stats['calls']:>5} {stats['baseline_bytes']:>11} "
+                f"{stats['encoded_bytes']:>11} {saved:>14}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,160 @@
+"""Confidence-gated local classifier that files obvious papers without the model."""
+import time
+from collections import Counter
+from typing import Optional, List, Dict, Any, Tuple
+from .backends.mirror import VENUE_FIELDS
+from .neighbors import NeighborIndex, DEFAULT_NEIGHBORS, BUILD_CHUNK_SIZE
+from .similarity import item_text
+
+
+# items at or above this confidence skip the agent
+DEFAULT_FAST_PATH_THRESHOLD = 0.8
+# a venue or author needs this many filed papers before it counts as a signal
+MIN_SUPPORT = 3
+# a neighbor this similar is treated as a near-duplicate of the paper
+NEAR_DUPLICATE = 0.9
+# tags carried over must appear on at least this many neighbors in the chosen collection
+MIN_TAG_VOTES = 2
+# the agent is asked for 2-5 tags; a local decision with fewer goes to the agent instead
+MIN_TAGS = 2
+
+# fields the classifier needs from get_items_details
+CLASSIFIER_FIELDS = ["title", "abstractNote"] + VENUE_FIELDS
+
+
+def venue_of(item: Dict[str, Any]) -> Optional[str]:
+    """First venue-like field, casefolded for matching."""
+    venue = next((item[f] for f in VENUE_FIELDS if item.get(f)), None)
+    return venue.casefold().strip() if venue else None
+
+
+def authors_of(item: Dict[str, Any]) -> List[str]:
+    """Creator names without the role suffix get_items_details adds for editors etc."""
+    return [name.split(" (")[0].casefold() for name in item.get("creators", [])]
+
+
+def join_evidence(parts: List[str]) -> str:
+    """"a", "a and b", "a, b and c"."""
+    return parts[0] if len(parts) == 1 else f"{', '.join(parts[:-1])} and {parts[-1]}"
+
+
+class LocalClassifier:
+    """
+    Files a paper where its nearest filed neighbors, its venue and its authors agree.
+
+    Trained on demand from the filed items: the text neighbors come from the
+    (cached) NeighborIndex, and venue/author -> collection counts are read
+    with one get_items_details pass. A paper's confidence for its best
+    text candidate is the mean of the signals that have enough support
+    (text vote share, venue share, author share). With only the text
+    signal it is discounted, and a near-duplicate raises it to that
+    neighbor's similarity.
+    """
+
+    def __init__(self, index: NeighborIndex, backend):
+        self.index = index
+        self.venues: Dict[str, Counter] = {}
+        self.authors: Dict[str, Counter] = {}
+        self.tags: Dict[str, List[str]] = {}
+
+        paths_by_key = dict(zip(index.keys, index.paths))
+        keys = list(paths_by_key)
+        for start in range(0, len(keys), BUILD_CHUNK_SIZE):
+            for item in backend.get_items_details(keys[start:start + BUILD_CHUNK_SIZE], CLASSIFIER_FIELDS):
+                paths = paths_by_key[item["key"]]
+                self.tags[item["key"]] = item.get("tags", [])
+                venue = venue_of(item)
+                if venue:
+                    self.venues.setdefault(venue, Counter()).update(paths)
+                for author in set(authors_of(item)):
+                    self.authors.setdefault(author, Counter()).update(paths)
+
+    @staticmethod
+    def _share(counts: Counter, path: str) -> Optional[float]:
+        total = sum(counts.values())
+        return counts[path] / total if total >= MIN_SUPPORT else None
+
+    def classify(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Best local guess for an item.
+
+        Returns:
+            A suggestion dict (suggestions.json schema) plus "confidence",
+            or None if no filed paper is similar at all
+        """
+        neighbors = self.index.neighbors(item_text(item), DEFAULT_NEIGHBORS, exclude=item.get("key"))
+        if not neighbors:
+            return None
+
+        votes: Dict[str, float] = {}
+        supporters: Dict[str, List[int]] = {}
+        for row, similarity in neighbors:
+            for path in self.index.paths[row]:
+                votes[path] = votes.get(path, 0.0) + similarity
+                supporters.setdefault(path, []).append(row)
+        path = max(votes, key=votes.get)
+        text_share = votes[path] / sum(votes.values())
+        signals = [text_share]
+        evidence = [f"{len(supporters[path])} of {len(neighbors)} similar filed papers"]
+
+        venue = venue_of(item)
+        venue_share = self._share(self.venues.get(venue, Counter()), path) if venue else None
+        if venue_share is not None:
+            signals.append(venue_share)
+            evidence.append(f"{self.venues[venue][path]} from the same venue")
+
+        author_counts = Counter()
+        for author in set(authors_of(item)):
+            author_counts.update(self.authors.get(author, Counter()))
+        author_share = self._share(author_counts, path)
+        if author_share is not None:
+            signals.append(author_share)
+            evidence.append(f"{author_counts[path]} by the same authors")
+
+        confidence = sum(signals) / len(signals) if len(signals) > 1 else text_share * 0.8
+        top_row, top_similarity = neighbors[0]
+        if top_similarity >= NEAR_DUPLICATE and self.index.paths[top_row] == [path]:
+            confidence = max(confidence, top_similarity)
+            evidence.append("a near-duplicate")
+
+        tag_votes = Counter(tag for row in supporters[path] for tag in self.tags.get(self.index.keys[row], []))
+        tags = [tag for tag, votes_ in tag_votes.most_common(5) if votes_ >= MIN_TAG_VOTES]
+
+        return {
+            "item_key": item["key"],
+            "title": item.get("title", ""),
+            "collection_path": path,
+            "tags": tags,
+            "reasoning": f"Local fast path (confidence {confidence:.2f}): "
+                         f"{join_evidence(evidence)} are in this collection",
+            "confidence": round(confidence, 3),
+        }
+
+
+def run_fast_path(backend, index: NeighborIndex, keys: List[str], threshold: float) -> Tuple[List[dict], List[str], float]:
+    """
+    Classify a batch locally and split it by confidence.
+
+    Args:
+        backend: Read backend
+        index: Neighbor index over filed items
+        keys: Item keys to classify
+        threshold: Minimum confidence to accept a local decision
+
+    Returns:
+        (accepted suggestions, keys left for the agent, seconds spent).
+        Accepted suggestions have at least MIN_TAGS tags; their confidence
+        is only kept in the reasoning text.
+    """
+    start = time.perf_counter()
+    classifier = LocalClassifier(index, backend)
+    accepted = []
+    for item in backend.get_items_details(keys, CLASSIFIER_FIELDS):
+        suggestion = classifier.classify(item)
+        if suggestion and suggestion["confidence"] >= threshold and len(suggestion["tags"]) >= MIN_TAGS:
+            del suggestion["confidence"]
+            accepted.append(suggestion)
+    # everything not accepted goes to the agent, including keys the backend had no details for
+    done = {suggestion["item_key"] for suggestion in accepted}
+    remaining = [key for key in keys if key not in done]
+    return accepted, remaining, time.perf_counter() - start
@@ -0,0 +1,109 @@
+"""Append-only journal of the rows an apply wrote, so it can be undone without a restore."""
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Sequence
+from .backups import BACKUP_DIR
+
+
+JOURNAL_DIR = "journal"
+
+# columns journaled per table; enough to delete an inserted row or re-insert a removed one
+JOURNAL_COLUMNS = {
+    "collections": ("collectionID", "key"),
+    "collectionItems": ("collectionID", "itemID", "orderIndex"),
+    "tags": ("tagID", "name"),
+    "itemTags": ("itemID", "tagID", "type"),
+    "deletedCollections": ("collectionID",),
+}
+# collection columns reorganizations update; journaled as (collectionID, old value, new value)
+UPDATABLE_COLUMNS = ("parentCollectionID", "collectionName")
+
+
+def journal_dir(db_path: Path) -> Path:
+    """Journals live with the backups, next to the database they describe."""
+    return Path(db_path).parent / BACKUP_DIR / JOURNAL_DIR
+
+
+def journal_path(db_path: Path, run_id: str) -> Path:
+    return journal_dir(db_path) / f"{run_id}.jsonl"
+
+
+class OperationJournal:
+    """
+    Every row one write connection inserted or removed, in order.
+
+    Each write appends one line: {"op": "insert"|"delete", "table", "rows"},
+    with rows as lists in JOURNAL_COLUMNS order, or {"op": "update",
+    "table", "column", "rows"} with (collectionID, old, new) rows. The file is created on the
+    first write, so connections that change nothing leave no journal. Once
+    the transaction commits a {"op": "commit"} line is appended; a journal
+    without one describes a transaction that was rolled back (or never
+    finished) and can't be undone. Undoing appends {"op": "undone"}.
+    """
+
+    def __init__(self, db_path: Path, run_id: str):
+        self.run_id = run_id
+        self.path = journal_path(db_path, run_id)
+        self.operations = 0
+        self._file = None
+
+    def _append(self, entry: Dict[str, Any]):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a")
+        self._file.write(json.dumps(entry) + "\n")
+
+    def record(self, op: str, table: str, rows: Sequence[Sequence[Any]], column: Optional[str] = None):
+        """Journal rows inserted into (op="insert"), deleted from (op="delete") or updated in (op="update") a table."""
+        if not rows:
+            return
+        entry = {"op": op, "table": table, "rows": [list(row) for row in rows]}
+        if column:
+            entry["column"] = column
+        self._append(entry)
+        self.operations += len(rows)
+
+    def commit(self):
+        """Mark the journaled writes as committed and report how to undo them."""
+        if self._file is None:
+            return
+        self._append({"op": "commit", "at": datetime.now().isoformat(timespec="seconds")})
+        self.close()
+        print(f"✓ Journaled {self.operations} row change(s). Undo with: research-clerk --undo {self.run_id}")
+
+    def rollback(self):
+        if self._file is not None:
+            self._append({"op": "rollback"})
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_journal(db_path: Path, run_id: str) -> List[Dict[str, Any]]:
+    """
+    A committed journal's write entries, oldest first.
+
+    Raises:
+        ValueError: If there is no journal for the run, it never committed,
+            or it has already been undone
+    """
+    path = journal_path(db_path, run_id)
+    if not path.exists():
+        raise ValueError(f"No journal for run {run_id} in {journal_dir(db_path)}")
+    entries = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+    ops = {entry["op"] for entry in entries}
+    if "undone" in ops:
+        raise ValueError(f"Run {run_id} has already been undone")
+    if "commit" not in ops:
+        raise ValueError(f"Run {run_id} never committed; there is nothing to undo")
+    return [entry for entry in entries if entry["op"] in ("insert", "delete", "update")]
+
+
+def mark_undone(db_path: Path, run_id: str):
+    """Append the marker that stops a journal from being undone twice."""
+    with open(journal_path(db_path, run_id), "a") as f:
+        f.write(json.dumps({"op": "undone", "at": datetime.now().isoformat(timespec="seconds")}) + "\n")
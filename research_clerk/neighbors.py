@@ -0,0 +1,163 @@
+"""Nearest-neighbor collection candidates from papers that are already filed."""
+import json
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+from .similarity import DEFAULT_FEATURES, hashed_terms, sparse_tfidf, item_text, require_numpy
+
+
+# neighbors considered per query, and candidate paths reported from them
+DEFAULT_NEIGHBORS = 20
+DEFAULT_CANDIDATES = 5
+
+# filed items decoded per get_items_details call while building
+BUILD_CHUNK_SIZE = 5000
+
+CACHE_ARRAYS = ("indices", "data", "row_ids", "idf")
+
+
+class NeighborIndex:
+    """
+    Hashed TF-IDF vectors for every filed item, kept as one sparse matrix.
+
+    Rows are stored in coordinate form (row_ids, indices, data) so memory
+    grows with the number of terms, not items x features. A query costs one
+    pass over the nonzeros. Each row remembers the item key and the
+    collection paths it is filed under, so neighbors vote for paths.
+
+    The arrays are cached as .npy files next to an index.json holding the
+    library fingerprint they were built from; a different fingerprint means
+    the library changed and the index is rebuilt.
+    """
+
+    def __init__(self, keys: List[str], paths: List[List[str]], indices, data, row_ids, idf,
+                 n_features: int = DEFAULT_FEATURES):
+        self.keys = keys
+        self.paths = paths
+        self.indices = indices
+        self.data = data
+        self.row_ids = row_ids
+        self.idf = idf
+        self.n_features = n_features
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, backend, n_features: int = DEFAULT_FEATURES) -> "NeighborIndex":
+        """Vectorize every filed item through a read backend (zotero or the mirror)."""
+        memberships = dict(backend.iter_item_collections())
+        keys = list(memberships)
+
+        rows, kept = [], []
+        for start in range(0, len(keys), BUILD_CHUNK_SIZE):
+            chunk = keys[start:start + BUILD_CHUNK_SIZE]
+            for item in backend.get_items_details(chunk, ["title", "abstractNote"]):
+                cols, cnts = hashed_terms(item_text(item), n_features)
+                if len(cols):
+                    rows.append((cols, cnts))
+                    kept.append(item["key"])
+
+        vectors, idf = sparse_tfidf(rows, n_features)
+        return cls(
+            kept, [memberships[key] for key in kept],
+            vectors.indices, vectors.data, vectors.row_ids, idf, n_features
+        )
+
+    @classmethod
+    def load(cls, cache_dir: Path, fingerprint: str) -> Optional["NeighborIndex"]:
+        """Load a cached index, or None if missing or built from a different library state."""
+        np = require_numpy()
+        meta_file = cache_dir / "index.json"
+        if not meta_file.exists():
+            return None
+        meta = json.loads(meta_file.read_text())
+        if meta.get("fingerprint") != fingerprint:
+            return None
+        try:
+            arrays = {name: np.load(cache_dir / f"{name}.npy") for name in CACHE_ARRAYS}
+        except (OSError, ValueError):
+            return None
+        return cls(meta["keys"], meta["paths"], n_features=meta["n_features"], **arrays)
+
+    def save(self, cache_dir: Path, fingerprint: str):
+        """Write the arrays, then the metadata (so a partial write never matches)."""
+        np = require_numpy()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        (cache_dir / "index.json").unlink(missing_ok=True)
+        for name in CACHE_ARRAYS:
+            np.save(cache_dir / f"{name}.npy", getattr(self, name))
+        meta = {"fingerprint": fingerprint, "n_features": self.n_features, "keys": self.keys, "paths": self.paths}
+        (cache_dir / "index.json").write_text(json.dumps(meta, ensure_ascii=False))
+
+    @classmethod
+    def load_or_build(cls, backend, cache_dir: Path) -> "NeighborIndex":
+        """Use the cached index if the library hasn't changed since it was built."""
+        fingerprint = backend.library_fingerprint()
+        index = cls.load(cache_dir, fingerprint)
+        if index is None:
+            index = cls.build(backend)
+            index.save(cache_dir, fingerprint)
+            print(f"✓ Built neighbor index over {len(index)} filed items")
+        return index
+
+    def query_vector(self, text: str):
+        """Dense TF-IDF query vector using the filed corpus's idf."""
+        np = require_numpy()
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        cols, counts = hashed_terms(text, self.n_features)
+        if len(cols):
+            weights = np.log1p(counts) * self.idf[cols]
+            vector[cols] = weights / max(float(np.linalg.norm(weights)), 1e-12)
+        return vector
+
+    def neighbors(self, text: str, k: int = DEFAULT_NEIGHBORS, exclude: Optional[str] = None):
+        """
+        Most similar filed items to a text.
+
+        Returns:
+            List of (row, cosine similarity), best first, similarity > 0 only
+        """
+        np = require_numpy()
+        if not len(self):
+            return []
+        vector = self.query_vector(text)
+        scores = np.bincount(self.row_ids, weights=self.data * vector[self.indices], minlength=len(self))
+        fetch = min(k + 1, len(self))  # one spare in case the item itself is filed
+        top = np.argpartition(-scores, fetch - 1)[:fetch]
+        ranked = sorted(top, key=lambda row: -scores[row])
+        return [
+            (int(row), float(scores[row])) for row in ranked
+            if scores[row] > 0 and self.keys[row] != exclude
+        ][:k]
+
+    def candidates(
+        self,
+        item: Dict[str, Any],
+        top: int = DEFAULT_CANDIDATES,
+        k: int = DEFAULT_NEIGHBORS
+    ) -> List[Dict[str, Any]]:
+        """
+        Collection paths the item's nearest filed neighbors live in.
+
+        Each neighbor votes for its paths with its similarity; scores are the
+        share of the total vote, so they add up to about 1 across paths.
+
+        Args:
+            item: Item details (title and abstractNote are used)
+            top: Max paths to return
+            k: Neighbors to consider
+
+        Returns:
+            [{"path", "score", "neighbors"}] best first
+        """
+        votes: Dict[str, List[float]] = {}
+        for row, similarity in self.neighbors(item_text(item), k, exclude=item.get("key")):
+            for path in self.paths[row]:
+                votes.setdefault(path, []).append(similarity)
+
+        total = sum(sum(v) for v in votes.values()) or 1.0
+        ranked = sorted(votes.items(), key=lambda kv: -sum(kv[1]))[:top]
+        return [
+            {"path": path, "score": round(sum(sims) / total, 2), "neighbors": len(sims)}
+            for path, sims in ranked
+        ]
@@ -18,6 +18,7 @@ analyze in this order:
 - only create subcategories if you have 3+ papers that fit
 - if only 1-2 papers, use broader category
 - ALWAYS check existing collections FIRST - prefer reusing over creating new ones
+- item details may include "candidates": collections where the most similar filed papers live, with scores. start from these and only look further if none fits
 - parents MUST exist before creating children (create top-down)
 
 ## TAGGING RULES
@@ -47,13 +48,15 @@ analyze in this order:
 ## WORKFLOW
 1. list unfiled items
 2. check existing collection structure
-3. for each unfiled item:
-   - get full details (especially abstract)
+3. get full details (especially abstract) for the whole batch with one get_items_details call
+4. for each unfiled item:
+   - if the right collection isn't obvious, search_items with its title (filed_only) to see where similar papers live
    - analyze and decide on collection + tags
    - create collections if needed (check parent exists first)
    - add item to collection
    - add tags
    - explain your reasoning
+   - in dry runs, record the decision right away with record_suggestion instead of writing
 
 think step by step. be methodical. be consistent.
 """
@@ -1,13 +1,39 @@
 """Agent logic for reorganizing Zotero collection structure."""
 import json
+from dataclasses import replace
 from pathlib import Path
-from claude_agent_sdk import create_sdk_mcp_server, ClaudeSDKClient, ClaudeAgentOptions, AssistantMessage, TextBlock
+from typing import Optional
+from claude_agent_sdk import create_sdk_mcp_server, ClaudeAgentOptions
 from .tools import REORGANIZE_TOOLS
+from .session import ReadPool, ToolSettings, WriteSession, SuggestionLog, read_backend, suggestion_log
+from .config import FIELD_PROJECTIONS, DEFAULT_ABSTRACT_CHARS
 from .prompts import CATEGORIZER_PROMPT
-from .utils import extract_json_from_markdown, validate_reorganization
+from .categorizer import stream_agent
+from .runs import RunCheckpoint, new_run_id
 
 
-async def reorganize_collections(dry_run: bool = True, batch_size: int = None, output_dir: Path = None, model: str = "claude-haiku-4-5"):
+# filed items reviewed per agent session in a dry-run reorganization
+DEFAULT_CHUNK_SIZE = 100
+
+REORGANIZATION_RULES = """REORGANIZATION RULES:
+- Create subcategories when you see 3+ related papers in a parent category
+- Move papers to more specific subcategories when appropriate
+- Consolidate overly fragmented structure
+- Max 3 levels deep (Field/Subfield/Topic)
+- When a whole collection should move, be renamed or be folded into another, change the collection
+  itself (reparent, rename, merge) instead of moving its papers one by one
+"""
+
+RECORD_MOVES = """IMPORTANT: Record each proposed move with the record_move tool as soon as you have decided it
+(item_key, title, current_path, new_path, reasoning), one call per move.
+Do not wait until the end and do not output a JSON block: only recorded moves are kept.
+Papers that are fine where they are need no call. If the tool reports an error, fix the move and record it again.
+Record a change to a whole collection with ONE record_collection_op call (op reparent/rename/merge, path,
+and new_parent/new_name/into) instead of a move per paper. All paths are the collections' paths as they are now.
+"""
+
+
+async def reorganize_collections(dry_run: bool = True, batch_size: int = None, output_dir: Path = None, model: str = "claude-haiku-4-5", encoding: str = "compact", measure_encoding: bool = False, all_fields: bool = False, abstract_chars: int = DEFAULT_ABSTRACT_CHARS, mirror: bool = False, candidates: int = 0, run_id: Optional[str] = None, resume: bool = False):
     """
     Analyze existing collection structure and suggest reorganizations.
 
@@ -17,9 +43,31 @@ async def reorganize_collections(dry_run: bool = True, batch_size: int = None, o
         batch_size: If set, only process first N items. Useful for incremental runs.
         output_dir: Directory to save suggestion files. Defaults to current directory.
         model: Claude model to use (e.g., "claude-haiku-4-5" or "claude-sonnet-4-5").
+        encoding: Tool response encoding ("json", "compact" or "table").
+        measure_encoding: If True, report bytes/tokens saved per tool at the end.
+        all_fields: If True, send every Zotero field instead of the reorganize projection.
+        abstract_chars: Truncate abstracts to this many characters (0 = no limit).
+        mirror: If True, serve reads from the sidecar metadata mirror (synced first).
+        candidates: If > 0, include this many likely collection paths (from the
+                    nearest already-filed papers) with each item's details.
+        run_id: ID for this dry run's checkpoint (generated if not given).
+        resume: If True, continue the dry run `run_id` with the items it hasn't
+                reviewed yet.
     """
     if output_dir is None:
         output_dir = Path.cwd()
+    # Read connections shared by the server's tools for the whole run
+    pool = ReadPool(use_mirror=mirror)
+    # Listing tools never return more than batch_size items
+    settings = ToolSettings(
+        batch_size=batch_size,
+        encoding=encoding,
+        measure_encoding=measure_encoding,
+        fields=FIELD_PROJECTIONS["full" if all_fields else "reorganize"],
+        abstract_chars=abstract_chars or None,
+        candidates=candidates,
+    )
+
     # Create in-process MCP server with reorganization tools
     server = create_sdk_mcp_server(
         name="zotero-tools",
@@ -33,19 +81,30 @@ async def reorganize_collections(dry_run: bool = True, batch_size: int = None, o
         allowed_tools = [
             "mcp__zotero__list_filed_items",
             "mcp__zotero__get_item_details",
+            "mcp__zotero__get_items_details",
+            "mcp__zotero__search_items",
             "mcp__zotero__get_item_collections",
+            "mcp__zotero__get_items_collections",
             "mcp__zotero__list_collections",
+            "mcp__zotero__record_move",
+            "mcp__zotero__record_collection_op",
         ]
     else:
         # Apply mode: enable all tools including writes
         allowed_tools = [
             "mcp__zotero__list_filed_items",
             "mcp__zotero__get_item_details",
+            "mcp__zotero__get_items_details",
+            "mcp__zotero__search_items",
             "mcp__zotero__get_item_collections",
+            "mcp__zotero__get_items_collections",
             "mcp__zotero__list_collections",
             "mcp__zotero__create_collection",
             "mcp__zotero__add_to_collection",
             "mcp__zotero__remove_from_collection",
+            "mcp__zotero__reparent_collection",
+            "mcp__zotero__rename_collection",
+            "mcp__zotero__merge_collections",
         ]
 
     # Configure agent options
@@ -57,10 +116,26 @@ async def reorganize_collections(dry_run: bool = True, batch_size: int = None, o
         max_turns=50,  # Allow multiple rounds of exploration
     )
 
-    # Build the prompt
+    if dry_run:
+        # Dry-run: the filed items are reviewed in checkpointed chunks, one agent
+        # session each, with moves appended to the run's reorganization.jsonl
+        if resume:
+            checkpoint = RunCheckpoint.load(output_dir, run_id)
+        else:
+            checkpoint = RunCheckpoint.create(output_dir, run_id or new_run_id(), "reorganize", {
+                "batch_size": batch_size, "model": model,
+            })
+        print(f"Run ID: {checkpoint.run_id}\n")
+        log = SuggestionLog(checkpoint.dir / "reorganization.jsonl", kind="moves", resume=resume)
+
+        async with pool, settings, log:
+            await reorganize_chunked(options, checkpoint, batch_size, output_dir)
+        return
+
+    # Apply mode: a single session that moves items as it goes
     batch_instruction = ""
     if batch_size:
-        batch_instruction = f"\n\nIMPORTANT: Only process the first {batch_size} items. Skip the rest.\n"
+        batch_instruction = f"\n\nIMPORTANT: Only process the first {batch_size} items. Listing tools return at most {batch_size} items; do not request further pages.\n"
 
     prompt = f"""
 Analyze the existing Zotero collection structure and suggest reorganizations.{batch_instruction}
@@ -68,95 +143,138 @@ Analyze the existing Zotero collection structure and suggest reorganizations.{ba
 Process:
 1. List filed items (items already in collections)
 2. Check existing collection structure
-3. For each filed item (up to {batch_size if batch_size else 'all'} items):
-   - Get full details (especially abstract)
-   - Get current collection path(s)
+3. Get full details (especially abstract) for all items you will process in one get_items_details call
+4. Get current collection paths for the same items in one get_items_collections call
+5. For each filed item (up to {batch_size if batch_size else 'all'} items):
    - Analyze if it should be moved to a better location
    - Determine if new subcategories should be created based on clustering
    - Explain your reasoning
 
-REORGANIZATION RULES:
-- Create subcategories when you see 3+ related papers in a parent category
-- Move papers to more specific subcategories when appropriate
-- Consolidate overly fragmented structure
-- Max 3 levels deep (Field/Subfield/Topic)
-
+""" + REORGANIZATION_RULES + """
 Show me your reasoning for each reorganization decision.
-"""
-
-    if dry_run:
-        prompt += """
-
-DRY RUN MODE: Only analyze and suggest reorganizations. Do NOT move items or create collections.
-
-IMPORTANT: At the end, output a JSON block with ALL suggestions in this exact format:
-```json
-{
-  "moves": [
-    {
-      "item_key": "ABCD1234",
-      "title": "Paper Title",
-      "current_path": "Computer Science/AI",
-      "new_path": "Computer Science/AI/Machine Learning",
-      "reasoning": "Create ML subcategory - found 5 ML papers in AI"
-    }
-  ]
-}
-```
-
-For each paper that should be moved:
-- Specify current collection path
-- Specify proposed new collection path (max 3 levels)
-- Explain reasoning
-Then output the final JSON block with ALL moves.
-"""
-    else:
-        prompt += """
 
 APPLY MODE: Actually move items and create the new collection structure.
 Process moves by:
-1. Creating new collections (parents first)
-2. Adding items to new collections
-3. Removing items from old collections
+1. Reparenting, renaming or merging whole collections where that covers the change
+2. Creating new collections (parents first)
+3. Adding items to new collections
+4. Removing items from old collections
 """
 
-    # Run the agent
-    async with ClaudeSDKClient(options=options) as client:
-        await client.query(prompt)
-
-        # Collect responses
-        all_text = []
-        async for msg in client.receive_response():
-            print(msg)
-            if isinstance(msg, AssistantMessage):
-                for block in msg.content:
-                    if isinstance(block, TextBlock):
-                        all_text.append(block.text)
-
-        # If dry-run, extract and save JSON
-        if dry_run:
-            full_text = '\n'.join(all_text)
-
-            # Extract JSON from markdown code block
-            suggestions = extract_json_from_markdown(full_text)
-
-            if suggestions:
-                # Validate schema before saving
-                errors = validate_reorganization(suggestions)
-                if errors:
-                    print("\n\n✗ Agent output failed validation:")
-                    for error in errors:
-                        print(f"   - {error}")
-                    print("\n   Suggestions NOT saved. Agent may need to retry.")
-                    return
-
-                # Save to file
-                output_file = output_dir / "reorganization.json"
-                with open(output_file, 'w') as f:
-                    json.dump(suggestions, f, indent=2)
-
-                print(f"\n\n✓ Saved {len(suggestions.get('moves', []))} reorganization suggestions to {output_file}")
-                print(f"   Run: research-clerk --apply-reorganization {output_file}")
-            else:
-                print("\n\n⚠️  No JSON block found in agent output or failed to parse")
-                print("   Agent may not have finished or formatted output incorrectly")
+    # Apply mode: one backup and one transaction for the whole run
+    async with pool, settings, WriteSession():
+        async for _ in stream_agent(options, prompt):
+            pass
+
+
+def save_reorganization(reorganization: dict, output_dir: Path) -> Path:
+    """Write validated moves and collection operations to reorganization.json in output_dir."""
+    output_file = output_dir / "reorganization.json"
+    with open(output_file, 'w') as f:
+        json.dump(reorganization, f, indent=2)
+
+    print(
+        f"\n\n✓ Saved {len(reorganization.get('moves', []))} reorganization suggestions and "
+        f"{len(reorganization.get('collection_ops', []))} collection operations to {output_file}"
+    )
+    print(f"   Run: research-clerk --apply-reorganization {output_file}")
+    return output_file
+
+
+def describe_collection_op(op: dict) -> str:
+    """One-line summary of a collection operation for the chunk prompts."""
+    if op["op"] == "reparent":
+        return f"reparent {op['path']} -> under {op['new_parent'] or '(top level)'}"
+    if op["op"] == "rename":
+        return f"rename {op['path']} -> {op['new_name']}"
+    return f"merge {op['path']} -> into {op['into']}"
+
+
+async def reorganize_chunked(
+    options: ClaudeAgentOptions,
+    checkpoint: RunCheckpoint,
+    batch_size: Optional[int],
+    output_dir: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+):
+    """
+    Review the filed items in chunks, one agent session per chunk.
+
+    The filed keys and the collection tree are snapshotted when the run
+    starts. Each chunk is checkpointed once its session ends, so a library
+    of thousands of items no longer has to fit in one session, and a
+    resumed run picks up at the first unreviewed chunk. New paths proposed
+    by earlier chunks are passed on so later chunks converge on them.
+    """
+    log = suggestion_log()
+    with read_backend("reorganize_chunked") as backend:
+        tree = backend.get_collection_tree()
+        counts = backend.count_collection_items()
+        if checkpoint.keys is None:
+            checkpoint.plan([item["key"] for item in backend.list_filed_items(limit=batch_size)])
+        else:
+            print(f"Resuming {checkpoint}\n")
+    log.plan(checkpoint.keys or [])
+
+    if not checkpoint.keys:
+        print("No filed items to reorganize")
+        return
+
+    known_paths = sorted(tree.path_index)
+    snapshot = "\n".join(f"{path} ({counts.get(tree.key_for_path(path), 0)} papers)" for path in known_paths)
+    remaining = checkpoint.remaining()
+    chunks = [remaining[i:i + chunk_size] for i in range(0, len(remaining), chunk_size)]
+    if chunks:
+        print(f"Reviewing {len(remaining)} filed items in {len(chunks)} chunk(s)\n")
+
+    chunk_options = replace(
+        options,
+        allowed_tools=[
+            "mcp__zotero__get_items_details",
+            "mcp__zotero__get_item_details",
+            "mcp__zotero__get_items_collections",
+            "mcp__zotero__get_item_collections",
+            "mcp__zotero__search_items",
+            "mcp__zotero__record_move",
+            "mcp__zotero__record_collection_op",
+        ],
+    )
+    for number, chunk in enumerate(chunks, 1):
+        moves = [record for record in log.items.values() if "op" not in record]
+        collection_ops = [record for record in log.items.values() if "op" in record]
+        proposed = sorted({move["new_path"] for move in moves} - set(known_paths))
+        prompt = f"""
+Review these {len(chunk)} filed papers (chunk {number} of {len(chunks)}) and propose moves for the ones that belong somewhere better:
+{", ".join(chunk)}
+
+Existing collections (snapshot taken when this run started):
+{snapshot}
+
+New collections proposed earlier in this run (reuse these where they fit):
+{chr(10).join(proposed) if proposed else "(none yet)"}
+
+Collection operations recorded earlier in this run (don't record them again):
+{chr(10).join(describe_collection_op(op) for op in collection_ops) if collection_ops else "(none yet)"}
+
+Process:
+1. Get details for all the listed items with one get_items_details call
+2. Get their current collection paths with one get_items_collections call
+3. Use search_items to see where similar papers elsewhere in the library are filed
+4. If a whole collection should be reparented, renamed or merged, record that once
+5. For each remaining paper that should move, decide the new path and record it
+
+""" + REORGANIZATION_RULES + """
+DRY RUN MODE: Do NOT move items or create collections.
+
+""" + RECORD_MOVES
+        with log.scope(chunk):
+            async for _ in stream_agent(chunk_options, prompt, f"chunk {number}"):
+                pass
+        checkpoint.mark_processed(chunk)
+
+    moves = log.items_for(checkpoint.keys)
+    collection_ops = [record for record in log.items.values() if "op" in record]
+    save_reorganization({"moves": moves, "collection_ops": collection_ops}, output_dir)
+    left = len(checkpoint.remaining())
+    if left:
+        print(f"\n⚠️  {left} item(s) not reviewed yet. Continue with: research-clerk --resume {checkpoint.run_id}")
@@ -0,0 +1,118 @@
+"""Run IDs and checkpoints, so long dry runs can be resumed after they stop."""
+import json
+import os
+import secrets
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable
+
+
+RUNS_DIR = "runs"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def new_run_id() -> str:
+    """Sortable, collision-resistant run ID like 20250101-120000-1a2b."""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(2)}"
+
+
+def run_dir(output_dir: Path, run_id: str) -> Path:
+    """Directory holding a run's checkpoint and streamed decisions."""
+    return output_dir / RUNS_DIR / run_id
+
+
+class RunCheckpoint:
+    """
+    Progress of one dry run: which items it set out to process and which are done.
+
+    The item keys are snapshotted when the run starts, so a resumed run
+    continues with the same batch even if the library has changed since.
+    An item is processed once its decision is recorded (categorization) or
+    once the agent session that reviewed it has finished (reorganization).
+    Partial results live next to the checkpoint in the run's JSONL log.
+
+    Saved atomically (write to a temp file, then rename) after every update.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        run_id: str,
+        mode: str,
+        options: Dict[str, Any],
+        keys: Optional[List[str]] = None,
+        processed: Iterable[str] = (),
+        status: str = "running"
+    ):
+        self.path = path
+        self.run_id = run_id
+        self.mode = mode
+        self.options = options
+        self.keys = keys
+        self.processed = set(processed)
+        self.status = status
+
+    @property
+    def dir(self) -> Path:
+        return self.path.parent
+
+    @classmethod
+    def create(cls, output_dir: Path, run_id: str, mode: str, options: Dict[str, Any]) -> "RunCheckpoint":
+        """Start a new run's checkpoint (the batch is planned once it has been listed)."""
+        directory = run_dir(output_dir, run_id)
+        if (directory / CHECKPOINT_FILE).exists():
+            raise ValueError(f"Run {run_id} already exists; use --resume {run_id} to continue it")
+        directory.mkdir(parents=True, exist_ok=True)
+        checkpoint = cls(directory / CHECKPOINT_FILE, run_id, mode, options)
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, output_dir: Path, run_id: str) -> "RunCheckpoint":
+        """Load an earlier run's checkpoint."""
+        path = run_dir(output_dir, run_id) / CHECKPOINT_FILE
+        if not path.exists():
+            raise ValueError(f"No run {run_id} in {output_dir / RUNS_DIR}")
+        data = json.loads(path.read_text())
+        return cls(
+            path,
+            data["run_id"],
+            data["mode"],
+            data.get("options", {}),
+            keys=data.get("keys"),
+            processed=data.get("processed", []),
+            status=data.get("status", "running"),
+        )
+
+    def plan(self, keys: List[str]):
+        """Record the batch this run will work through."""
+        self.keys = keys
+        self.save()
+
+    def mark_processed(self, keys: Iterable[str]):
+        """Record finished items and mark the run complete once none are left."""
+        self.processed.update(keys)
+        if self.keys is not None and not self.remaining():
+            self.status = "complete"
+        self.save()
+
+    def remaining(self) -> List[str]:
+        """Planned keys not processed yet, in plan order."""
+        return [key for key in self.keys or [] if key not in self.processed]
+
+    def save(self):
+        data = {
+            "run_id": self.run_id,
+            "mode": self.mode,
+            "status": self.status,
+            "options": self.options,
+            "keys": self.keys,
+            "processed": sorted(self.processed),
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        os.replace(tmp, self.path)
+
+    def __str__(self) -> str:
+        planned = len(self.keys) if self.keys is not None else "?"
+        return f"run {self.run_id} ({self.mode}, {self.status}): {len(self.processed)} of {planned} items processed"
@@ -0,0 +1,463 @@
+"""Run-scoped database sessions shared by the MCP tools."""
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Union, Iterable
+from .backends.local_sqlite import LocalSQLiteBackend
+from .backends.mirror import MirrorBackend
+from .config import find_zotero_database, get_zotero_backend, get_mirror_path, get_cache_dir
+from .encoding import ENCODINGS, EncodingStats
+from .neighbors import NeighborIndex
+from .utils import validate_suggestions, validate_reorganization, read_jsonl, split_reorganization, reorganization_record_key
+
+
+# the write session / read pool / settings currently open for this process (one agent run at a time)
+_write_session: Optional["WriteSession"] = None
+_read_pool: Optional["ReadPool"] = None
+_tool_settings: Optional["ToolSettings"] = None
+_suggestion_log: Optional["SuggestionLog"] = None
+# item keys of the shard or chunk the current agent session works on (per task, so parallel shards don't mix)
+_session_keys: ContextVar[Optional[frozenset]] = ContextVar("session_keys", default=None)
+
+DEFAULT_POOL_SIZE = 4
+
+
+class WriteSession:
+    """
+    One backup, one connection and one transaction for a whole agent run.
+
+    The zotero-running check and the backup happen once on entry. Every write
+    tool call reuses the same connection, and the transaction is committed
+    once on clean exit or rolled back if the run raised.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else find_zotero_database()
+        self.backend: Optional[LocalSQLiteBackend] = None
+
+    def __enter__(self):
+        global _write_session
+        if _write_session is not None:
+            raise RuntimeError("A write session is already open")
+
+        self.backend = LocalSQLiteBackend(self.db_path).connect(read_only=False)
+        _write_session = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _write_session
+        _write_session = None
+        backend, self.backend = self.backend, None
+        backend.__exit__(exc_type, exc_val, exc_tb)
+        return False
+
+    # async variants so the session can share an `async with` with the agent client
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+
+class ReadPool:
+    """
+    Long-lived read-only connections reused across the tool calls of one run.
+
+    The database path is resolved once when the pool is created. Connections
+    are opened on demand and returned to the pool after each call, keeping at
+    most `size` idle. Every acquire records how long it took to get a
+    connection, how long the tool held it and how long the release took.
+
+    Connections are opened with immutable=1, so the pool serves a snapshot of
+    the library as it was when each connection was opened.
+
+    The sidecar metadata mirror is synced on first use: on entry when
+    use_mirror serves every read from it, otherwise the first time a tool
+    asks for it (search_items).
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        size: int = DEFAULT_POOL_SIZE,
+        use_mirror: bool = False,
+        mirror_path: Optional[Path] = None
+    ):
+        self.db_path = Path(db_path) if db_path else find_zotero_database()
+        self.size = size
+        self.use_mirror = use_mirror
+        self.mirror_path = Path(mirror_path) if mirror_path else get_mirror_path()
+        self.mirror_synced = False
+        self.idle: Dict[bool, List[Union[LocalSQLiteBackend, MirrorBackend]]] = {False: [], True: []}
+        self.opened = 0
+        self.timings: List[Dict[str, Any]] = []
+
+    def sync_mirror(self):
+        """Bring the sidecar mirror up to date (once per run)."""
+        if self.mirror_synced:
+            return
+        with MirrorBackend(self.mirror_path, self.db_path).connect() as mirror:
+            stats = mirror.sync()
+        self.mirror_synced = True
+        print(
+            f"✓ Mirror synced: {stats['updated']} updated, {stats['removed']} removed, "
+            f"{stats['reindexed']} reindexed, {stats['items']} items ({stats['elapsed_ms']:.0f}ms)"
+        )
+
+    @contextmanager
+    def acquire(self, tool: Optional[str] = None, mirror: bool = False):
+        """
+        Yield a pooled read backend, recording acquire/hold/release timings.
+
+        Args:
+            tool: Tool name for the timings
+            mirror: Serve this call from the sidecar mirror even without use_mirror
+        """
+        start = time.perf_counter()
+        mirror = mirror or self.use_mirror
+        idle = self.idle[mirror]
+        if idle:
+            backend = idle.pop()
+        elif mirror:
+            self.sync_mirror()
+            backend = MirrorBackend(self.mirror_path, self.db_path).connect(read_only=True)
+            self.opened += 1
+        else:
+            backend = LocalSQLiteBackend(self.db_path).connect(read_only=True)
+            self.opened += 1
+        acquired = time.perf_counter()
+
+        try:
+            yield backend
+        finally:
+            released = time.perf_counter()
+            if len(idle) < self.size:
+                idle.append(backend)
+            else:
+                backend.close()
+            done = time.perf_counter()
+            self.timings.append({
+                "tool": tool,
+                "acquire_ms": (acquired - start) * 1000,
+                "hold_ms": (released - acquired) * 1000,
+                "release_ms": (done - released) * 1000,
+            })
+
+    def summary(self) -> str:
+        """One-line summary of pool usage for the end of a run."""
+        calls = len(self.timings)
+        if not calls:
+            return "Read pool: no tool calls"
+        acquire = sum(t["acquire_ms"] for t in self.timings) / calls
+        hold = sum(t["hold_ms"] for t in self.timings) / calls
+        return (
+            f"Read pool: {calls} calls on {self.opened} connection(s), "
+            f"avg acquire {acquire:.2f}ms, avg query {hold:.2f}ms"
+        )
+
+    def close(self):
+        """Close all idle connections."""
+        for idle in self.idle.values():
+            for backend in idle:
+                backend.close()
+            idle.clear()
+
+    def __enter__(self):
+        global _read_pool
+        if _read_pool is not None:
+            raise RuntimeError("A read pool is already open")
+        if self.use_mirror:
+            self.sync_mirror()
+        _read_pool = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _read_pool
+        _read_pool = None
+        self.close()
+        print(f"\n{self.summary()}")
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+
+class ToolSettings:
+    """
+    Per-run limits and output options the MCP tools apply on the agent's behalf.
+
+    batch_size caps how many items any listing tool returns, so --batch-size
+    is enforced by the server rather than by asking the model to stop early.
+    encoding selects how tool results are serialized (see encoding.ENCODINGS);
+    with measure_encoding, per-tool savings against pretty JSON are reported
+    when the run ends. fields and abstract_chars project the item detail
+    tools down to what the prompt actually uses. With candidates > 0, item
+    details also carry that many likely collection paths from the nearest
+    already-filed papers.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        encoding: str = "compact",
+        measure_encoding: bool = False,
+        fields: Optional[List[str]] = None,
+        abstract_chars: Optional[int] = None,
+        candidates: int = 0
+    ):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown tool encoding: {encoding}")
+        self.batch_size = batch_size
+        self.encoding = encoding
+        self.encoding_stats = EncodingStats() if measure_encoding else None
+        self.fields = fields
+        self.abstract_chars = abstract_chars
+        self.candidates = candidates
+        self._neighbor_index: Optional[NeighborIndex] = None
+
+    def page_limit(self, requested: Optional[int], default: int, offset: int = 0) -> int:
+        """Clamp a listing page so no run ever sees more than batch_size items."""
+        limit = requested or default
+        if self.batch_size:
+            limit = min(limit, max(self.batch_size - offset, 0))
+        return limit
+
+    def neighbor_index(self, backend) -> NeighborIndex:
+        """The run's neighbor index, loaded from cache or built on first use."""
+        if self._neighbor_index is None:
+            self._neighbor_index = NeighborIndex.load_or_build(backend, get_cache_dir() / "neighbors")
+        return self._neighbor_index
+
+    def __enter__(self):
+        global _tool_settings
+        _tool_settings = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _tool_settings
+        _tool_settings = None
+        if self.encoding_stats is not None:
+            print(f"\nTool response sizes ({self.encoding} vs pretty JSON):")
+            print(self.encoding_stats.report())
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+
+class SuggestionLog:
+    """
+    Append-only JSONL of the agent's decisions, written as it makes them.
+
+    record() validates a decision, appends it and fsyncs before returning,
+    so a run that dies part-way keeps every decision made so far and the
+    file can be applied as it is. kind "items" holds categorization
+    suggestions (one per item), kind "moves" holds reorganization moves
+    (one per item and current collection) and collection operations (one
+    per operation and collection). Recording the same item (and
+    collection) again supersedes the earlier line; readers keep the last
+    one. The latest decisions are also held in memory for the end-of-run
+    merge. With resume=True an existing log is loaded and appended to.
+
+    Decisions are only accepted for items in the active batch: the keys of
+    the shard or chunk whose session is recording (see scope()), else the
+    run's planned batch (see plan()). Collection operations, which have no
+    item key, are not limited.
+    """
+
+    KINDS = {
+        "items": (validate_suggestions, lambda record: record["item_key"]),
+        "moves": (
+            lambda data: validate_reorganization(split_reorganization(data["moves"])),
+            reorganization_record_key,
+        ),
+    }
+
+    def __init__(self, path: Path, kind: str = "items", resume: bool = False):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown suggestion log kind: {kind}")
+        self.path = Path(path)
+        self.kind = kind
+        self.resume = resume
+        self.file = None
+        self.items: Dict[Any, dict] = {}
+        self.batch: Optional[frozenset] = None
+
+    def _key(self, record: Dict[str, Any]):
+        return self.KINDS[self.kind][1](record)
+
+    def plan(self, keys: Iterable[str]):
+        """Limit recording to the run's planned batch."""
+        self.batch = frozenset(keys)
+
+    @contextmanager
+    def scope(self, keys: Iterable[str]):
+        """Limit recording to one shard's or chunk's keys for sessions started inside the block."""
+        token = _session_keys.set(frozenset(keys))
+        try:
+            yield
+        finally:
+            _session_keys.reset(token)
+
+    def check(self, suggestion: Dict[str, Any]) -> List[str]:
+        """Validation errors for one decision, including an item outside the active batch."""
+        errors = self.KINDS[self.kind][0]({self.kind: [suggestion]})
+        if errors:
+            return errors
+        active = _session_keys.get()
+        if active is None:
+            active = self.batch
+        item_key = suggestion.get("item_key")
+        if item_key is not None and active is not None and item_key not in active:
+            return [f"Item {item_key} is not in this batch"]
+        return []
+
+    def _append(self, suggestion: Dict[str, Any]):
+        self.file.write(json.dumps(suggestion, ensure_ascii=False) + "\n")
+        self.items[self._key(suggestion)] = suggestion
+
+    def record(self, suggestion: Dict[str, Any]) -> List[str]:
+        """
+        Validate and append one decision.
+
+        Returns:
+            Validation errors (empty if the decision was recorded)
+        """
+        errors = self.check(suggestion)
+        if errors:
+            return errors
+        self._append(suggestion)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return []
+
+    def record_all(self, suggestions: List[dict]) -> List[str]:
+        """
+        Validate and append decisions made without the agent (cache, fast path, clusters) with one fsync.
+
+        Invalid decisions are skipped; the rest are recorded.
+
+        Returns:
+            Validation errors of the skipped decisions
+        """
+        errors = []
+        for suggestion in suggestions:
+            problems = self.check(suggestion)
+            if problems:
+                errors.extend(problems)
+            else:
+                self._append(suggestion)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return errors
+
+    def items_for(self, keys: Iterable[str]) -> List[dict]:
+        """Latest recorded decisions for the given item keys."""
+        wanted = set(keys)
+        return [record for record in self.items.values() if record.get("item_key") in wanted]
+
+    def __enter__(self):
+        global _suggestion_log
+        if _suggestion_log is not None:
+            raise RuntimeError("A suggestion log is already open")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.resume and self.path.exists():
+            # reload, then rewrite compacted so a torn last line isn't appended to
+            for record in read_jsonl(self.path):
+                self.items[self._key(record)] = record
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in self.items.values())
+            self.file = open(self.path, "a", encoding="utf-8")
+        else:
+            self.file = open(self.path, "w", encoding="utf-8")
+        _suggestion_log = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _suggestion_log
+        _suggestion_log = None
+        self.file.close()
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+
+def tool_settings() -> ToolSettings:
+    """Settings for the current run (defaults outside an agent run)."""
+    return _tool_settings if _tool_settings is not None else ToolSettings()
+
+
+def suggestion_log() -> Optional[SuggestionLog]:
+    """The current run's suggestion log, or None outside a dry-run categorization."""
+    return _suggestion_log
+
+
+@contextmanager
+def write_backend():
+    """
+    Yield a backend for a write tool call.
+
+    Uses the open write session if there is one, otherwise falls back to a
+    one-shot connection (running check, backup, commit on exit).
+    """
+    if _write_session is not None:
+        yield _write_session.backend
+        return
+
+    with get_zotero_backend(read_only=False) as backend:
+        yield backend
+
+
+@contextmanager
+def read_backend(tool: Optional[str] = None):
+    """
+    Yield a backend for a read tool call.
+
+    While a write session is open, reads go through its connection so the
+    agent sees the collections and items it has written but not yet committed.
+    Otherwise the run's read pool is used, falling back to a one-shot
+    read-only connection outside an agent run.
+    """
+    if _write_session is not None:
+        yield _write_session.backend
+        return
+
+    if _read_pool is not None:
+        with _read_pool.acquire(tool) as backend:
+            yield backend
+        return
+
+    with get_zotero_backend(read_only=True) as backend:
+        yield backend
+
+
+@contextmanager
+def mirror_backend(tool: Optional[str] = None):
+    """
+    Yield the sidecar mirror for a tool call that needs it (full-text search).
+
+    Inside an agent run the mirror comes from the read pool, synced once per
+    run; it reflects the library at that point, not writes made since.
+    Outside a run the mirror is synced and opened for the single call.
+    """
+    if _read_pool is not None:
+        with _read_pool.acquire(tool, mirror=True) as backend:
+            yield backend
+        return
+
+    with MirrorBackend(get_mirror_path(), find_zotero_database()).connect() as mirror:
+        mirror.sync()
+        yield mirror
@@ -0,0 +1,210 @@
+"""Dependency-light text vectors (hashed TF-IDF) and clustering for paper batches."""
+import re
+import zlib
+from typing import List, Dict, Any, NamedTuple, Sequence, Tuple
+
+
+# hashed feature space; collisions are rare enough at this size for title+abstract text
+DEFAULT_FEATURES = 2 ** 14
+# cosine similarity to a cluster's centroid needed to join it
+DEFAULT_CLUSTER_THRESHOLD = 0.25
+# keep clusters small enough to review as one decision
+MAX_CLUSTER_SIZE = 30
+# items clustered per pass; bounds the dense centroid sums at this many rows x n_features
+MAX_CLUSTER_BATCH = 1000
+
+STOPWORDS = frozenset("""
+a an and are as at be by can for from has have in is it its of on or our that the their this
+to using via we what when which with without into over under between based towards toward new
+study paper approach method methods results show propose proposed present
+""".split())
+
+
+def require_numpy():
+    """Import numpy, with an install hint if it's missing."""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError(
+            "Similarity features need numpy. Install with: uv pip install 'research-clerk[similarity]'"
+        ) from None
+    return numpy
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of 3+ characters, minus stopwords."""
+    return [t for t in re.findall(r"[a-z][a-z0-9\-]{2,}", text.lower()) if t not in STOPWORDS]
+
+
+def item_text(item: Dict[str, Any]) -> str:
+    """Title (counted twice, it's the densest signal) plus abstract."""
+    title = item.get("title") or ""
+    return f"{title} {title} {item.get('abstractNote') or ''}"
+
+
+def hashed_terms(text: str, n_features: int = DEFAULT_FEATURES):
+    """
+    Hashed term counts for one text, as sparse (columns, counts) arrays.
+
+    Returns:
+        (int32 column indices, float32 counts), columns sorted and unique
+    """
+    np = require_numpy()
+    columns = np.array([zlib.crc32(token.encode()) % n_features for token in tokenize(text)], dtype=np.int32)
+    columns, counts = np.unique(columns, return_counts=True)
+    return columns.astype(np.int32), counts.astype(np.float32)
+
+
+class SparseVectors(NamedTuple):
+    """
+    L2-normalized rows in the coordinate form NeighborIndex stores.
+
+    Row r's nonzeros are data[k] at column indices[k] for every k with
+    row_ids[k] == r; row_ids is sorted, so each row is one contiguous slice.
+    """
+    indices: Any
+    data: Any
+    row_ids: Any
+    n_rows: int
+    n_features: int
+
+    def offsets(self):
+        """Start of each row's slice, plus the end of the last one."""
+        np = require_numpy()
+        return np.searchsorted(self.row_ids, np.arange(self.n_rows + 1))
+
+
+def sparse_tfidf(rows: Sequence[Tuple[Any, Any]], n_features: int = DEFAULT_FEATURES) -> Tuple[SparseVectors, Any]:
+    """
+    TF-IDF weight hashed term counts and L2-normalize each row.
+
+    Args:
+        rows: (columns, counts) per row, as returned by hashed_terms; rows
+            without terms stay empty
+        n_features: Size of the hashed feature space
+
+    Returns:
+        (vectors, float32 idf per column)
+    """
+    np = require_numpy()
+    n = len(rows)
+    lengths = np.array([len(columns) for columns, _ in rows], dtype=np.int64)
+    if lengths.sum():
+        indices = np.concatenate([columns for columns, _ in rows])
+        tf = np.log1p(np.concatenate([counts for _, counts in rows]))
+    else:
+        indices, tf = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    row_ids = np.repeat(np.arange(n, dtype=np.int32), lengths)
+
+    # sublinear tf, smoothed idf
+    df = np.bincount(indices, minlength=n_features)
+    idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+    data = (tf * idf[indices]).astype(np.float32)
+    norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=n))
+    data /= np.maximum(norms, 1e-12)[row_ids].astype(np.float32)
+    return SparseVectors(indices, data, row_ids, n, n_features), idf
+
+
+def hashed_tfidf(texts: List[str], n_features: int = DEFAULT_FEATURES) -> SparseVectors:
+    """
+    L2-normalized TF-IDF vectors with terms hashed into n_features columns.
+
+    Uses crc32 rather than hash() so vectors are stable across processes.
+    IDF is computed over `texts` themselves. Memory grows with the number
+    of terms, not texts x features.
+    """
+    return sparse_tfidf([hashed_terms(text, n_features) for text in texts], n_features)[0]
+
+
+def cluster_vectors(
+    vectors: SparseVectors,
+    threshold: float = DEFAULT_CLUSTER_THRESHOLD,
+    max_size: int = MAX_CLUSTER_SIZE
+) -> List[List[int]]:
+    """
+    Greedy centroid clustering of normalized vectors.
+
+    Each row joins the most similar open cluster if the cosine similarity
+    to its centroid reaches `threshold`, otherwise starts a new one. One
+    pass, O(rows x clusters), deterministic for a given row order. The
+    centroid sums are dense (clusters x n_features), so callers cluster at
+    most MAX_CLUSTER_BATCH rows at a time.
+
+    Returns:
+        Clusters as lists of row indices, largest first
+    """
+    np = require_numpy()
+    members: List[List[int]] = []
+    # centroid sums (grown by doubling) and their squared norms
+    sums = np.zeros((16, vectors.n_features), dtype=np.float32)
+    sq_norms = np.zeros(16, dtype=np.float32)
+    offsets = vectors.offsets()
+
+    for row in range(vectors.n_rows):
+        # only the row's nonzero columns contribute to the dot products
+        nonzero = vectors.indices[offsets[row]:offsets[row + 1]]
+        values = vectors.data[offsets[row]:offsets[row + 1]]
+        k = len(members)
+        dots = sums[:k, nonzero] @ values
+        sims = dots / np.sqrt(np.maximum(sq_norms[:k], 1e-12))
+        for index, cluster in enumerate(members):
+            if len(cluster) >= max_size:
+                sims[index] = -1
+
+        best = int(np.argmax(sims)) if k else -1
+        if best < 0 or sims[best] < threshold:
+            if k == len(sums):
+                sums = np.vstack([sums, np.zeros_like(sums)])
+                sq_norms = np.concatenate([sq_norms, np.zeros_like(sq_norms)])
+            best, dots = k, np.zeros(k + 1, dtype=np.float32)
+            members.append([])
+
+        members[best].append(row)
+        sq_norms[best] += 2 * dots[best] + float(values @ values)
+        sums[best, nonzero] += values
+
+    return sorted(members, key=len, reverse=True)
+
+
+def centrality(vectors: SparseVectors, rows: List[int]) -> List[int]:
+    """A cluster's rows, most similar to its centroid first."""
+    np = require_numpy()
+    offsets = vectors.offsets()
+    centroid = np.zeros(vectors.n_features, dtype=np.float32)
+    for row in rows:
+        span = slice(offsets[row], offsets[row + 1])
+        centroid[vectors.indices[span]] += vectors.data[span]
+
+    def score(row: int) -> float:
+        span = slice(offsets[row], offsets[row + 1])
+        return float(vectors.data[span] @ centroid[vectors.indices[span]])
+
+    return sorted(rows, key=lambda row: -score(row))
+
+
+def cluster_items(
+    items: List[Dict[str, Any]],
+    threshold: float = DEFAULT_CLUSTER_THRESHOLD,
+    batch: int = MAX_CLUSTER_BATCH
+) -> List[List[Dict[str, Any]]]:
+    """
+    Group item detail dicts by topic, most central member of each cluster first.
+
+    Items are clustered in passes of at most `batch`, so memory stays
+    bounded for any backlog; clusters don't span passes.
+
+    Args:
+        items: get_items_details results (title and abstractNote are used)
+        threshold: Minimum centroid similarity to join a cluster
+        batch: Items clustered per pass
+
+    Returns:
+        Clusters of items, largest first
+    """
+    clusters = []
+    for start in range(0, len(items), batch):
+        chunk = items[start:start + batch]
+        vectors = hashed_tfidf([item_text(item) for item in chunk])
+        for rows in cluster_vectors(vectors, threshold):
+            clusters.append([chunk[row] for row in centrality(vectors, rows)])
+    return sorted(clusters, key=len, reverse=True)
@@ -1,30 +1,119 @@
 """Zotero tools for the categorization agent."""
-import json
 from claude_agent_sdk import tool
-from .config import get_zotero_backend
+from .session import read_backend, write_backend, mirror_backend, tool_settings, suggestion_log
+from .encoding import encode_payload
 from .utils import format_tool_response
+from .bulk_apply import ApplyPlan
 
 
 # NOTE: tools run in read-only mode for reads, write mode for writes
-# the backend handles safety (backups, checking zotero not running, etc)
+# writes share the run's WriteSession (one backup, one transaction) when one is open
+
+# page size for listing tools when the run has no --batch-size
+DEFAULT_PAGE_SIZE = 100
+
+# results per search_items call unless the agent asks for more
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+LISTING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "limit": {
+            "type": "integer",
+            "description": f"Max items to return (default {DEFAULT_PAGE_SIZE}, capped by the run's batch size)"
+        },
+        "offset": {
+            "type": "integer",
+            "description": "Number of items to skip; use next_offset from the previous page"
+        },
+        "since": {
+            "type": "string",
+            "description": "Only items added after this timestamp (e.g. 2024-01-01 12:00:00)"
+        },
+        "item_type": {
+            "type": "string",
+            "description": "Only items of this Zotero type (e.g. journalArticle, conferencePaper)"
+        }
+    },
+    "additionalProperties": False
+}
+
+
+def respond(tool_name: str, data, text: str = None, baseline=None) -> dict:
+    """
+    Encode a tool result with the run's encoding and wrap it as a tool response.
+
+    Args:
+        tool_name: Tool name (for encoding measurements)
+        data: JSON-serializable result
+        text: Pre-rendered text to send instead of encoding `data`
+        baseline: Original-format result to measure against (defaults to `data`)
+    """
+    settings = tool_settings()
+    if text is None:
+        text = encode_payload(data, settings.encoding)
+    if settings.encoding_stats is not None:
+        original = baseline if baseline is not None else data
+        settings.encoding_stats.record(tool_name, encode_payload(original, "json"), text)
+    return format_tool_response(text)
+
+
+def add_candidates(items, backend):
+    """Attach likely collection paths (from similar filed papers) when the run asks for them."""
+    settings = tool_settings()
+    if not settings.candidates:
+        return
+    index = settings.neighbor_index(backend)
+    for item in items:
+        item["candidates"] = index.candidates(item, settings.candidates)
+
+
+def record_decision(kind: str, args, confirmation: str) -> dict:
+    """Append a decision to the run's suggestion log, reporting validation errors back to the agent."""
+    log = suggestion_log()
+    if log is None or log.kind != kind:
+        return format_tool_response(f"✗ Not recording {kind} in this run")
+
+    errors = log.record(dict(args))
+    if errors:
+        return format_tool_response("✗ Not recorded:\n" + "\n".join(f"- {e}" for e in errors))
+    return format_tool_response(confirmation)
+
+
+def list_page(list_method, args) -> dict:
+    """Run a paged listing and wrap it with the offset of the next page."""
+    offset = args.get("offset", 0)
+    limit = tool_settings().page_limit(args.get("limit"), DEFAULT_PAGE_SIZE, offset)
+    if limit <= 0:
+        return {"items": [], "next_offset": None}
+
+    items = list_method(
+        limit=limit,
+        offset=offset,
+        since=args.get("since"),
+        item_type=args.get("item_type")
+    )
+    next_offset = offset + len(items) if len(items) == limit else None
+    return {"items": items, "next_offset": next_offset}
 
 
 @tool(
     name="list_unfiled_items",
-    description="Get all papers not in any collection",
-    input_schema={"type": "object", "properties": {}, "additionalProperties": False}
+    description="Get papers not in any collection, newest first, one page at a time",
+    input_schema=LISTING_SCHEMA
 )
 async def list_unfiled_items(args):
-    """List all items not currently in any collection."""
-    with get_zotero_backend(read_only=True) as backend:
-        unfiled = backend.list_unfiled_items()
+    """List a page of items not currently in any collection."""
+    with read_backend("list_unfiled_items") as backend:
+        unfiled = list_page(backend.list_unfiled_items, args)
 
-    return format_tool_response(json.dumps(unfiled, indent=2))
+    return respond("list_unfiled_items", unfiled)
 
 
 @tool(
     name="get_item_details",
-    description="Get full metadata for a specific item including abstract and keywords",
+    description="Get metadata for a specific item including abstract, venue, authors and keywords",
     input_schema={
         "type": "object",
         "properties": {
@@ -39,10 +128,46 @@ async def list_unfiled_items(args):
 )
 async def get_item_details(args):
     """Fetch detailed metadata for a specific item."""
-    with get_zotero_backend(read_only=True) as backend:
-        metadata = backend.get_item_details(args["item_key"])
+    with read_backend("get_item_details") as backend:
+        settings = tool_settings()
+        metadata = backend.get_item_details(args["item_key"], settings.fields, settings.abstract_chars)
+        add_candidates([metadata], backend)
+
+    return respond("get_item_details", metadata)
+
 
-    return format_tool_response(json.dumps(metadata, indent=2))
+@tool(
+    name="get_items_details",
+    description=(
+        "Get metadata (abstract, venue, authors, keywords) for many items in one call. "
+        "Prefer this over get_item_details when processing a batch"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "item_keys": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Zotero item keys to fetch"
+            }
+        },
+        "required": ["item_keys"],
+        "additionalProperties": False
+    }
+)
+async def get_items_details(args):
+    """Fetch detailed metadata for a batch of items."""
+    with read_backend("get_items_details") as backend:
+        settings = tool_settings()
+        items = backend.get_items_details(args["item_keys"], settings.fields, settings.abstract_chars)
+        add_candidates(items, backend)
+
+    found = {item["key"] for item in items}
+    result = {
+        "items": items,
+        "not_found": [key for key in args["item_keys"] if key not in found],
+    }
+    return respond("get_items_details", result)
 
 
 @tool(
@@ -52,10 +177,19 @@ async def get_item_details(args):
 )
 async def list_collections(args):
     """List all collections with their hierarchy."""
-    with get_zotero_backend(read_only=True) as backend:
-        collections = backend.list_collections()
+    with read_backend("list_collections") as backend:
+        tree = backend.get_collection_tree()
 
-    return format_tool_response(json.dumps(collections, indent=2))
+    collections = tree.as_dict()
+    encoding = tool_settings().encoding
+    if encoding == "table":
+        # indented "Name [KEY]" tree, paths implied by nesting
+        return respond("list_collections", collections, text=tree.render())
+    if encoding == "compact":
+        # key + path is all the agent needs; drop the key-indexed duplication
+        compact = [{"key": key, "path": coll["path"]} for key, coll in collections.items()]
+        return respond("list_collections", compact, baseline=collections)
+    return respond("list_collections", collections)
 
 
 @tool(
@@ -79,7 +213,7 @@ async def list_collections(args):
 )
 async def create_collection(args):
     """Create a new collection in Zotero."""
-    with get_zotero_backend(read_only=False) as backend:
+    with write_backend() as backend:
         new_key = backend.create_collection(args["name"], args.get("parent_key"))
 
     msg = f"Created collection '{args['name']}' with key {new_key}"
@@ -109,7 +243,7 @@ async def create_collection(args):
 )
 async def add_to_collection(args):
     """Add an item to a collection."""
-    with get_zotero_backend(read_only=False) as backend:
+    with write_backend() as backend:
         backend.add_to_collection(args["item_key"], args["collection_key"])
 
     return format_tool_response(f"Added item {args['item_key']} to collection {args['collection_key']}")
@@ -137,7 +271,7 @@ async def add_to_collection(args):
 )
 async def add_tags_to_item(args):
     """Add tags to an item."""
-    with get_zotero_backend(read_only=False) as backend:
+    with write_backend() as backend:
         backend.add_tags(args["item_key"], args["tags"])
 
     return format_tool_response(f"Added tags {args['tags']} to item {args['item_key']}")
@@ -145,15 +279,15 @@ async def add_tags_to_item(args):
 
 @tool(
     name="list_filed_items",
-    description="Get all papers that are already in collections (for reorganization)",
-    input_schema={"type": "object", "properties": {}, "additionalProperties": False}
+    description="Get papers that are already in collections (for reorganization), one page at a time",
+    input_schema=LISTING_SCHEMA
 )
 async def list_filed_items(args):
-    """List all items that are already in collections."""
-    with get_zotero_backend(read_only=True) as backend:
-        filed = backend.list_filed_items()
+    """List a page of items that are already in collections."""
+    with read_backend("list_filed_items") as backend:
+        filed = list_page(backend.list_filed_items, args)
 
-    return format_tool_response(json.dumps(filed, indent=2))
+    return respond("list_filed_items", filed)
 
 
 @tool(
@@ -173,10 +307,366 @@ async def list_filed_items(args):
 )
 async def get_item_collections(args):
     """Get collection paths for an item."""
-    with get_zotero_backend(read_only=True) as backend:
+    with read_backend("get_item_collections") as backend:
         paths = backend.get_item_collections(args["item_key"])
 
-    return format_tool_response(json.dumps(paths, indent=2))
+    return respond("get_item_collections", paths)
+
+
+@tool(
+    name="get_items_collections",
+    description=(
+        "Get the collection paths for many items in one call. "
+        "Omit item_keys to page through the map for every filed item, one page at a time"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "item_keys": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Zotero item keys to look up"
+            },
+            "limit": {
+                "type": "integer",
+                "description": f"Without item_keys: max items per page (default {DEFAULT_PAGE_SIZE}, capped by the run's batch size)"
+            },
+            "after": {
+                "type": "integer",
+                "description": "Without item_keys: where the page starts; use next_after from the previous page"
+            }
+        },
+        "additionalProperties": False
+    }
+)
+async def get_items_collections(args):
+    """Get collection paths for many items (or a page of the whole library's map)."""
+    with read_backend("get_items_collections") as backend:
+        if args.get("item_keys"):
+            return respond("get_items_collections", backend.get_items_collections(args["item_keys"]))
+
+        # each page is capped like any listing page, but the walk isn't: the
+        # itemID cursor lets the agent go through every filed item
+        limit = max(tool_settings().page_limit(args.get("limit"), DEFAULT_PAGE_SIZE), 1)
+        paths, next_after = backend.item_collections_page(args.get("after", 0), limit)
+
+    return respond("get_items_collections", {"collections": paths, "next_after": next_after})
+
+
+@tool(
+    name="search_items",
+    description=(
+        "Full-text search over titles, abstracts, venues and tags, best matches first. "
+        "Use it to find similar papers that are already filed and the collections they are in"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Free text, e.g. a paper's title or a few topic keywords"
+            },
+            "limit": {
+                "type": "integer",
+                "description": f"Max results (default {DEFAULT_SEARCH_LIMIT}, at most {MAX_SEARCH_LIMIT})"
+            },
+            "filed_only": {
+                "type": "boolean",
+                "description": "Only return papers that are already in a collection"
+            }
+        },
+        "required": ["query"],
+        "additionalProperties": False
+    }
+)
+async def search_items(args):
+    """Rank library items against a free-text query."""
+    limit = min(args.get("limit") or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+    with mirror_backend("search_items") as backend:
+        results = backend.search_items(args["query"], limit, args.get("filed_only", False))
+
+    return respond("search_items", results)
+
+
+@tool(
+    name="record_suggestion",
+    description=(
+        "Record the categorization decision for one paper as soon as it is made (dry run). "
+        "Recording the same item again replaces the earlier decision"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "item_key": {
+                "type": "string",
+                "description": "The Zotero item key"
+            },
+            "title": {
+                "type": "string",
+                "description": "The paper's title"
+            },
+            "collection_path": {
+                "type": "string",
+                "description": "Collection path, max 3 levels (e.g. Computer Science/AI/NLP)"
+            },
+            "tags": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "2-5 tags"
+            },
+            "reasoning": {
+                "type": "string",
+                "description": "Brief explanation"
+            }
+        },
+        "required": ["item_key", "collection_path", "tags", "reasoning"],
+        "additionalProperties": False
+    }
+)
+async def record_suggestion(args):
+    """Append one validated suggestion to the run's suggestions.jsonl."""
+    return record_decision("items", args, f"Recorded {args['item_key']} -> {args['collection_path']}")
+
+
+@tool(
+    name="record_cluster_suggestion",
+    description=(
+        "Record one categorization decision for several papers of a cluster at once (dry run). "
+        "Record papers that don't fit the cluster's decision separately with record_suggestion"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "item_keys": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Zotero item keys of the papers this decision is for"
+            },
+            "collection_path": {
+                "type": "string",
+                "description": "Collection path, max 3 levels (e.g. Computer Science/AI/NLP)"
+            },
+            "tags": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "2-5 tags"
+            },
+            "reasoning": {
+                "type": "string",
+                "description": "Brief explanation"
+            }
+        },
+        "required": ["item_keys", "collection_path", "tags", "reasoning"],
+        "additionalProperties": False
+    }
+)
+async def record_cluster_suggestion(args):
+    """Append the same validated suggestion for each listed paper to the run's suggestions.jsonl."""
+    log = suggestion_log()
+    if log is None or log.kind != "items":
+        return format_tool_response("✗ Not recording items in this run")
+
+    keys = list(dict.fromkeys(args["item_keys"]))
+    with read_backend("record_cluster_suggestion") as backend:
+        titles = {item["key"]: item.get("title", "") for item in backend.get_items_details(keys, ["title"])}
+    suggestions = [
+        {
+            "item_key": key,
+            "title": titles.get(key, ""),
+            "collection_path": args["collection_path"],
+            "tags": args["tags"],
+            "reasoning": args["reasoning"],
+        }
+        for key in keys
+    ]
+    errors = log.record_all(suggestions)
+    recorded = sum(1 for suggestion in suggestions if log.items.get(suggestion["item_key"]) is suggestion)
+    if errors:
+        return format_tool_response(
+            f"Recorded {recorded} of {len(keys)} papers -> {args['collection_path']}. Not recorded:\n"
+            + "\n".join(f"- {e}" for e in errors)
+        )
+    return format_tool_response(f"Recorded {recorded} papers -> {args['collection_path']}")
+
+
+@tool(
+    name="record_move",
+    description=(
+        "Record one proposed move as soon as it is decided (dry run). "
+        "Recording the same item and current collection again replaces the earlier move"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "item_key": {
+                "type": "string",
+                "description": "The Zotero item key"
+            },
+            "title": {
+                "type": "string",
+                "description": "The paper's title"
+            },
+            "current_path": {
+                "type": "string",
+                "description": "Collection path the item is in now"
+            },
+            "new_path": {
+                "type": "string",
+                "description": "Proposed collection path, max 3 levels"
+            },
+            "reasoning": {
+                "type": "string",
+                "description": "Brief explanation"
+            }
+        },
+        "required": ["item_key", "current_path", "new_path", "reasoning"],
+        "additionalProperties": False
+    }
+)
+async def record_move(args):
+    """Append one validated move to the run's reorganization.jsonl."""
+    return record_decision("moves", args, f"Recorded {args['item_key']}: {args['current_path']} -> {args['new_path']}")
+
+
+@tool(
+    name="record_collection_op",
+    description=(
+        "Record one collection-level change (dry run): reparent a whole collection, rename it, "
+        "or merge it into another. One call covers every paper in the collection, so prefer it "
+        "over per-paper moves when a whole collection should go somewhere else. "
+        "Paths are the collections' paths as they are now"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "op": {
+                "type": "string",
+                "enum": ["reparent", "rename", "merge"],
+                "description": "reparent needs new_parent, rename needs new_name, merge needs into"
+            },
+            "path": {
+                "type": "string",
+                "description": "Current path of the collection to change"
+            },
+            "new_parent": {
+                "type": "string",
+                "description": "reparent: path of the new parent (\"\" for top level)"
+            },
+            "new_name": {
+                "type": "string",
+                "description": "rename: the new name (not a path)"
+            },
+            "into": {
+                "type": "string",
+                "description": "merge: path of the collection that absorbs this one's papers and subcollections"
+            },
+            "reasoning": {
+                "type": "string",
+                "description": "Brief explanation"
+            }
+        },
+        "required": ["op", "path", "reasoning"],
+        "additionalProperties": False
+    }
+)
+async def record_collection_op(args):
+    """Append one validated collection operation to the run's reorganization.jsonl."""
+    return record_decision("moves", args, f"Recorded {args['op']} of {args['path']}")
+
+
+def apply_collection_op(op: dict, target_key) -> dict:
+    """Check a collection operation against the current tree, then run it in the write session."""
+    with write_backend() as backend:
+        reason = ApplyPlan.check_collection_op(op, target_key, backend.get_collection_tree())
+        if reason:
+            return format_tool_response(f"✗ Not applied: {reason}")
+        if op["op"] == "reparent":
+            backend.reparent_collection(op["key"], target_key)
+            return format_tool_response(f"Moved collection {op['key']} under {target_key or 'the top level'}")
+        if op["op"] == "rename":
+            backend.rename_collection(op["key"], op["new_name"])
+            return format_tool_response(f"Renamed collection {op['key']} to '{op['new_name']}'")
+        counts = backend.merge_collection(op["key"], target_key)
+    return format_tool_response(
+        f"Merged collection {op['key']} into {target_key}: {counts['added']} papers added, "
+        f"{counts['already_there']} already there, {counts['subcollections']} subcollections moved"
+    )
+
+
+@tool(
+    name="reparent_collection",
+    description="Move a collection, with all its papers and subcollections, under a new parent",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "collection_key": {
+                "type": "string",
+                "description": "The collection to move"
+            },
+            "parent_key": {
+                "type": "string",
+                "description": "Optional: the new parent collection key (omit for top level)"
+            }
+        },
+        "required": ["collection_key"],
+        "additionalProperties": False
+    }
+)
+async def reparent_collection(args):
+    """Move a collection subtree under a new parent."""
+    op = {"op": "reparent", "key": args["collection_key"], "new_parent": args.get("parent_key", "")}
+    return apply_collection_op(op, args.get("parent_key"))
+
+
+@tool(
+    name="rename_collection",
+    description="Rename a collection",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "collection_key": {
+                "type": "string",
+                "description": "The collection to rename"
+            },
+            "name": {
+                "type": "string",
+                "description": "The new name"
+            }
+        },
+        "required": ["collection_key", "name"],
+        "additionalProperties": False
+    }
+)
+async def rename_collection(args):
+    """Rename a collection."""
+    return apply_collection_op({"op": "rename", "key": args["collection_key"], "new_name": args["name"]}, None)
+
+
+@tool(
+    name="merge_collections",
+    description=(
+        "Merge a collection into another: its papers and subcollections move to the target "
+        "and the emptied collection goes to the trash"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "source_key": {
+                "type": "string",
+                "description": "The collection to merge away"
+            },
+            "target_key": {
+                "type": "string",
+                "description": "The collection that absorbs it"
+            }
+        },
+        "required": ["source_key", "target_key"],
+        "additionalProperties": False
+    }
+)
+async def merge_collections(args):
+    """Merge one collection into another."""
+    return apply_collection_op({"op": "merge", "key": args["source_key"]}, args["target_key"])
 
 
 @tool(
@@ -200,7 +690,7 @@ async def get_item_collections(args):
 )
 async def remove_from_collection(args):
     """Remove an item from a collection."""
-    with get_zotero_backend(read_only=False) as backend:
+    with write_backend() as backend:
         backend.remove_from_collection(args["item_key"], args["collection_key"])
 
     return format_tool_response(f"Removed item {args['item_key']} from collection {args['collection_key']}")
@@ -210,19 +700,31 @@ async def remove_from_collection(args):
 ALL_TOOLS = [
     list_unfiled_items,
     get_item_details,
+    get_items_details,
+    search_items,
     list_collections,
     create_collection,
     add_to_collection,
     add_tags_to_item,
+    record_suggestion,
+    record_cluster_suggestion,
 ]
 
 # Reorganization tools (separate list)
 REORGANIZE_TOOLS = [
     list_filed_items,
     get_item_details,
+    get_items_details,
     get_item_collections,
+    get_items_collections,
+    search_items,
     list_collections,
     create_collection,
     add_to_collection,
     remove_from_collection,
+    reparent_collection,
+    rename_collection,
+    merge_collections,
+    record_move,
+    record_collection_op,
 ]
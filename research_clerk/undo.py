@@ -0,0 +1,36 @@
+"""Undo an apply by replaying its operation journal backwards."""
+import time
+from .backends.local_sqlite import LocalSQLiteBackend
+from .config import find_zotero_database
+from .journal import load_journal, mark_undone
+
+
+def undo_run(run_id: str):
+    """
+    Revert the rows a run wrote, in one transaction.
+
+    Only what the run itself inserted or removed is touched, so edits made
+    in zotero since then survive (unlike restoring a backup).
+
+    Args:
+        run_id: ID printed when the run's changes were committed
+    """
+    db_path = find_zotero_database()
+    entries = load_journal(db_path, run_id)
+    print(f"📂 Undoing run {run_id}: {sum(len(e['rows']) for e in entries)} journaled row change(s)\n")
+
+    backend = LocalSQLiteBackend(db_path)
+    with backend.connect(read_only=False) as backend:
+        start = time.perf_counter()
+        counts = backend.undo_operations(entries)
+        sql_ms = round((time.perf_counter() - start) * 1000, 1)
+    mark_undone(db_path, run_id)
+
+    print(
+        f"\n✓ Undid run {run_id}: {counts['unfiled']} memberships removed, "
+        f"{counts['refiled']} restored, {counts['untagged']} item tags and "
+        f"{counts['tags_deleted']} tags removed, {counts['collections_deleted']} collections deleted, "
+        f"{counts['collections_reverted'] + counts['untrashed']} collections restored ({sql_ms}ms of SQL)"
+    )
+    if counts["collections_kept"]:
+        print(f"  ⚠️  Kept {counts['collections_kept']} created collection(s) that have been used since")
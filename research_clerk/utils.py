@@ -1,12 +1,16 @@
 """Shared utilities for research-clerk."""
 import json
 import re
-from typing import Dict, Any, List, Optional
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from .collection_tree import CollectionTree
 
 
 # Constants
 MAX_COLLECTION_DEPTH = 3
 MAX_TAGS_PER_ITEM = 5
+# collection-level reorganization operations and the field each one needs
+COLLECTION_OPS = {"reparent": "new_parent", "rename": "new_name", "merge": "into"}
 ITEM_KEY_PATTERN = r'^[A-Z0-9]{8}$'
 JSON_CODE_BLOCK_PATTERN = r'```json\s*(\{.*?\})\s*```'
 
@@ -44,9 +48,36 @@ def format_tool_response(message: str) -> dict:
     return {"content": [{"type": "text", "text": message}]}
 
 
+def read_jsonl(path: Path) -> List[Any]:
+    """
+    Read a JSONL file written line by line (suggestions.jsonl, reorganization.jsonl).
+
+    A torn last line, left by a run that died mid-write, is skipped with a
+    warning; a malformed line anywhere else is an error.
+
+    Raises:
+        ValueError: If a line other than the last is not valid JSON
+    """
+    with open(path) as f:
+        lines = f.read().splitlines()
+
+    records = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            if number == len(lines):
+                print(f"⚠️  Skipping incomplete last line {number} of {path}")
+                continue
+            raise ValueError(f"{path}:{number}: not valid JSON")
+    return records
+
+
 def build_collection_hierarchy(
     collection_path: str,
-    existing_collections: Dict[str, Dict[str, Any]],
+    tree: CollectionTree,
     backend,
     new_collection_cache: Optional[Dict[str, str]] = None
 ) -> str:
@@ -55,7 +86,8 @@ def build_collection_hierarchy(
 
     Args:
         collection_path: Full path like "Computer Science/AI/NLP"
-        existing_collections: Map of collection_key -> collection data with 'path' field
+        tree: Existing collections, indexed by path (a write backend's own
+              tree also indexes the collections it creates, in place)
         backend: Database backend with create_collection method
         new_collection_cache: Optional dict to track newly created collections
 
@@ -68,28 +100,83 @@ def build_collection_hierarchy(
     if new_collection_cache is None:
         new_collection_cache = {}
 
-    # Build reverse lookup: path -> key
-    collection_keys = {coll['path']: key for key, coll in existing_collections.items()}
-    collection_keys.update(new_collection_cache)
-
     # Build hierarchy level by level
-    parts = collection_path.split('/')
     parent_key = None
+    path_so_far = ""
 
-    for i, part in enumerate(parts):
-        path_so_far = '/'.join(parts[:i+1])
+    for part in collection_path.split('/'):
+        path_so_far = f"{path_so_far}/{part}" if path_so_far else part
+        existing_key = new_collection_cache.get(path_so_far) or tree.key_for_path(path_so_far)
 
-        if path_so_far not in collection_keys:
+        if existing_key is None:
             # Create this collection
             new_key = backend.create_collection(part, parent_key)
-            collection_keys[path_so_far] = new_key
             new_collection_cache[path_so_far] = new_key
             parent_key = new_key
         else:
-            parent_key = collection_keys[path_so_far]
+            parent_key = existing_key
 
     # Return final collection key
-    return collection_keys[collection_path]
+    return parent_key
+
+
+def normalize_collection_path(path: str) -> str:
+    """Trim whitespace around segments and drop empty segments ("a / b//c" -> "a/b/c")."""
+    return '/'.join(part.strip() for part in path.split('/') if part.strip())
+
+
+def canonical_collection_path(path: str, canonical: Dict[str, str]) -> str:
+    """
+    Map a path onto the first spelling seen for it, segment by segment.
+
+    Args:
+        path: Collection path to canonicalize
+        canonical: casefolded path -> chosen spelling, updated in place
+
+    Returns:
+        The canonical spelling, so "computer science/ai" resolves to
+        "Computer Science/AI" once either has been seen
+    """
+    parts: List[str] = []
+    for part in normalize_collection_path(path).split('/'):
+        candidate = '/'.join(parts + [part])
+        parts = canonical.setdefault(candidate.casefold(), candidate).split('/')
+    return '/'.join(parts)
+
+
+def merge_suggestions(results: List[dict], known_paths: Iterable[str] = ()) -> dict:
+    """
+    Merge suggestion sets from several agent sessions into one.
+
+    Paths are canonicalized against existing collections first and then
+    against each other, so two sessions that invent the same new collection
+    with different spelling or spacing converge on one path. The first
+    suggestion for an item key wins.
+
+    Args:
+        results: Validated suggestion dicts ({"items": [...]})
+        known_paths: Paths of collections that already exist
+
+    Returns:
+        A single suggestions dict
+    """
+    canonical: Dict[str, str] = {}
+    for path in known_paths:
+        canonical_collection_path(path, canonical)
+
+    merged = []
+    seen = set()
+    for result in results:
+        for item in result.get("items", []):
+            if item["item_key"] in seen:
+                continue
+            seen.add(item["item_key"])
+            merged.append({
+                **item,
+                "collection_path": canonical_collection_path(item["collection_path"], canonical)
+            })
+
+    return {"items": merged}
 
 
 def validate_item_key(item_key: Any, item_label: str = "Item") -> Optional[str]:
@@ -215,10 +302,82 @@ def validate_suggestions(data: dict) -> List[str]:
     return errors
 
 
+def validate_collection_ops(ops: Any) -> List[str]:
+    """
+    Validate the collection-level operations of a reorganization.
+
+    Each operation names a collection by its current path and is one of
+    reparent (new_parent, "" for top level), rename (new_name) or merge
+    (into: the path of the collection that absorbs it).
+
+    Returns list of error messages (empty if valid).
+    """
+    if not isinstance(ops, list):
+        return ["'collection_ops' must be a list"]
+
+    errors = []
+    for i, op in enumerate(ops):
+        prefix = f"Collection op {i}"
+
+        if not isinstance(op, dict):
+            errors.append(f"{prefix}: must be an object")
+            continue
+
+        if op.get("op") not in COLLECTION_OPS:
+            errors.append(f"{prefix}: 'op' must be one of {', '.join(COLLECTION_OPS)}")
+            continue
+
+        if not isinstance(op.get("path"), str) or not op["path"].strip():
+            errors.append(f"{prefix}: missing 'path'")
+
+        field = COLLECTION_OPS[op["op"]]
+        value = op.get(field)
+        if op["op"] == "reparent":
+            # "" moves the collection to the top level
+            if not isinstance(value, str):
+                errors.append(f"{prefix}: 'new_parent' must be a string (\"\" for top level)")
+            elif value.count('/') > MAX_COLLECTION_DEPTH - 2:
+                errors.append(f"{prefix}: 'new_parent' leaves no room under max {MAX_COLLECTION_DEPTH} levels (got: {value})")
+        elif op["op"] == "rename":
+            if not isinstance(value, str) or not value.strip():
+                errors.append(f"{prefix}: missing 'new_name'")
+            elif '/' in value:
+                errors.append(f"{prefix}: 'new_name' cannot contain '/'")
+        else:
+            error = validate_collection_path(value, field, prefix) if value is not None else f"{prefix}: missing '{field}'"
+            if error:
+                errors.append(error)
+            elif value == op.get("path"):
+                errors.append(f"{prefix}: cannot merge a collection into itself")
+
+        if "reasoning" in op and not isinstance(op["reasoning"], str):
+            errors.append(f"{prefix}: 'reasoning' must be a string")
+
+    return errors
+
+
+def split_reorganization(records: Iterable[dict]) -> Dict[str, List[dict]]:
+    """Sort streamed reorganization records into item moves and collection operations."""
+    data = {"moves": [], "collection_ops": []}
+    for record in records:
+        data["collection_ops" if isinstance(record, dict) and "op" in record else "moves"].append(record)
+    return data
+
+
+def reorganization_record_key(record: dict) -> Tuple:
+    """Identity of a reorganization record; a later record with the same key replaces it."""
+    if "op" in record:
+        return (record["op"], record.get("path"))
+    return (record.get("item_key"), record.get("current_path"))
+
+
 def validate_reorganization(data: dict) -> List[str]:
     """
     Validate reorganization JSON schema.
 
+    A reorganization has item 'moves', collection-level 'collection_ops'
+    (see validate_collection_ops), or both.
+
     Returns list of error messages (empty if valid).
     """
     errors = []
@@ -228,20 +387,18 @@ def validate_reorganization(data: dict) -> List[str]:
         errors.append("Root must be a JSON object")
         return errors
 
-    if "moves" not in data:
+    if "collection_ops" in data:
+        errors.extend(validate_collection_ops(data["collection_ops"]))
+    elif "moves" not in data:
         errors.append("Missing required 'moves' field")
         return errors
 
-    if not isinstance(data["moves"], list):
+    if not isinstance(data.get("moves", []), list):
         errors.append("'moves' must be a list")
         return errors
 
-    # Empty list is OK
-    if len(data["moves"]) == 0:
-        return []
-
-    # Validate each move
-    for i, move in enumerate(data["moves"]):
+    # Validate each move (an empty list is OK)
+    for i, move in enumerate(data.get("moves", [])):
         prefix = f"Move {i}"
 
         if not isinstance(move, dict):
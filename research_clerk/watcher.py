@@ -0,0 +1,422 @@
+"""Long-running watcher that auto-categorizes new unfiled papers."""
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import shutil
+import sqlite3
+import struct
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple, List, Dict, Any
+import anyio
+from .apply_suggestions import apply_suggestions
+from .backends.local_sqlite import LocalSQLiteBackend
+from .categorizer import categorize_unfiled
+from .config import find_zotero_database
+
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+# zotero writes in bursts; wait for this much quiet before probing
+DEBOUNCE_SECONDS = 1.0
+# stat polling interval where inotify is unavailable
+DEFAULT_POLL_INTERVAL = 60
+
+
+def log(log_file: Path, level: str, message: str):
+    """Print a watcher message and append it to the log file."""
+    line = f"[{datetime.now():%Y-%m-%d %H:%M:%S}] [{level}] {message}"
+    print(line, flush=True)
+    with open(log_file, "a") as f:
+        f.write(line + "\n")
+
+
+def notify(title: str, message: str, urgency: str = "normal"):
+    """Send a desktop notification if notify-send is available."""
+    if shutil.which("notify-send"):
+        subprocess.run(["notify-send", "-u", urgency, title, message], check=False)
+
+
+class FileChangeWaiter:
+    """
+    Block until zotero.sqlite or its WAL file changes.
+
+    Uses inotify on the database directory (the WAL is created and removed
+    as Zotero opens and checkpoints, so the directory is watched rather than
+    the files). Falls back to polling file stats where inotify is not
+    available.
+    """
+
+    def __init__(self, db_path: Path, poll_interval: int = DEFAULT_POLL_INTERVAL):
+        self.db_path = db_path
+        self.names = {db_path.name, f"{db_path.name}-wal"}
+        self.poll_interval = poll_interval
+        self.fd = self._init_inotify(db_path.parent)
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self.fd is not None
+
+    def _init_inotify(self, directory: Path) -> Optional[int]:
+        """Open an inotify watch on directory, or None if unsupported."""
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            return None
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            return None
+
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_CREATE | IN_MOVED_TO
+        if libc.inotify_add_watch(fd, str(directory).encode(), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _drain(self) -> bool:
+        """Read pending inotify events; True if any touched the database files."""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+
+            offset = 0
+            while offset + INOTIFY_EVENT_HEADER.size <= len(data):
+                _, _, _, length = INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+                start = offset + INOTIFY_EVENT_HEADER.size
+                name = data[start:start + length].split(b"\0", 1)[0].decode(errors="replace")
+                if name in self.names:
+                    relevant = True
+                offset = start + length
+
+    def _stat_signature(self) -> Tuple:
+        signature = []
+        for name in sorted(self.names):
+            try:
+                st = (self.db_path.parent / name).stat()
+                signature.append((name, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append((name, None, None))
+        return tuple(signature)
+
+    def wait(self):
+        """Block until a (debounced) change to the database files."""
+        if self.fd is None:
+            before = self._stat_signature()
+            while self._stat_signature() == before:
+                time.sleep(self.poll_interval)
+            return
+
+        while True:
+            select.select([self.fd], [], [])
+            if self._drain():
+                break
+
+        # let the write burst finish
+        while select.select([self.fd], [], [], DEBOUNCE_SECONDS)[0]:
+            self._drain()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class LibraryProbe:
+    """
+    Cheap "did anything change?" check to run before real queries.
+
+    Prefers PRAGMA data_version on a long-lived read-only connection, which
+    only changes when another connection commits, then MAX(itemID) (a single
+    b-tree seek) to see whether items were added. If Zotero holds the
+    database lock, falls back to MAX(itemID) on a fresh immutable connection,
+    which only sees changes once Zotero has checkpointed its WAL.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.conn: Optional[sqlite3.Connection] = None
+        self.data_version: Optional[int] = None
+        self.max_item_id: Optional[int] = None
+
+    def _read(self) -> Tuple[Optional[int], int]:
+        try:
+            if self.conn is None:
+                self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=0.1)
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self.data_version:
+                return data_version, self.max_item_id
+            return data_version, self.conn.execute("SELECT MAX(itemID) FROM items").fetchone()[0] or 0
+        except sqlite3.OperationalError:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+            backend = LocalSQLiteBackend(self.db_path).connect(read_only=True)
+            try:
+                return None, backend.conn.execute("SELECT MAX(itemID) FROM items").fetchone()[0] or 0
+            finally:
+                backend.close()
+
+    def items_added(self) -> bool:
+        """True if items were added since the previous call."""
+        data_version, max_item_id = self._read()
+        added = self.max_item_id is not None and max_item_id > self.max_item_id
+        self.data_version, self.max_item_id = data_version, max_item_id
+        return added
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def is_zotero_running() -> bool:
+    return subprocess.run(["pgrep", "-x", "zotero"], capture_output=True).returncode == 0
+
+
+def checkpoint_wal(db_path: Path):
+    """Fold Zotero's WAL into the main database file."""
+    conn = sqlite3.connect(str(db_path), timeout=10.0)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+
+def stop_zotero(db_path: Path, log_file: Path) -> bool:
+    """Shut Zotero down (gracefully, then forcefully) and checkpoint its WAL."""
+    if not is_zotero_running():
+        return True
+
+    log(log_file, "INFO", "Shutting down Zotero...")
+    subprocess.run(["pkill", "-TERM", "zotero"], check=False)
+    for _ in range(10):
+        if not is_zotero_running():
+            break
+        time.sleep(1)
+    else:
+        log(log_file, "WARN", "Forcing Zotero shutdown...")
+        subprocess.run(["pkill", "-9", "zotero"], check=False)
+        time.sleep(2)
+        if is_zotero_running():
+            log(log_file, "ERROR", "Failed to stop Zotero")
+            return False
+
+    # give file handles a moment to close
+    time.sleep(2)
+    try:
+        checkpoint_wal(db_path)
+    except sqlite3.Error as e:
+        log(log_file, "WARN", f"Failed to checkpoint WAL: {e}")
+    return True
+
+
+def start_zotero(log_file: Path) -> bool:
+    """Start Zotero detached from this process."""
+    for candidate in [shutil.which("zotero"), "/usr/bin/zotero", str(Path.home() / ".local" / "bin" / "zotero")]:
+        if candidate and Path(candidate).exists():
+            subprocess.Popen(
+                [candidate],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+            log(log_file, "INFO", "Started Zotero")
+            return True
+
+    log(log_file, "WARN", "Could not find Zotero executable - please start manually")
+    notify("Zotero Auto-Categorizer", "Please start Zotero manually")
+    return False
+
+
+class WatchState:
+    """
+    Persistent keyset cursor for the watcher, kept in a small JSON file.
+
+    `cursor` is the (dateAdded, itemID) of the last processed unfiled item;
+    `scanned_item_id` is the highest itemID already looked at, so each poll
+    only reads rows inserted since the previous one. The file is replaced
+    atomically, so a crash never leaves a half-written cursor behind.
+    """
+
+    def __init__(self, state_file: Path, cursor: Tuple[str, int], scanned_item_id: int):
+        self.state_file = state_file
+        self.cursor = cursor
+        self.scanned_item_id = scanned_item_id
+
+    @classmethod
+    def load(cls, state_file: Path, db_path: Path, legacy_file: Optional[Path] = None) -> "WatchState":
+        """
+        Read the state file, migrating a legacy dateAdded watermark if present.
+
+        On the first run the cursor starts at the newest existing unfiled item,
+        so only items added from now on are categorized.
+        """
+        if state_file.exists():
+            data = json.loads(state_file.read_text())
+            return cls(state_file, (data["date_added"], data["item_id"]), data["scanned_item_id"])
+
+        backend = LocalSQLiteBackend(db_path).connect(read_only=True)
+        try:
+            max_item_id = backend.get_max_item_id()
+            if legacy_file is not None and legacy_file.exists():
+                # "dateAdded > watermark": every item on the watermark second counts as seen;
+                # rescan from the start once since the old file didn't track itemIDs
+                state = cls(state_file, (legacy_file.read_text().strip(), max_item_id), 0)
+            else:
+                cursor = backend.get_unfiled_cursor() or ("1970-01-01 00:00:00", 0)
+                state = cls(state_file, cursor, max_item_id)
+        finally:
+            backend.close()
+
+        state.save()
+        if legacy_file is not None:
+            legacy_file.unlink(missing_ok=True)
+        return state
+
+    def save(self):
+        data = {
+            "date_added": self.cursor[0],
+            "item_id": self.cursor[1],
+            "scanned_item_id": self.scanned_item_id
+        }
+        tmp_file = self.state_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(data, indent=2) + "\n")
+        os.replace(tmp_file, self.state_file)
+
+    def __str__(self) -> str:
+        return f"{self.cursor[0]} (item {self.cursor[1]})"
+
+
+def list_new_unfiled_items(db_path: Path, state: WatchState) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Unfiled items past the watch cursor, plus the highest itemID scanned.
+
+    Reads through the WAL when possible so items Zotero hasn't checkpointed
+    yet are visible, falling back to an immutable snapshot if Zotero holds
+    the database lock. The high-water itemID is read before the listing, so
+    anything inserted in between is simply scanned again on the next poll.
+    """
+    for immutable in (False, True):
+        backend = LocalSQLiteBackend(db_path).connect(read_only=True, immutable=immutable)
+        try:
+            scanned_item_id = backend.get_max_item_id()
+            items = backend.list_unfiled_items_after(state.cursor, state.scanned_item_id)
+            return items, scanned_item_id
+        except sqlite3.OperationalError:
+            if immutable:
+                raise
+        finally:
+            backend.close()
+
+
+async def process_new_items(
+    items: List[Dict[str, Any]],
+    db_path: Path,
+    output_dir: Path,
+    model: str,
+    log_file: Path
+) -> bool:
+    """Categorize and apply a batch of new unfiled items, bracketed by a Zotero restart."""
+    for item in items:
+        log(log_file, "INFO", f"  - {item['title']} (added: {item['dateAdded']})")
+
+    suggestions_file = output_dir / "suggestions.json"
+    suggestions_file.unlink(missing_ok=True)
+
+    # apply needs Zotero closed; stop it before generating so both steps see the same data
+    was_running = is_zotero_running()
+    if not stop_zotero(db_path, log_file):
+        notify("Zotero Auto-Categorizer", "Failed to shut down Zotero", "critical")
+        return False
+
+    try:
+        # exactly the items detected, not whatever the newest unfiled items are by now
+        await categorize_unfiled(
+            dry_run=True, batch_size=len(items), output_dir=output_dir, model=model,
+            keys=[item["key"] for item in items],
+        )
+        if not suggestions_file.exists():
+            log(log_file, "WARN", "No suggestions generated - nothing to apply")
+            return True
+        apply_suggestions(suggestions_file)
+    except Exception as e:
+        log(log_file, "ERROR", f"Processing failed: {e}")
+        notify("Zotero Auto-Categorizer", "Failed to categorize new papers", "critical")
+        return False
+    finally:
+        if was_running:
+            start_zotero(log_file)
+
+    log(log_file, "SUCCESS", f"Auto-categorized {len(items)} new paper(s)")
+    notify("Zotero Auto-Categorizer", f"Categorized {len(items)} new paper(s)")
+    return True
+
+
+async def watch(output_dir: Path, model: str = "claude-haiku-4-5", poll_interval: int = DEFAULT_POLL_INTERVAL):
+    """
+    Watch the Zotero database and categorize new unfiled papers as they arrive.
+
+    Runs as one long-lived process: it sleeps in inotify until zotero.sqlite
+    or its WAL changes, runs a cheap probe, and only queries for unfiled
+    items when items were actually added.
+
+    Args:
+        output_dir: Where suggestions, watch_state.json and watch.log are kept
+        model: Claude model used for categorization
+        poll_interval: Seconds between stat polls when inotify is unavailable
+    """
+    db_path = find_zotero_database()
+    log_file = output_dir / "watch.log"
+    state_file = output_dir / "watch_state.json"
+
+    waiter = FileChangeWaiter(db_path, poll_interval)
+    probe = LibraryProbe(db_path)
+    probe.items_added()  # prime the probe with the current state
+
+    state = WatchState.load(state_file, db_path, legacy_file=output_dir / "last_unfiled_timestamp")
+    mode = "inotify" if waiter.uses_inotify else f"polling every {poll_interval}s"
+    log(log_file, "INFO", f"Watching {db_path} ({mode}), baseline: {state}")
+
+    retry_pending = False
+    try:
+        while True:
+            await anyio.to_thread.run_sync(waiter.wait, abandon_on_cancel=True)
+            if not probe.items_added() and not retry_pending:
+                continue
+
+            new_items, scanned_item_id = list_new_unfiled_items(db_path, state)
+            if not new_items:
+                # new rows were all filed, notes or attachments; don't scan them again
+                if scanned_item_id > state.scanned_item_id:
+                    state.scanned_item_id = scanned_item_id
+                    state.save()
+                continue
+
+            log(log_file, "INFO", f"Detected {len(new_items)} new unfiled item(s)")
+            if await process_new_items(new_items, db_path, output_dir, model, log_file):
+                last = new_items[-1]
+                state.cursor = (last["dateAdded"], last["itemID"])
+                state.scanned_item_id = max(state.scanned_item_id, scanned_item_id)
+                state.save()
+                log(log_file, "INFO", f"Updated baseline to: {state}")
+                retry_pending = False
+            else:
+                log(log_file, "ERROR", "Processing failed - will retry on next change")
+                retry_pending = True
+    finally:
+        waiter.close()
+        probe.close()
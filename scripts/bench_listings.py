@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+bench_listings.py - Time the filed/unfiled listing queries on a synthetic library
+
+Builds a throwaway database with the Zotero tables and indexes the listing
+queries touch, then for each listing prints the query plan SQLite picks and
+compares it against the old DISTINCT-over-field-pivot query. With --check it
+also fails if a plan doesn't use the index that listing relies on, or sorts
+a listing that should come out of its scan in order.
+
+Usage: uv run python scripts/bench_listings.py [--items 100000] [--check]
+"""
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from research_clerk.backends.local_sqlite import LocalSQLiteBackend
+
+
+# subset of the zotero schema (tables, primary keys and indexes as shipped by zotero)
+SCHEMA = """
+CREATE TABLE libraries (libraryID INTEGER PRIMARY KEY, type TEXT NOT NULL);
+CREATE TABLE itemTypes (itemTypeID INTEGER PRIMARY KEY, typeName TEXT);
+CREATE TABLE fields (fieldID INTEGER PRIMARY KEY, fieldName TEXT, fieldFormatID INT);
+CREATE TABLE items (
+    itemID INTEGER PRIMARY KEY, itemTypeID INT NOT NULL,
+    dateAdded TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    dateModified TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    clientDateModified TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    libraryID INT NOT NULL, key TEXT NOT NULL,
+    version INT NOT NULL DEFAULT 0, synced INT NOT NULL DEFAULT 0,
+    UNIQUE (libraryID, key)
+);
+CREATE INDEX items_synced ON items(synced);
+CREATE TABLE itemDataValues (valueID INTEGER PRIMARY KEY, value UNIQUE);
+CREATE TABLE itemData (itemID INT, fieldID INT, valueID, PRIMARY KEY (itemID, fieldID));
+CREATE INDEX itemData_fieldID ON itemData(fieldID);
+CREATE TABLE itemNotes (itemID INTEGER PRIMARY KEY, parentItemID INT, note TEXT, title TEXT);
+CREATE TABLE itemAttachments (itemID INTEGER PRIMARY KEY, parentItemID INT, linkMode INT);
+CREATE TABLE collections (
+    collectionID INTEGER PRIMARY KEY, collectionName TEXT NOT NULL,
+    parentCollectionID INT DEFAULT NULL, libraryID INT NOT NULL, key TEXT NOT NULL,
+    UNIQUE (libraryID, key)
+);
+CREATE TABLE collectionItems (
+    collectionID INT NOT NULL, itemID INT NOT NULL, orderIndex INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (collectionID, itemID)
+);
+CREATE INDEX collectionItems_itemID ON collectionItems(itemID);
+CREATE TABLE deletedItems (itemID INTEGER PRIMARY KEY, dateDeleted DEFAULT CURRENT_TIMESTAMP NOT NULL);
+"""
+
+FIELDS = ["title", "abstractNote", "publicationTitle", "url", "date", "DOI", "extra", "accessDate"]
+
+OLD_UNFILED = """
+SELECT DISTINCT i.itemID, i.key, iv.value AS title, it.typeName AS itemType
+FROM items i
+LEFT JOIN collectionItems ci ON i.itemID = ci.itemID
+LEFT JOIN itemAttachments ia ON i.itemID = ia.itemID
+LEFT JOIN itemNotes inotes ON i.itemID = inotes.itemID
+LEFT JOIN itemData id ON i.itemID = id.itemID
+LEFT JOIN itemDataValues iv ON id.valueID = iv.valueID
+LEFT JOIN fields f ON id.fieldID = f.fieldID
+LEFT JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
+WHERE ci.itemID IS NULL AND ia.itemID IS NULL AND inotes.itemID IS NULL
+  AND i.itemID NOT IN (SELECT itemID FROM deletedItems)
+  AND f.fieldName = 'title'
+ORDER BY i.dateAdded DESC
+"""
+
+OLD_FILED = """
+SELECT DISTINCT i.itemID, i.key, iv.value AS title, it.typeName AS itemType
+FROM items i
+JOIN collectionItems ci ON i.itemID = ci.itemID
+LEFT JOIN itemAttachments ia ON i.itemID = ia.itemID
+LEFT JOIN itemNotes inotes ON i.itemID = inotes.itemID
+LEFT JOIN itemData id ON i.itemID = id.itemID
+LEFT JOIN itemDataValues iv ON id.valueID = iv.valueID
+LEFT JOIN fields f ON id.fieldID = f.fieldID
+LEFT JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
+WHERE ia.itemID IS NULL AND inotes.itemID IS NULL
+  AND i.itemID NOT IN (SELECT itemID FROM deletedItems)
+  AND f.fieldName = 'title'
+GROUP BY i.itemID, i.key, iv.value, it.typeName
+ORDER BY i.dateAdded DESC
+"""
+
+
+# plan steps each listing must contain; losing one means a full scan crept back in
+EXPECTED_PLAN = {
+    "list_unfiled_items": [
+        "SCAN i",
+        "SEARCH id USING INDEX sqlite_autoindex_itemData_1",
+        "SEARCH ci USING COVERING INDEX collectionItems_itemID",
+    ],
+    "list_filed_items": [
+        "SCAN i",
+        "SEARCH id USING INDEX sqlite_autoindex_itemData_1",
+        "SEARCH ci USING COVERING INDEX collectionItems_itemID",
+    ],
+    "list_unfiled_items_after": [
+        "SEARCH i USING INTEGER PRIMARY KEY (rowid>?)",
+        "SEARCH id USING INDEX sqlite_autoindex_itemData_1",
+        "SEARCH ci USING COVERING INDEX collectionItems_itemID",
+    ],
+}
+
+# listings that page in index order; sorting the whole result set for them means paging got slow again
+UNSORTED = {"list_unfiled_items", "list_filed_items"}
+
+
+def missing_plan_steps(name: str, plan: List[str]) -> List[str]:
+    """Expected plan steps for a listing that its query plan doesn't contain (or a sort it shouldn't)."""
+    missing = [step for step in EXPECTED_PLAN[name] if not any(line.startswith(step) for line in plan)]
+    if name in UNSORTED and any(line.startswith("USE TEMP B-TREE") for line in plan):
+        missing.append("no USE TEMP B-TREE (rows should come out of the scan in order)")
+    return missing
+
+
+def build_library(db_path: Path, n_items: int, seed: int = 0):
+    """Populate a synthetic library: ~70% papers with 8 fields, the rest notes/attachments."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO libraries VALUES (1, 'user')")
+    conn.executemany("INSERT INTO itemTypes VALUES (?, ?)",
+                     [(1, "note"), (2, "journalArticle"), (3, "attachment")])
+    conn.executemany("INSERT INTO fields VALUES (?, ?, NULL)",
+                     [(i, name) for i, name in enumerate(FIELDS, 1)])
+    conn.executemany("INSERT INTO collections VALUES (?, ?, NULL, 1, ?)",
+                     [(c, f"Collection {c}", f"C{c:07d}") for c in range(1, 201)])
+
+    items, data, values, notes, attachments, memberships, deleted = [], [], [], [], [], [], []
+    for item_id in range(1, n_items + 1):
+        kind = rng.choices([2, 1, 3], weights=[7, 1, 2])[0]
+        items.append((item_id, kind, f"2024-{1 + item_id % 12:02d}-01 00:00:{item_id % 60:02d}",
+                      f"K{item_id:07d}"))
+        if kind == 1:
+            notes.append((item_id,))
+        elif kind == 3:
+            attachments.append((item_id,))
+        else:
+            for field_id in range(1, len(FIELDS) + 1):
+                value_id = len(values) + 1
+                values.append((value_id, f"{FIELDS[field_id - 1]} value {item_id}"))
+                data.append((item_id, field_id, value_id))
+            if rng.random() < 0.6:
+                memberships.append((rng.randint(1, 200), item_id))
+        if rng.random() < 0.01:
+            deleted.append((item_id,))
+
+    conn.executemany("INSERT INTO items (itemID, itemTypeID, dateAdded, libraryID, key) "
+                     "VALUES (?, ?, ?, 1, ?)", items)
+    conn.executemany("INSERT INTO itemDataValues VALUES (?, ?)", values)
+    conn.executemany("INSERT INTO itemData VALUES (?, ?, ?)", data)
+    conn.executemany("INSERT INTO itemNotes (itemID) VALUES (?)", notes)
+    conn.executemany("INSERT INTO itemAttachments (itemID) VALUES (?)", attachments)
+    conn.executemany("INSERT OR IGNORE INTO collectionItems (collectionID, itemID) VALUES (?, ?)",
+                     memberships)
+    conn.executemany("INSERT INTO deletedItems (itemID) VALUES (?)", deleted)
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat: int = 3) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000, help="synthetic library size")
+    parser.add_argument("--check", action="store_true",
+                        help="exit non-zero if a listing's plan doesn't use its expected index")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "zotero.sqlite"
+        print(f"Building synthetic library with {args.items} items...")
+        build_library(db_path, args.items)
+
+        backend = LocalSQLiteBackend(db_path).connect(read_only=True)
+
+        # capture the SQL the backend actually runs so we can EXPLAIN it
+        statements = []
+        backend.conn.set_trace_callback(statements.append)
+
+        # the watcher's incremental listing: the last 1% of itemIDs past an old cursor
+        recent = backend.get_max_item_id() - max(args.items // 100, 1)
+        listings = [
+            ("list_unfiled_items", backend.list_unfiled_items, OLD_UNFILED),
+            ("list_filed_items", backend.list_filed_items, OLD_FILED),
+            ("list_unfiled_items_after", lambda: backend.list_unfiled_items_after(("", 0), recent), None),
+        ]
+        for name, method, old_query in listings:
+            statements.clear()
+            rows = method()
+            query = statements[-1]
+
+            print(f"\n{name}: {len(rows)} rows")
+            plan = [row[3] for row in backend.conn.execute(f"EXPLAIN QUERY PLAN {query}")]
+            for line in plan:
+                print(f"  plan: {line}")
+            if args.check:
+                missing = missing_plan_steps(name, plan)
+                for step in missing:
+                    print(f"  ✗ expected in plan: {step}")
+                if missing:
+                    failures.append(name)
+                else:
+                    print("  ✓ plan uses the expected indexes")
+
+            new_ms = timed(method)
+            if old_query is None:
+                print(f"  new: {new_ms:8.1f} ms")
+                continue
+            old_ms = timed(lambda: backend.conn.execute(old_query).fetchall())
+            print(f"  old: {old_ms:8.1f} ms   new: {new_ms:8.1f} ms   speedup: {old_ms / new_ms:.1f}x")
+
+        backend.close()
+
+    if failures:
+        sys.exit(f"\n✗ Unexpected query plan for: {', '.join(failures)}")
+
+if __name__ == "__main__":
+    main()
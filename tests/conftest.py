@@ -0,0 +1,100 @@
+"""Shared fixtures: a small synthetic zotero database with a user and a group library."""
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from research_clerk.backends.local_sqlite import LocalSQLiteBackend
+
+
+# subset of the zotero schema (tables, primary keys and indexes as shipped by zotero)
+SCHEMA = """
+CREATE TABLE libraries (libraryID INTEGER PRIMARY KEY, type TEXT NOT NULL);
+CREATE TABLE itemTypes (itemTypeID INTEGER PRIMARY KEY, typeName TEXT);
+CREATE TABLE fields (fieldID INTEGER PRIMARY KEY, fieldName TEXT, fieldFormatID INT);
+CREATE TABLE items (
+    itemID INTEGER PRIMARY KEY, itemTypeID INT NOT NULL,
+    dateAdded TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    dateModified TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    clientDateModified TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    libraryID INT NOT NULL, key TEXT NOT NULL,
+    version INT NOT NULL DEFAULT 0, synced INT NOT NULL DEFAULT 0,
+    UNIQUE (libraryID, key)
+);
+CREATE INDEX items_synced ON items(synced);
+CREATE TABLE itemDataValues (valueID INTEGER PRIMARY KEY, value UNIQUE);
+CREATE TABLE itemData (itemID INT, fieldID INT, valueID, PRIMARY KEY (itemID, fieldID));
+CREATE INDEX itemData_fieldID ON itemData(fieldID);
+CREATE TABLE itemNotes (itemID INTEGER PRIMARY KEY, parentItemID INT, note TEXT, title TEXT);
+CREATE TABLE itemAttachments (itemID INTEGER PRIMARY KEY, parentItemID INT, linkMode INT);
+CREATE TABLE collections (
+    collectionID INTEGER PRIMARY KEY, collectionName TEXT NOT NULL,
+    clientDateModified TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    parentCollectionID INT DEFAULT NULL, libraryID INT NOT NULL, key TEXT NOT NULL,
+    version INT NOT NULL DEFAULT 0, synced INT NOT NULL DEFAULT 0,
+    UNIQUE (libraryID, key)
+);
+CREATE TABLE collectionItems (
+    collectionID INT NOT NULL, itemID INT NOT NULL, orderIndex INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (collectionID, itemID)
+);
+CREATE INDEX collectionItems_itemID ON collectionItems(itemID);
+CREATE TABLE tags (tagID INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE itemTags (itemID INT NOT NULL, tagID INT NOT NULL, type INT NOT NULL, PRIMARY KEY (itemID, tagID));
+CREATE INDEX itemTags_tagID ON itemTags(tagID);
+CREATE TABLE deletedItems (itemID INTEGER PRIMARY KEY, dateDeleted DEFAULT CURRENT_TIMESTAMP NOT NULL);
+CREATE TABLE deletedCollections (collectionID INTEGER PRIMARY KEY, dateDeleted DEFAULT CURRENT_TIMESTAMP NOT NULL);
+"""
+
+# (libraryID, type): the user library plus one group library
+LIBRARIES = [(1, "user"), (2, "group")]
+
+# (collectionID, name, parentCollectionID, libraryID, key)
+COLLECTIONS = [
+    (1, "Papers", None, 1, "USERCOL1"),
+    (2, "Group Papers", None, 2, "GROUPCL1"),
+    (3, "Methods", 2, 2, "GROUPCL2"),
+    (4, "Archive", None, 2, "GROUPCL3"),
+]
+
+# (itemID, libraryID, key, title)
+ITEMS = [
+    (1, 1, "USERITM1", "A paper in my library"),
+    (2, 1, "USERITM2", "Another paper in my library"),
+    (3, 2, "GROUPIT1", "A paper in the group library"),
+    (4, 2, "GROUPIT2", "Another paper in the group library"),
+]
+
+
+def build_database(db_path: Path):
+    """Write the two-library test database to db_path."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO libraries VALUES (?, ?)", LIBRARIES)
+    conn.execute("INSERT INTO itemTypes VALUES (2, 'journalArticle')")
+    conn.execute("INSERT INTO fields VALUES (1, 'title', NULL)")
+    conn.executemany(
+        "INSERT INTO collections (collectionID, collectionName, parentCollectionID, libraryID, key) "
+        "VALUES (?, ?, ?, ?, ?)", COLLECTIONS)
+    for item_id, library_id, key, title in ITEMS:
+        conn.execute("INSERT INTO items (itemID, itemTypeID, libraryID, key) VALUES (?, 2, ?, ?)",
+                     (item_id, library_id, key))
+        conn.execute("INSERT INTO itemDataValues VALUES (?, ?)", (item_id, title))
+        conn.execute("INSERT INTO itemData VALUES (?, 1, ?)", (item_id, item_id))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path) -> Path:
+    path = tmp_path / "zotero.sqlite"
+    build_database(path)
+    return path
+
+
+@pytest.fixture
+def backend(db_path):
+    """Write-mode backend on the test database."""
+    backend = LocalSQLiteBackend(db_path).connect(read_only=False)
+    yield backend
+    backend.close()
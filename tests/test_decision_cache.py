@@ -0,0 +1,52 @@
+"""DecisionCache hits for proposed paths and misses once the existing part of a path changes."""
+from research_clerk.decision_cache import DecisionCache, existing_prefix
+
+
+class Backend:
+    """Just enough of a read backend for DecisionCache.lookup."""
+
+    def get_items_details(self, keys, fields):
+        return [{"key": key, "title": f"Paper {key}"} for key in keys]
+
+
+def decide(cache, key, path, known_paths):
+    cache.lookup(Backend(), [key], known_paths)
+    cache.store([{"item_key": key, "collection_path": path, "tags": ["t"], "reasoning": "r"}])
+
+
+def test_existing_prefix():
+    existing = {"science", "science/physics"}
+    assert existing_prefix("Science/Physics/Optics", existing) == "Science/Physics"
+    assert existing_prefix("Science/Biology", existing) == "Science"
+    assert existing_prefix("Art/Painting", existing) == ""
+
+
+def test_proposed_path_hits_while_its_parent_exists(tmp_path):
+    cache = DecisionCache(tmp_path / "cache.sqlite", "model", "v1")
+    decide(cache, "ITEM0001", "Science/Physics/Optics", ["Science", "Science/Physics"])
+
+    hits, misses = cache.lookup(Backend(), ["ITEM0001"], ["Science", "Science/Physics"])
+
+    assert misses == []
+    assert hits == [{
+        "item_key": "ITEM0001", "title": "Paper ITEM0001",
+        "collection_path": "Science/Physics/Optics", "tags": ["t"], "reasoning": "r",
+    }]
+
+
+def test_proposed_path_misses_once_its_parent_is_gone(tmp_path):
+    cache = DecisionCache(tmp_path / "cache.sqlite", "model", "v1")
+    decide(cache, "ITEM0001", "Science/Physics/Optics", ["Science", "Science/Physics"])
+
+    hits, misses = cache.lookup(Backend(), ["ITEM0001"], ["Science", "Science/Physical Sciences"])
+
+    assert hits == []
+    assert misses == ["ITEM0001"]
+
+
+def test_existing_leaf_misses_once_renamed(tmp_path):
+    cache = DecisionCache(tmp_path / "cache.sqlite", "model", "v1")
+    decide(cache, "ITEM0001", "Science/Physics", ["Science", "Science/Physics"])
+
+    assert cache.lookup(Backend(), ["ITEM0001"], ["Science", "Science/Physics"])[1] == []
+    assert cache.lookup(Backend(), ["ITEM0001"], ["Science"])[1] == ["ITEM0001"]
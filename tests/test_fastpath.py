@@ -0,0 +1,27 @@
+"""run_fast_path splits every key into accepted or remaining."""
+from research_clerk import fastpath
+
+
+class Backend:
+    """Returns details only for keys it knows, like a backend asked about a deleted item."""
+
+    def get_items_details(self, keys, fields):
+        return [{"key": key, "title": key} for key in keys if key != "GONE0001"]
+
+
+class Classifier:
+    def __init__(self, index, backend):
+        pass
+
+    def classify(self, item):
+        confidence = 0.9 if item["key"].startswith("SURE") else 0.1
+        return {"item_key": item["key"], "collection_path": "Science", "tags": ["a", "b"], "confidence": confidence}
+
+
+def test_keys_without_details_are_left_for_the_agent(monkeypatch):
+    monkeypatch.setattr(fastpath, "LocalClassifier", Classifier)
+
+    accepted, remaining, _ = fastpath.run_fast_path(Backend(), None, ["SURE0001", "GONE0001", "MAYB0001"], 0.5)
+
+    assert [suggestion["item_key"] for suggestion in accepted] == ["SURE0001"]
+    assert remaining == ["GONE0001", "MAYB0001"]
@@ -0,0 +1,53 @@
+"""Query plans of the item listings: index probes only, and pages that don't sort the whole result."""
+import pytest
+
+from research_clerk.backends.local_sqlite import LocalSQLiteBackend
+
+
+@pytest.fixture
+def reader(db_path):
+    backend = LocalSQLiteBackend(db_path).connect(read_only=True)
+    yield backend
+    backend.close()
+
+
+def query_plan(backend, listing):
+    """EXPLAIN QUERY PLAN lines of the last statement `listing` runs."""
+    statements = []
+    backend.conn.set_trace_callback(statements.append)
+    listing()
+    backend.conn.set_trace_callback(None)
+    return [row[3] for row in backend.conn.execute(f"EXPLAIN QUERY PLAN {statements[-1]}")]
+
+
+def has_step(plan, step):
+    return any(line.startswith(step) for line in plan)
+
+
+@pytest.mark.parametrize("listing", [
+    lambda b: b.list_unfiled_items(limit=50),
+    lambda b: b.list_unfiled_items(limit=50, offset=100, item_type="journalArticle"),
+    lambda b: b.list_filed_items(limit=50, since="2024-01-01"),
+    lambda b: b.list_filed_items(),
+])
+def test_listings_page_in_item_order(reader, listing):
+    plan = query_plan(reader, lambda: listing(reader))
+
+    # items scanned backwards by rowid, everything else probed by index
+    assert has_step(plan, "SCAN i")
+    assert has_step(plan, "SEARCH id USING INDEX sqlite_autoindex_itemData_1 (itemID=? AND fieldID=?)")
+    assert has_step(plan, "SEARCH ci USING COVERING INDEX collectionItems_itemID (itemID=?)")
+    assert not has_step(plan, "USE TEMP B-TREE")
+
+
+def test_listings_are_newest_item_first(reader):
+    keys = [item["key"] for item in reader.list_unfiled_items()]
+    assert keys == ["GROUPIT2", "GROUPIT1", "USERITM2", "USERITM1"]
+    assert [item["key"] for item in reader.list_unfiled_items(limit=2, offset=1)] == ["GROUPIT1", "USERITM2"]
+
+
+def test_incremental_listing_scans_only_new_items(reader):
+    plan = query_plan(reader, lambda: reader.list_unfiled_items_after(("", 0), min_item_id=2))
+
+    assert has_step(plan, "SEARCH i USING INTEGER PRIMARY KEY (rowid>?)")
+    assert has_step(plan, "SEARCH ci USING COVERING INDEX collectionItems_itemID (itemID=?)")
@@ -0,0 +1,139 @@
+"""LocalSQLiteBackend writes and paging against a database with a user and a group library."""
+import pytest
+
+from research_clerk.backends.local_sqlite import LocalSQLiteBackend
+
+
+def memberships(backend, collection_key):
+    return {row[0] for row in backend.conn.execute("""
+        SELECT i.key FROM collectionItems ci
+        JOIN items i ON i.itemID = ci.itemID
+        JOIN collections c ON c.collectionID = ci.collectionID
+        WHERE c.key = ?
+    """, (collection_key,))}
+
+
+def item_tags(backend, item_key):
+    return {row[0] for row in backend.conn.execute("""
+        SELECT t.name FROM itemTags it
+        JOIN items i ON i.itemID = it.itemID
+        JOIN tags t ON t.tagID = it.tagID
+        WHERE i.key = ?
+    """, (item_key,))}
+
+
+def test_add_to_collections_in_both_libraries(backend):
+    added = backend.add_to_collections([
+        ("USERITM1", "USERCOL1"),
+        ("GROUPIT1", "GROUPCL1"),
+        ("GROUPIT2", "GROUPCL2"),
+    ])
+
+    assert added == 3
+    assert memberships(backend, "USERCOL1") == {"USERITM1"}
+    assert memberships(backend, "GROUPCL1") == {"GROUPIT1"}
+    assert memberships(backend, "GROUPCL2") == {"GROUPIT2"}
+
+
+def test_remove_from_collections_in_group_library(backend):
+    backend.add_to_collections([("GROUPIT1", "GROUPCL1"), ("GROUPIT2", "GROUPCL1")])
+
+    removed = backend.remove_from_collections([("GROUPIT1", "GROUPCL1")])
+
+    assert removed == 1
+    assert memberships(backend, "GROUPCL1") == {"GROUPIT2"}
+
+
+def test_add_tags_to_items_in_both_libraries(backend):
+    added = backend.add_tags_to_items([("USERITM1", "survey"), ("GROUPIT1", "survey")])
+
+    assert added == 2
+    assert item_tags(backend, "USERITM1") == {"survey"}
+    assert item_tags(backend, "GROUPIT1") == {"survey"}
+
+
+def test_item_from_another_library_is_rejected(backend):
+    with pytest.raises(ValueError, match="Item not found: USERITM1"):
+        backend.add_to_collections([("USERITM1", "GROUPCL1")])
+    assert memberships(backend, "GROUPCL1") == set()
+
+
+def test_unknown_keys_are_rejected(backend):
+    with pytest.raises(ValueError, match="Collection not found: MISSING1"):
+        backend.add_to_collections([("GROUPIT1", "MISSING1")])
+    with pytest.raises(ValueError, match="Item not found: MISSING2"):
+        backend.add_tags_to_items([("MISSING2", "survey")])
+
+
+def collection(backend, key):
+    return backend.conn.execute(
+        "SELECT collectionName, parentCollectionID FROM collections WHERE key = ?", (key,)
+    ).fetchone()
+
+
+def test_rename_and_reparent_group_collection(backend):
+    backend.rename_collection("GROUPCL2", "Methodology")
+    backend.reparent_collection("GROUPCL2", "GROUPCL3")
+
+    assert tuple(collection(backend, "GROUPCL2")) == ("Methodology", 4)
+
+    backend.reparent_collection("GROUPCL2", None)
+
+    assert collection(backend, "GROUPCL2")["parentCollectionID"] is None
+
+
+def test_merge_group_collections(backend):
+    backend.add_to_collections([("GROUPIT1", "GROUPCL1"), ("GROUPIT2", "GROUPCL3")])
+
+    counts = backend.merge_collection("GROUPCL1", "GROUPCL3")
+
+    assert counts == {"added": 1, "already_there": 0, "subcollections": 1}
+    assert memberships(backend, "GROUPCL3") == {"GROUPIT1", "GROUPIT2"}
+    assert collection(backend, "GROUPCL2")["parentCollectionID"] == 4
+
+
+def test_collection_ops_across_libraries_are_rejected(backend):
+    with pytest.raises(ValueError, match="different libraries"):
+        backend.reparent_collection("USERCOL1", "GROUPCL1")
+    with pytest.raises(ValueError, match="different libraries"):
+        backend.merge_collection("USERCOL1", "GROUPCL1")
+    assert collection(backend, "USERCOL1")["parentCollectionID"] is None
+
+
+def test_create_collection_under_group_collection(backend):
+    key = backend.create_collection("Datasets", parent_key="GROUPCL1")
+
+    row = backend.conn.execute(
+        "SELECT libraryID, parentCollectionID FROM collections WHERE key = ?", (key,)
+    ).fetchone()
+    assert tuple(row) == (2, 2)
+
+
+def test_item_collections_pages_walk_the_whole_map(backend):
+    backend.add_to_collections([
+        ("USERITM1", "USERCOL1"), ("GROUPIT1", "GROUPCL1"), ("GROUPIT1", "GROUPCL2"), ("GROUPIT2", "GROUPCL3"),
+    ])
+
+    pages, after = [], 0
+    while after is not None:
+        page, after = backend.item_collections_page(after, 2)
+        pages.append(page)
+
+    assert pages == [
+        {"USERITM1": ["Papers"], "GROUPIT1": ["Group Papers", "Group Papers/Methods"]},
+        {"GROUPIT2": ["Archive"]},
+    ]
+    assert dict(backend.iter_item_collections()) == {**pages[0], **pages[1]}
+
+
+def test_backup_manager_is_only_created_for_writes(db_path, monkeypatch):
+    # an unusable backup setting must not break read-only backends
+    monkeypatch.setenv("RESEARCH_CLERK_BACKUP_COMPRESSION", "bogus")
+    reader = LocalSQLiteBackend(db_path).connect(read_only=True)
+    with reader:
+        reader.list_unfiled_items()
+    assert reader._backups is None
+
+    monkeypatch.delenv("RESEARCH_CLERK_BACKUP_COMPRESSION")
+    with LocalSQLiteBackend(db_path).connect(read_only=False) as writer:
+        assert writer.backup_path.exists()